@@ -0,0 +1,192 @@
+"""
+Load test: WSGI (gunicorn sync) vs ASGI (gunicorn + uvicorn) под смешанной нагрузкой.
+
+Часть клиентов бьёт в медленный endpoint (ожидание I/O, как экспорт или
+внешний API), остальные - в быстрый. Под WSGI медленные запросы занимают
+воркеры целиком, и быстрые встают в очередь; под ASGI ожидание не блокирует
+event loop.
+
+Запуск: python scripts/bench_asgi.py [--workers 2] [--clients 50] [--duration 10]
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+BENCH_SETTINGS = """
+from config.settings.test import *
+
+ROOT_URLCONF = "bench_urls"
+ALLOWED_HOSTS = ["*"]
+PERFORMANCE_ACCESS_LOG = False
+"""
+
+BENCH_URLS = """
+import asyncio
+import os
+import time
+
+from django.http import JsonResponse
+from django.urls import path
+
+SLOW_SECONDS = float(os.environ["BENCH_SLOW_SECONDS"])
+
+
+def fast_sync(request):
+    return JsonResponse({"ok": True})
+
+
+def slow_sync(request):
+    time.sleep(SLOW_SECONDS)
+    return JsonResponse({"ok": True})
+
+
+async def fast_async(request):
+    return JsonResponse({"ok": True})
+
+
+async def slow_async(request):
+    await asyncio.sleep(SLOW_SECONDS)
+    return JsonResponse({"ok": True})
+
+
+if os.environ["BENCH_MODE"] == "asgi":
+    urlpatterns = [path("fast/", fast_async), path("slow/", slow_async)]
+else:
+    urlpatterns = [path("fast/", fast_sync), path("slow/", slow_sync)]
+"""
+
+SERVERS = {
+    "wsgi": ["config.wsgi:application"],
+    "asgi": ["config.asgi:application", "--worker-class", "uvicorn_worker.UvicornWorker"],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def request(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    status_line = await reader.readline()
+    await reader.read()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def client(port, path, deadline, latencies, errors):
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            status = await asyncio.wait_for(request(port, path), timeout=30)
+        except (TimeoutError, OSError):
+            errors.append(path)
+            continue
+        if status != 200:
+            errors.append(path)
+        latencies.append(time.perf_counter() - start)
+
+
+async def wait_ready(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if await request(port, "/fast/") == 200:
+                return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def load(port, clients, slow_clients, duration):
+    await wait_ready(port)
+    fast, slow, errors = [], [], []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(
+        *(client(port, "/slow/", deadline, slow, errors) for _ in range(slow_clients)),
+        *(client(port, "/fast/", deadline, fast, errors) for _ in range(clients - slow_clients)),
+    )
+    return fast, slow, errors
+
+
+def percentile(samples, pct):
+    if not samples:
+        return float("nan")
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(mode, args, bench_dir):
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC_DIR), bench_dir]),
+        "DJANGO_SETTINGS_MODULE": "bench_settings",
+        "BENCH_MODE": mode,
+        "BENCH_SLOW_SECONDS": str(args.slow_seconds),
+        # gunicorn.conf.py подхватывается из SRC_DIR: WSGI - классический sync воркер
+        "SERVER_MODE": mode,
+        "WEB_THREADS": "1",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            *SERVERS[mode],
+            "--bind",
+            f"127.0.0.1:{port}",
+            "--workers",
+            str(args.workers),
+            "--timeout",
+            "300",
+            "--log-level",
+            "warning",
+        ],
+        cwd=SRC_DIR,
+        env=env,
+    )
+    try:
+        fast, slow, errors = asyncio.run(load(port, args.clients, args.slow_clients, args.duration))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(
+        f"{mode}: fast {len(fast) / args.duration:8.1f} req/s "
+        f"(p50 {percentile(fast, 50) * 1000:7.1f} ms, p99 {percentile(fast, 99) * 1000:7.1f} ms)  "
+        f"slow {len(slow) / args.duration:6.1f} req/s  errors {len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--slow-clients", type=int, default=5)
+    parser.add_argument("--slow-seconds", type=float, default=1.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as bench_dir:
+        Path(bench_dir, "bench_settings.py").write_text(textwrap.dedent(BENCH_SETTINGS))
+        Path(bench_dir, "bench_urls.py").write_text(textwrap.dedent(BENCH_URLS))
+        for mode in SERVERS:
+            run(mode, args, bench_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: requests/sec на аутентифицированном endpoint.
+
+Полный стек middleware (сессия из кэша + AuthenticationMiddleware) через
+test Client, view читает request.user. Сравнивает ModelBackend (SELECT
+пользователя на каждый запрос) и CachedModelBackend (снимок из кэша).
+SQLite в памяти - на PostgreSQL по сети разница больше.
+
+Запуск: python scripts/bench_auth.py [--requests 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.http import JsonResponse
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from django.urls import path
+
+BACKENDS = {
+    "ModelBackend": "django.contrib.auth.backends.ModelBackend",
+    "CachedModelBackend": "apps.users.backends.CachedModelBackend",
+}
+
+
+def me(request):
+    return JsonResponse({"id": request.user.pk, "email": request.user.email})
+
+
+urlpatterns = [path("me/", me)]
+
+
+def measure(user, backend, requests):
+    with override_settings(
+        AUTHENTICATION_BACKENDS=[backend], ROOT_URLCONF=__name__, PERFORMANCE_ACCESS_LOG=False
+    ):
+        client = Client()
+        client.force_login(user, backend=backend)
+        assert client.get("/me/").status_code == 200
+        with CaptureQueriesContext(connection) as captured:
+            client.get("/me/")
+        # request_started сбрасывает queries_log - считаем до следующего запроса
+        queries = len(captured)
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get("/me/")
+        elapsed = time.perf_counter() - start
+    return requests / elapsed, queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    call_command("migrate", verbosity=0)
+    user = get_user_model().objects.create_user(email="bench@example.com", password="bench")
+
+    for name, backend in BACKENDS.items():
+        rps, queries = measure(user, backend, args.requests)
+        print(f"{name:20} {rps:8.0f} req/s  {queries} queries/request")
+
+
+if __name__ == "__main__":
+    main()
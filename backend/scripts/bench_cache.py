@@ -0,0 +1,115 @@
+"""
+Microbenchmark: латентность попадания в кэш по уровням.
+
+Сравнивает LocMemCache, локальный уровень TwoTierCache, общий уровень
+(файловый кэш, Redis при --redis-url) напрямую и через TwoTierCache,
+а также число вычислений при конкурентном get_or_set (stampede).
+
+Запуск: python scripts/bench_cache.py [--reads 100000] [--redis-url redis://localhost:6379/1]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.core.cache import caches
+from django.test import override_settings
+
+VALUE = {f"field_{i}": f"value {i}" * 4 for i in range(20)}
+
+
+def two_tier(shared, local_max_entries=1000):
+    return {
+        "BACKEND": "apps.core.cache.TwoTierCache",
+        "LOCATION": f"bench-{shared}-{local_max_entries}",
+        "OPTIONS": {"SHARED": shared, "LOCAL_MAX_ENTRIES": local_max_entries},
+    }
+
+
+def measure(cache, reads):
+    cache.set("bench", VALUE, timeout=None)
+    assert cache.get("bench") == VALUE
+    start = time.perf_counter()
+    for _ in range(reads):
+        cache.get("bench")
+    return (time.perf_counter() - start) / reads * 1e6
+
+
+def stampede(alias, threads, compute_seconds):
+    # Экземпляр backend у каждого потока свой (CacheHandler), LRU и lock-и - общие
+    caches[alias].delete("stampede")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(compute_seconds)
+        return VALUE
+
+    def worker():
+        caches[alias].get_or_set("stampede", compute)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return len(calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reads", type=int, default=100000)
+    parser.add_argument("--redis-url", default="")
+    parser.add_argument("--threads", type=int, default=16)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        config = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "file": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": cache_dir,
+            },
+            "two_tier_file": two_tier("file"),
+            "two_tier_file_shared": two_tier("file", local_max_entries=0),
+        }
+        if args.redis_url:
+            config["redis"] = {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": args.redis_url,
+            }
+            config["two_tier_redis_shared"] = two_tier("redis", local_max_entries=0)
+
+        labels = {
+            "default": "LocMemCache",
+            "two_tier_file": "TwoTierCache, local hit",
+            "file": "FileBasedCache",
+            "two_tier_file_shared": "TwoTierCache, shared hit (file)",
+            "redis": "RedisCache",
+            "two_tier_redis_shared": "TwoTierCache, shared hit (redis)",
+        }
+        with override_settings(CACHES=config):
+            for alias in config:
+                latency = measure(caches[alias], args.reads)
+                print(f"{labels[alias]:34} {latency:8.2f} µs/get")
+
+            computed = stampede("two_tier_file", args.threads, compute_seconds=0.2)
+            print(f"get_or_set x{args.threads} threads: callable computed {computed} time(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark: CPU на мегабайт и сэкономленные байты по кодекам и уровням сжатия.
+
+Payload - ответы приложения: страница /api/v1/users/ (JSON, FastJSONRenderer),
+выгрузка NDJSON и CSV (apps.api.export) по --rows пользователей. Каждый
+payload сжимается целиком и потоково (порции по 64 KiB, как streaming ответ)
+всеми установленными кодеками apps.core.compression на нескольких уровнях.
+CPU - process time, лучший из --repeat. Уровни по умолчанию - COMPRESSION_LEVELS.
+
+Запуск: python scripts/bench_compression.py [--rows 20000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from apps.api.export import CSVEncoder, NDJSONEncoder, encode_rows
+from apps.api.renderers import FastJSONRenderer
+from apps.core import compression
+from django.conf import settings
+
+LEVELS = {"gzip": (1, 4, 6, 9), "br": (1, 3, 4, 5, 9), "zstd": (1, 3, 6, 12)}
+STREAM_CHUNK = 64 * 1024
+MB = 2**20
+
+
+def make_rows(count):
+    now = datetime(2024, 5, 1, tzinfo=UTC)
+    for i in range(count):
+        created_at = now - timedelta(seconds=i * 7)
+        yield (
+            i,
+            f"user{i}@example.com",
+            f"user{i}_{uuid.UUID(int=i * 7919).hex[:12]}",
+            f"Пользователь {i}",
+            i % 17 != 0,
+            i % 50 == 0,
+            created_at,
+            created_at,
+        )
+
+
+def make_payloads(rows):
+    fields = ["id", "email", "username", "full_name", "is_active", "is_staff"]
+    fields += ["created_at", "updated_at"]
+    page = [dict(zip(fields, row, strict=True)) for row in make_rows(100)]
+    return [
+        ("application/json", FastJSONRenderer().render({"next": None, "results": page})),
+        ("application/x-ndjson", b"".join(encode_rows(make_rows(rows), NDJSONEncoder(fields)))),
+        ("text/csv", b"".join(encode_rows(make_rows(rows), CSVEncoder(fields)))),
+    ]
+
+
+def best_cpu(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        timings.append(time.process_time() - start)
+    return min(timings), result
+
+
+def compress_streaming(codec, level, data):
+    chunks = (data[i : i + STREAM_CHUNK] for i in range(0, len(data), STREAM_CHUNK))
+    return b"".join(compression.compress_iterator(chunks, codec.stream(level)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    missing = sorted(set(LEVELS) - set(compression.CODECS))
+    if missing:
+        print(f"not installed: {', '.join(missing)} (requirements/compression.txt)")
+
+    for content_type, data in make_payloads(args.rows):
+        size_mb = len(data) / MB
+        # Маленькую страницу повторяем, чтобы замер CPU был различим
+        repeat_data = max(1, int(4 / size_mb)) if size_mb < 4 else 1
+        defaults = compression.levels_for(settings.COMPRESSION_LEVELS, content_type)
+        print(f"\n{content_type}: {len(data) / 1024:.1f} KiB")
+        print(
+            f"{'codec':>6} {'level':>5} {'ratio':>6} {'saved/MB':>9} "
+            f"{'CPU ms/MB':>10} {'stream ms/MB':>13} {'stream ratio':>12}"
+        )
+        for name, codec in compression.CODECS.items():
+            for level in LEVELS[name]:
+
+                def one_shot(codec=codec, level=level, data=data, repeat_data=repeat_data):
+                    for _ in range(repeat_data):
+                        result = codec.compress(data, level)
+                    return result
+
+                def streaming(codec=codec, level=level, data=data, repeat_data=repeat_data):
+                    for _ in range(repeat_data):
+                        result = compress_streaming(codec, level, data)
+                    return result
+
+                cpu, compressed = best_cpu(args.repeat, one_shot)
+                stream_cpu, streamed = best_cpu(args.repeat, streaming)
+                ratio = len(data) / len(compressed)
+                mark = "*" if defaults.get(name) == level else " "
+                print(
+                    f"{name:>6} {level:>4}{mark} {ratio:6.1f} "
+                    f"{(1 - 1 / ratio) * 1024:6.0f} KiB "
+                    f"{cpu * 1000 / repeat_data / size_mb:10.1f} "
+                    f"{stream_cpu * 1000 / repeat_data / size_mb:13.1f} "
+                    f"{len(data) / len(streamed):12.1f}"
+                )
+    print("\n* - уровень из COMPRESSION_LEVELS")
+
+
+if __name__ == "__main__":
+    main()
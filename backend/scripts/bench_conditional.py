@@ -0,0 +1,78 @@
+"""
+Benchmark: опрос /api/v1/users/ без и с If-None-Match.
+
+Клиент повторяет один и тот же запрос страницы (--page-size строк), как
+при polling. Без conditional GET каждый ответ рендерится и передаётся
+целиком; с ETag неизменившиеся данные дают 304 без запроса к таблице и
+без тела. Выводит байты тела и CPU процесса на запрос.
+
+SQLite в памяти. Запуск: python scripts/bench_conditional.py [--requests 500]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment
+
+
+def poll(client, url, requests, conditional):
+    etag = client.get(url)["ETag"]
+    headers = {"HTTP_IF_NONE_MATCH": etag} if conditional else {}
+    body_bytes = 0
+    statuses = set()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    for _ in range(requests):
+        response = client.get(url, **headers)
+        statuses.add(response.status_code)
+        body_bytes += len(response.content)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    return body_bytes / requests, cpu / requests * 1000, wall / requests * 1000, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    call_command("migrate", verbosity=0)
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(email=f"user{i}@example.com", username=f"user{i}", full_name=f"Пользователь {i}")
+        for i in range(args.page_size * 2)
+    )
+    admin = User.objects.create_user(email="bench@example.com", is_staff=True)
+
+    url = f"/api/v1/users/?page_size={args.page_size}"
+    with override_settings(PERFORMANCE_ACCESS_LOG=False):
+        client = Client()
+        client.force_login(admin)
+        print(f"{args.requests} polls of {url}")
+        for label, conditional in [("full response", False), ("If-None-Match", True)]:
+            size, cpu, wall, statuses = poll(client, url, args.requests, conditional)
+            print(
+                f"{label:14} {sorted(statuses)}  {size / 1024:7.1f} KiB/request  "
+                f"CPU {cpu:6.2f} ms/request  wall {wall:6.2f} ms/request"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark: отправка --messages писем через локальный SMTP сервер (aiosmtpd).
+
+1. Время send_mail в потоке запроса: Django SMTP backend (соединение на
+   письмо) против apps.core.mail.QueuedEmailBackend (INSERT задачи).
+2. Доставка поставленных писем воркером (--threads потоков): постоянные
+   соединения (EMAIL_SMTP_MAX_MESSAGES=100) против нового соединения на письмо.
+
+--connect-ms добавляет задержку на установку соединения (TLS handshake и AUTH
+у настоящего сервера), --latency-ms - на приём письма. Очередь - SQLite во
+временном файле, сервер и воркер - в этом процессе.
+
+Запуск: python scripts/bench_email.py [--messages 10000] [--threads 4] [--connect-ms 20]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+
+class Handler:
+    def __init__(self, connect_ms, latency_ms):
+        self.connect = connect_ms / 1000
+        self.latency = latency_ms / 1000
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        await asyncio.sleep(self.connect)
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        await asyncio.sleep(self.latency)
+        self.received += 1
+        return "250 OK"
+
+
+def setup_django(tmp, port):
+    os.environ.update(
+        DJANGO_SETTINGS_MODULE="config.settings.dev",
+        SECRET_KEY="bench-email",
+        DEBUG="False",
+        DATABASE_URL=f"sqlite:///{tmp}/bench.sqlite3?transaction_mode=IMMEDIATE&timeout=30",
+    )
+    os.environ.pop("CELERY_BROKER_URL", None)
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    settings.EMAIL_HOST = "127.0.0.1"
+    settings.EMAIL_PORT = port
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_TIMEOUT = 10
+
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def send(count, backend):
+    from django.core.mail import EmailMessage, get_connection
+
+    connection = get_connection(backend)
+    start = time.perf_counter()
+    for i in range(count):
+        message = EmailMessage(
+            "Подтверждение email", f"Код: {i:06d}", "noreply@example.com", [f"user{i}@example.com"]
+        )
+        connection.send_messages([message])
+    return time.perf_counter() - start
+
+
+def deliver(threads, max_messages):
+    from apps.core import mail, tasks
+    from apps.core.tasks.worker import Worker
+    from django.conf import settings
+    from prometheus_client import REGISTRY
+
+    def connections():
+        return REGISTRY.get_sample_value("smtp_connections_opened_total") or 0
+
+    settings.EMAIL_SMTP_MAX_MESSAGES = max_messages
+    mail._pool = None
+    opened = connections()
+    worker = Worker(
+        tasks.get_backend(), {mail.EMAIL_QUEUE: threads}, poll_interval=0.05, burst=True
+    )
+    start = time.perf_counter()
+    worker.run()
+    return time.perf_counter() - start, connections() - opened
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--connect-ms", type=float, default=20.0)
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    args = parser.parse_args()
+
+    try:
+        from aiosmtpd.controller import Controller
+    except ImportError:
+        sys.exit("aiosmtpd is required: pip install -r requirements/dev.txt")
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    handler = Handler(args.connect_ms, args.latency_ms)
+    logging.getLogger("mail.log").setLevel(logging.WARNING)  # лог сессий aiosmtpd
+    server = Controller(handler, hostname="127.0.0.1", port=port)
+    server.start()
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            setup_django(tmp, port)
+            count = args.messages
+            print(f"{count} messages, connect {args.connect_ms} ms, accept {args.latency_ms} ms")
+
+            elapsed = send(count, "django.core.mail.backends.smtp.EmailBackend")
+            print(
+                f"request thread, SMTP backend    {elapsed / count * 1000:7.2f} ms/message "
+                f"({elapsed:.1f}s)"
+            )
+            elapsed = send(count, "apps.core.mail.QueuedEmailBackend")
+            print(
+                f"request thread, queued backend  {elapsed / count * 1000:7.2f} ms/message "
+                f"({elapsed:.1f}s)"
+            )
+
+            # Письма уже в очереди после замера queued backend
+            for label, max_messages in (("pooled connections", 100), ("connection/message", 1)):
+                if max_messages == 1:
+                    send(count, "apps.core.mail.QueuedEmailBackend")
+                elapsed, opened = deliver(args.threads, max_messages)
+                print(
+                    f"worker x{args.threads}, {label:18} {count / elapsed:7.0f} messages/s "
+                    f"({elapsed:.1f}s, {opened:.0f} connections)"
+                )
+            expected = count * 3
+            if handler.received != expected:
+                sys.exit(f"server received {handler.received} of {expected} messages")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Microbenchmark: StreamHandler (текущий prod handler) vs AsyncBatchingHandler.
+
+Меряет:
+- records/sec до полной записи всех записей в stream
+- p50/p99 задержки logger.info() в вызывающем потоке (то, что платит запрос)
+
+NullHandler - baseline: стоимость создания LogRecord и фильтров без записи.
+
+Запуск: python scripts/bench_logging.py [--records 50000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from apps.core.logging import AsyncBatchingHandler, JSONFormatter, RequestIDFilter
+
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * pct / 100))]
+
+
+def run(name, handler, records):
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(RequestIDFilter())
+
+    logger = logging.getLogger(f"bench.{name}")
+    logger.handlers = [handler]
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+
+    latencies = []
+    clock = time.perf_counter_ns
+    start = time.perf_counter()
+    for i in range(records):
+        t0 = clock()
+        logger.info("request finished", extra={"status_code": 200, "path": "/api/v1/", "n": i})
+        latencies.append(clock() - t0)
+    handler.flush()
+    elapsed = time.perf_counter() - start
+    handler.close()
+
+    print(
+        f"{name:<10} {records / elapsed:>12,.0f} rec/s   "
+        f"p50 {percentile(latencies, 50) / 1000:>7.2f} µs   "
+        f"p99 {percentile(latencies, 99) / 1000:>7.2f} µs"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=50000)
+    args = parser.parse_args()
+
+    with open(os.devnull, "w") as sink:
+        # Нижняя граница: стоимость самого logger.info() без записи
+        run("null", logging.NullHandler(), args.records)
+        run("stream", logging.StreamHandler(sink), args.records)
+        run(
+            "async",
+            AsyncBatchingHandler(stream=sink, capacity=args.records + 1, overflow="block"),
+            args.records,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Microbenchmark: накладные расходы PerformanceMiddleware на запрос.
+
+Сравнивает голый view, RequestIDMiddleware и PerformanceMiddleware
+(access log выключен - меряется именно инструментирование, а не запись лога).
+
+Запуск: python scripts/bench_middleware.py [--requests 100000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from apps.core.middleware import PerformanceMiddleware, RequestIDMiddleware
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+
+
+def view(request):
+    return HttpResponse("ok")
+
+
+def measure(handler, requests):
+    factory = RequestFactory()
+    batch = [factory.get("/", HTTP_X_REQUEST_ID="bench") for _ in range(requests)]
+    start = time.perf_counter()
+    for request in batch:
+        handler(request)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100000)
+    args = parser.parse_args()
+
+    with override_settings(PERFORMANCE_ACCESS_LOG=False):
+        baseline = measure(view, args.requests)
+        request_id = measure(RequestIDMiddleware(view), args.requests)
+        performance = measure(PerformanceMiddleware(view), args.requests)
+
+    print(f"view only            {baseline:6.2f} µs/request")
+    print(f"RequestIDMiddleware  {request_id:6.2f} µs/request (+{request_id - baseline:.2f})")
+    print(f"PerformanceMiddleware{performance:6.2f} µs/request (+{performance - baseline:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Harness: сколько миграция держит блокировку, мешающую записи, на таблице с
+--rows строк (PostgreSQL из DATABASE_URL).
+
+Таблица bench_migrations_item заполняется generate_series, затем миграция с
+AddIndex применяется дважды: как есть (CREATE INDEX) и переписанная
+apps.core.safe_migrations (CREATE INDEX CONCURRENTLY, как её применит
+manage.py migrate на большой таблице). Всё время в отдельном потоке идёт запись
+(UPDATE случайной строки), ещё один поток раз в --sample-ms опрашивает pg_locks.
+
+Выводится: время построения индекса, сколько соединение миграции держало
+блокировку таблицы, конфликтующую с записью (Share и сильнее), задержка записи
+за время построения (p50/p99/max) и число записей.
+
+Запуск: DATABASE_URL=postgresql://... python scripts/bench_migrations.py [--rows 2000000]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+TABLE = "bench_migrations_item"
+INDEX = "bench_item_account_idx"
+# Режимы, конфликтующие с RowExclusiveLock (INSERT/UPDATE/DELETE)
+WRITE_BLOCKING = ["ShareLock", "ShareRowExclusiveLock", "ExclusiveLock", "AccessExclusiveLock"]
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
+    os.environ.setdefault("SECRET_KEY", "bench-migrations")
+    os.environ.pop("CELERY_BROKER_URL", None)
+
+    import django
+    from django.db import connection
+
+    django.setup()
+    if connection.vendor != "postgresql":
+        sys.exit("PostgreSQL is required: set DATABASE_URL=postgresql://...")
+
+
+def seed(rows):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE} (
+                id bigserial PRIMARY KEY,
+                account integer NOT NULL,
+                created_at timestamptz NOT NULL,
+                payload text NOT NULL
+            )
+            """
+        )
+        cursor.execute(
+            f"""
+            INSERT INTO {TABLE} (account, created_at, payload)
+            SELECT g %% 10000, now() - g * interval '1 second', md5(g::text)
+            FROM generate_series(1, %s) g
+            """,
+            [rows],
+        )
+        cursor.execute(f"ANALYZE {TABLE}")
+
+
+def make_migration():
+    from django.db import migrations, models
+    from django.db.migrations.state import ModelState, ProjectState
+
+    state = ProjectState()
+    state.add_model(
+        ModelState(
+            "bench",
+            "Item",
+            [
+                ("id", models.BigAutoField(primary_key=True)),
+                ("account", models.IntegerField()),
+                ("created_at", models.DateTimeField()),
+                ("payload", models.TextField()),
+            ],
+            options={"db_table": TABLE},
+        )
+    )
+    migration = migrations.Migration("0001_item_account_idx", "bench")
+    migration.operations = [
+        migrations.AddIndex("item", models.Index(fields=["account", "-created_at"], name=INDEX))
+    ]
+    return state, migration
+
+
+def writer(rows, stop, latencies):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        while not stop.is_set():
+            start = time.perf_counter()
+            cursor.execute(
+                f"UPDATE {TABLE} SET payload = md5(random()::text) WHERE id = %s",
+                [random.randint(1, rows)],
+            )
+            latencies.append((time.monotonic(), time.perf_counter() - start))
+    connection.close()
+
+
+def sampler(pid, interval, stop, held):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        while not stop.is_set():
+            cursor.execute(
+                """
+                SELECT count(*) FROM pg_locks
+                WHERE relation = %s::regclass AND pid = %s AND granted AND mode = ANY(%s)
+                """,
+                [TABLE, pid, WRITE_BLOCKING],
+            )
+            if cursor.fetchone()[0]:
+                held.append(time.monotonic())
+            time.sleep(interval)
+    connection.close()
+
+
+def run(label, concurrent, args):
+    from apps.core import safe_migrations
+    from django.db import connection
+
+    state, migration = make_migration()
+    if concurrent:
+        safe_migrations.rewrite(
+            migration, safe_migrations.operation_sql(connection, state, migration)
+        )
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP INDEX IF EXISTS {INDEX}")
+        cursor.execute("SELECT pg_backend_pid()")
+        pid = cursor.fetchone()[0]
+
+    stop = threading.Event()
+    latencies, held = [], []
+    threads = [
+        threading.Thread(target=writer, args=(args.rows, stop, latencies)),
+        threading.Thread(target=sampler, args=(pid, args.sample_ms / 1000, stop, held)),
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    started = time.monotonic()
+    with connection.schema_editor(atomic=migration.atomic) as editor:
+        migration.apply(state, editor)
+    finished = time.monotonic()
+    time.sleep(0.2)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    during = sorted(latency for at, latency in latencies if started <= at <= finished + 0.2)
+    lock_held = held[-1] - held[0] + args.sample_ms / 1000 if held else 0.0
+    print(
+        f"{label:26} build {finished - started:6.2f}s  write-blocking lock {lock_held:6.2f}s  "
+        f"writes {len(during):6}  latency p50 {statistics.median(during) * 1000:7.1f} ms  "
+        f"p99 {during[int(len(during) * 0.99)] * 1000:7.1f} ms  max {during[-1] * 1000:7.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--sample-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    print(f"seeding {args.rows:,} rows...")
+    seed(args.rows)
+    try:
+        run("CREATE INDEX", False, args)
+        run("CREATE INDEX CONCURRENTLY", True, args)
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+if __name__ == "__main__":
+    main()
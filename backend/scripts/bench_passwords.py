@@ -0,0 +1,92 @@
+"""
+Benchmark: стоимость проверки пароля по hasher и параметрам.
+
+Для каждого варианта - латентность одной проверки и число проверок/сек при
+--threads параллельных потоках (hashlib отпускает GIL, поэтому потоки
+масштабируются до числа CPU). Помогает выбрать параметры: проверка должна
+укладываться в бюджет логина, а throughput * PASSWORD_HASH_CONCURRENCY -
+в ожидаемый пик логинов на воркер. Argon2 - только если установлен argon2-cffi.
+
+Запуск: python scripts/bench_passwords.py [--threads 4] [--seconds 2]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from django.contrib.auth.hashers import check_password, make_password
+from django.test import override_settings
+
+SCRYPT = "apps.users.hashers.ScryptPasswordHasher"
+ARGON2 = "apps.users.hashers.Argon2PasswordHasher"
+PBKDF2 = "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+
+VARIANTS = [
+    ("pbkdf2", PBKDF2, {}),
+    ("scrypt n=2**14", SCRYPT, {"PASSWORD_SCRYPT_WORK_FACTOR": 2**14}),
+    ("scrypt n=2**15", SCRYPT, {"PASSWORD_SCRYPT_WORK_FACTOR": 2**15}),
+    ("scrypt n=2**16", SCRYPT, {"PASSWORD_SCRYPT_WORK_FACTOR": 2**16}),
+    ("argon2 t=2 m=100MB", ARGON2, {}),
+    (
+        "argon2 t=3 m=64MB",
+        ARGON2,
+        {"PASSWORD_ARGON2_TIME_COST": 3, "PASSWORD_ARGON2_MEMORY_COST": 65536},
+    ),
+]
+
+
+def measure(encoded, threads, seconds):
+    start = time.perf_counter()
+    check_password("bench-password", encoded)
+    latency = time.perf_counter() - start
+
+    deadline = time.perf_counter() + seconds
+
+    def worker():
+        count = 0
+        while time.perf_counter() < deadline:
+            check_password("bench-password", encoded)
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        total = sum(executor.map(lambda _: worker(), range(threads)))
+    return latency, total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    for name, hasher, params in VARIANTS:
+        with override_settings(PASSWORD_HASHERS=[hasher], **params):
+            try:
+                encoded = make_password("bench-password")
+            except ValueError as exc:
+                print(f"{name:20} skipped: {exc}")
+                continue
+            latency, throughput = measure(encoded, args.threads, args.seconds)
+        print(
+            f"{name:20} {latency * 1000:8.1f} ms/verify  "
+            f"{throughput:8.1f} verify/s on {args.threads} threads"
+        )
+
+
+if __name__ == "__main__":
+    main()
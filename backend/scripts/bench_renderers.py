@@ -0,0 +1,96 @@
+"""
+Benchmark: JSONRenderer/JSONParser DRF против FastJSONRenderer/FastJSONParser.
+
+Payload - --objects объектов пользователя в двух вариантах: как после
+ModelSerializer (даты уже строки) и с "сырыми" datetime/UUID/Decimal
+(когда сериализатор отдаёт значения как есть). Проверяет, что вывод
+совпадает байт в байт.
+
+Запуск: python scripts/bench_renderers.py [--objects 10000] [--repeat 20]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+import uuid
+from datetime import UTC, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from apps.api import renderers
+from apps.api.parsers import FastJSONParser
+from apps.api.renderers import FastJSONRenderer
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+
+def make_payload(count, raw):
+    now = datetime(2024, 5, 1, tzinfo=UTC)
+    results = []
+    for i in range(count):
+        created_at = now - timedelta(seconds=i)
+        results.append(
+            {
+                "id": i,
+                "uuid": uuid.UUID(int=i) if raw else str(uuid.UUID(int=i)),
+                "email": f"user{i}@example.com",
+                "username": f"user{i}_a1b2c3d4e5f6",
+                "full_name": f"Пользователь {i}",
+                "is_active": True,
+                "is_staff": False,
+                "balance": Decimal(i) / 100 if raw else f"{i / 100:.2f}",
+                "created_at": created_at if raw else created_at.isoformat().replace("+00:00", "Z"),
+                "updated_at": created_at if raw else created_at.isoformat().replace("+00:00", "Z"),
+            }
+        )
+    return {"next": None, "results": results}
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    backend = "orjson" if renderers.orjson is not None else "stdlib json (orjson not installed)"
+    print(f"{args.objects} objects, best of {args.repeat}, FastJSON backend: {backend}")
+    for label, raw in [("serialized", False), ("raw types", True)]:
+        payload = make_payload(args.objects, raw)
+        expected = JSONRenderer().render(payload)
+        assert FastJSONRenderer().render(payload) == expected, "output differs"
+        drf = best_of(args.repeat, lambda payload=payload: JSONRenderer().render(payload))
+        fast = best_of(args.repeat, lambda payload=payload: FastJSONRenderer().render(payload))
+        print(
+            f"render {label:11} DRF {drf:7.1f} ms  fast {fast:7.1f} ms  "
+            f"x{drf / fast:4.1f}  ({len(expected) / 2**20:.1f} MB)"
+        )
+
+    body = JSONRenderer().render(make_payload(args.objects, raw=False))
+    drf = best_of(args.repeat, lambda: JSONParser().parse(io.BytesIO(body)))
+    fast = best_of(args.repeat, lambda: FastJSONParser().parse(io.BytesIO(body)))
+    print(f"parse              DRF {drf:7.1f} ms  fast {fast:7.1f} ms  x{drf / fast:4.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark: UserSerializer (ModelSerializer) против compile_serializer(UserSerializer).
+
+Для 100, 10k и 100k строк замеряет выборку + сериализацию и отдельно рендер
+в JSON (FastJSONRenderer). ModelSerializer получает экземпляры модели,
+скомпилированный сериализатор - строки values_list(). Проверяет, что
+отрендеренный ответ совпадает байт в байт.
+
+SQLite в памяти. Запуск: python scripts/bench_serializers.py [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.test")
+
+import django
+
+django.setup()
+
+from apps.api.compiled import compile_serializer
+from apps.api.renderers import FastJSONRenderer
+from apps.api.serializers import UserSerializer
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+SIZES = (100, 10_000, 100_000)
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    call_command("migrate", verbosity=0)
+    User = get_user_model()
+    User.objects.bulk_create(
+        (
+            User(email=f"user{i}@example.com", username=f"user{i}", full_name=f"Пользователь {i}")
+            for i in range(max(SIZES))
+        ),
+        batch_size=5000,
+    )
+    compiled = compile_serializer(UserSerializer)
+    renderer = FastJSONRenderer()
+
+    print(f"{'rows':>7} {'':10} {'query+serialize':>16} {'render':>8}")
+    for size in SIZES:
+        queryset = User.objects.order_by("id")[:size]
+
+        drf_ms, drf_data = best_of(
+            args.repeat, lambda queryset=queryset: UserSerializer(queryset, many=True).data
+        )
+        compiled_ms, compiled_data = best_of(
+            args.repeat, lambda queryset=queryset: compiled.serialize(compiled.values(queryset))
+        )
+        drf_render_ms, drf_body = best_of(args.repeat, lambda data=drf_data: renderer.render(data))
+        compiled_render_ms, compiled_body = best_of(
+            args.repeat, lambda data=compiled_data: renderer.render(data)
+        )
+        assert drf_body == compiled_body, "output differs"
+
+        print(f"{size:>7} {'DRF':10} {drf_ms:13.1f} ms {drf_render_ms:5.1f} ms")
+        print(
+            f"{'':>7} {'compiled':10} {compiled_ms:13.1f} ms {compiled_render_ms:5.1f} ms"
+            f"   x{(drf_ms + drf_render_ms) / (compiled_ms + compiled_render_ms):.1f} total"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Benchmark: время старта контейнера до первого 200 на /health/.
+
+legacy    - шаги прежнего entrypoint.sh отдельными процессами: wait_for_db.py,
+            manage.py migrate, manage.py collectstatic, gunicorn (Django
+            настраивается в каждом, кроме wait_for_db.py, заново)
+bootstrap - manage.py bootstrap --migrate --serve: все шаги и gunicorn в одном
+            интерпретаторе
+
+cold - пустая БД и STATIC_ROOT (первый запуск), warm - повторный запуск (миграции
+применены, статика собрана). БД - SQLite во временной директории.
+
+Перед замером - разбивка импорта приложения (django.setup() и warm_up(), как в
+master gunicorn) по пакетам верхнего уровня, по данным python -X importtime.
+
+Запуск: python scripts/bench_startup.py [--workers 2] [--runs 3] [--top 15]
+"""
+
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import textwrap
+import time
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+SRC_DIR = SCRIPTS_DIR.parent / "src"
+
+BENCH_SETTINGS = """
+import os
+
+from config.settings import base
+from config.settings.test import *
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(os.environ["BENCH_DIR"], "db.sqlite3"),
+    }
+}
+STATIC_ROOT = os.path.join(os.environ["BENCH_DIR"], "static")
+STORAGES = base.STORAGES
+ALLOWED_HOSTS = ["*"]
+PERFORMANCE_ACCESS_LOG = False
+"""
+
+IMPORT_SCRIPT = """
+import django
+
+django.setup()
+
+from apps.core.startup import warm_up
+
+warm_up()
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_env(settings_dir, bench_dir, port, workers):
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(SRC_DIR), settings_dir]),
+        "DJANGO_SETTINGS_MODULE": "bench_settings",
+        "BENCH_DIR": bench_dir,
+        "WEB_BIND": f"127.0.0.1:{port}",
+        "WEB_WORKERS": str(workers),
+    }
+    env.pop("PROMETHEUS_MULTIPROC_DIR", None)
+    return env
+
+
+def import_breakdown(env, top):
+    """Собственное время импорта по пакетам верхнего уровня (мс) и общее время"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_SCRIPT],
+        cwd=SRC_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    packages = Counter()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, self_us, _, name = (part.strip() for part in line.replace(":", "|", 1).split("|"))
+        packages[name.split(".")[0]] += int(self_us) / 1000
+    total = sum(packages.values())
+    print(f"import breakdown (django.setup + warm_up): {total:.0f} ms")
+    for package, ms in packages.most_common(top):
+        print(f"  {package:24} {ms:7.1f} ms  {ms / total:6.1%}")
+    print()
+
+
+def wait_ok(port, server, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"server exited with {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health/", timeout=5) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.02)
+    raise RuntimeError("server did not start")
+
+
+def start(mode, env):
+    """Шаги старта; процесс сервера"""
+
+    def run(*args):
+        subprocess.run(
+            [sys.executable, *args], cwd=SRC_DIR, env=env, check=True, capture_output=True
+        )
+
+    if mode == "legacy":
+        run(str(SCRIPTS_DIR / "wait_for_db.py"))
+        run("manage.py", "migrate", "--noinput")
+        run("manage.py", "collectstatic", "--noinput")
+        command = [sys.executable, "-m", "gunicorn", "--log-level", "warning"]
+    else:
+        command = [sys.executable, "manage.py", "bootstrap", "--migrate", "--serve"]
+    return subprocess.Popen(
+        command,
+        cwd=SRC_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def measure(mode, settings_dir, bench_dir, workers):
+    port = free_port()
+    env = make_env(settings_dir, bench_dir, port, workers)
+    started = time.perf_counter()
+    server = start(mode, env)
+    try:
+        wait_ok(port, server)
+        return time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as settings_dir:
+        Path(settings_dir, "bench_settings.py").write_text(textwrap.dedent(BENCH_SETTINGS))
+        import_breakdown(make_env(settings_dir, settings_dir, 0, args.workers), args.top)
+
+        print(f"time to first 200 on /health/, {args.workers} workers, median of {args.runs}")
+        for mode in ("legacy", "bootstrap"):
+            cold, warm = [], []
+            for _ in range(args.runs):
+                bench_dir = tempfile.mkdtemp()
+                try:
+                    cold.append(measure(mode, settings_dir, bench_dir, args.workers))
+                    warm.append(measure(mode, settings_dir, bench_dir, args.workers))
+                finally:
+                    shutil.rmtree(bench_dir)
+            print(
+                f"{mode:10} cold {statistics.median(cold):6.2f}s  "
+                f"warm {statistics.median(warm):6.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
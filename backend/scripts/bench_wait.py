@@ -0,0 +1,98 @@
+"""
+Benchmark: --replicas реплик одновременно ждут PostgreSQL, который после аварии
+--outage секунд отвечает "the database system is starting up" (57P03).
+
+fixed   - прежний wait_for_db.py: попытка раз в секунду
+backoff - config.dependencies: экспоненциальная пауза с разбросом (до --max-delay)
+
+Сервер - фейковый, в этом процессе (отвечает на startup packet, без логина).
+Выводится задержка готовности реплик после подъёма сервера, число попыток и
+пиковое число попыток за 100 мс после первой секунды (первые попытки всех
+реплик одновременны при любой стратегии) - насколько синхронно реплики
+стучатся в БД.
+
+Запуск: python scripts/bench_wait.py [--replicas 50] [--outage 5.5] [--max-delay 1]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import dependencies  # noqa: E402
+
+STARTING = b"SFATAL\0C57P03\0Mthe database system is starting up\0\0"
+STARTING = b"E" + (len(STARTING) + 4).to_bytes(4, "big") + STARTING
+AUTH_REQUEST = b"R" + (8).to_bytes(4, "big") + (3).to_bytes(4, "big")
+
+
+async def fixed(dependency, deadline):
+    """Прежняя стратегия: фиксированная пауза 1 секунда"""
+    while time.monotonic() < deadline:
+        try:
+            await dependencies.probe(dependency)
+            return
+        except Exception:
+            await asyncio.sleep(1)
+
+
+async def backoff(dependency, deadline, max_delay):
+    await dependencies.wait_for(dependency, deadline, auth=False, cap=max_delay)
+
+
+async def run(strategy, args):
+    attempts = []
+    ready_at = None
+
+    async def handle(reader, writer):
+        attempts.append(time.monotonic())
+        await reader.read(4096)
+        writer.write(STARTING if ready_at is None or time.monotonic() < ready_at else AUTH_REQUEST)
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+    dependency = dependencies.Dependency(
+        "postgres", "127.0.0.1", server.sockets[0].getsockname()[1]
+    )
+    start = time.monotonic()
+    ready_at = start + args.outage
+    deadline = ready_at + 60
+
+    async def replica():
+        if strategy == "fixed":
+            await fixed(dependency, deadline)
+        else:
+            await backoff(dependency, deadline, args.max_delay)
+        return time.monotonic() - ready_at
+
+    async with server:
+        delays = await asyncio.gather(*(replica() for _ in range(args.replicas)))
+    peak = max(Counter(int((t - start) * 10) for t in attempts if t - start >= 1).values())
+    print(
+        f"{strategy:8} ready after outage: p50 {statistics.median(delays):5.2f}s  "
+        f"max {max(delays):5.2f}s  attempts {len(attempts):5}  peak {peak:4} per 100 ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--replicas", type=int, default=50)
+    parser.add_argument("--outage", type=float, default=5.5)
+    parser.add_argument("--max-delay", type=float, default=1.0)
+    args = parser.parse_args()
+
+    print(f"{args.replicas} replicas, outage {args.outage}s")
+    for strategy in ("fixed", "backoff"):
+        asyncio.run(run(strategy, args))
+
+
+if __name__ == "__main__":
+    main()
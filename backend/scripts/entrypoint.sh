@@ -1,9 +1,6 @@
 #!/bin/bash
 set -e
 
-echo "Waiting for database..."
-python /app/scripts/wait_for_db.py
-
 echo "Setting up media directory..."
 # Создаем директорию для медиа файлов, если её нет
 # Получаем путь из переменной окружения или используем значение по умолчанию
@@ -14,23 +11,33 @@ mkdir -p "$MEDIA_DIR"
 # Поэтому просто убеждаемся, что директория существует и имеет правильные права
 chmod -R 755 "$MEDIA_DIR" 2>/dev/null || true
 
-# Миграции только если AUTO_MIGRATE=true
+# Prometheus multiprocess mode: каждый воркер пишет метрики в mmap-файлы,
+# /metrics агрегирует их. Директория на tmpfs, очищается при каждом старте.
+# Задаётся до bootstrap: метрики создаются уже при загрузке приложения
+export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/dev/shm/prometheus}"
+rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+
+# SERVER_MODE=asgi: uvicorn воркеры под gunicorn, async views и middleware
+# обрабатываются в event loop (медленный запрос не занимает весь воркер).
+# Приложение, число воркеров/потоков и таймауты - в src/gunicorn.conf.py
+export SERVER_MODE="${SERVER_MODE:-wsgi}"
+
+# Зависимости ждём параллельно и без загрузки Django (scripts/wait_for_db.py):
+# TCP и ответ протокола, затем одна проверка с логином, паузы с экспоненциальным
+# ростом и разбросом. Пустые переменные пропускаются
+python /app/scripts/wait_for_db.py --timeout "${WAIT_TIMEOUT:-60}" \
+    ${WAIT_FOR:-DATABASE_URL REDIS_URL CELERY_BROKER_URL}
+
+# Ожидание БД, миграции (только если AUTO_MIGRATE=true), collectstatic и gunicorn -
+# в одном интерпретаторе (apps.core.management.commands.bootstrap): Django
+# настраивается один раз, gunicorn с preload_app получает его готовым.
+# collectstatic инкрементальный: копируются изменённые файлы, .br/.gz создаются
+# только для новых (apps.core.staticfiles). STATIC_ROOT - общий с nginx volume
+BOOTSTRAP_ARGS="--serve"
 if [ "$AUTO_MIGRATE" = "true" ]; then
-    echo "Running migrations..."
-    python manage.py migrate --noinput || {
-        echo "Migration failed, trying to create migrations first..."
-        python manage.py makemigrations --noinput || true
-        python manage.py migrate --noinput || true
-    }
+    BOOTSTRAP_ARGS="--migrate $BOOTSTRAP_ARGS"
 fi
 
-echo "Collecting static files..."
-python manage.py collectstatic --noinput
-
-echo "Starting server..."
-exec gunicorn config.wsgi:application \
-    --bind 0.0.0.0:8000 \
-    --workers 4 \
-    --timeout 300 \
-    --access-logfile - \
-    --error-logfile -
+echo "Starting server ($SERVER_MODE)..."
+exec python manage.py bootstrap $BOOTSTRAP_ARGS
@@ -1,41 +1,49 @@
 """
-Wait for database to be ready.
-"""
-import sys
-import time
-import os
-
-# Устанавливаем PYTHONPATH перед импортом Django
-if '/app/src' not in sys.path:
-    sys.path.insert(0, '/app/src')
-
-import django
-
-# Setup Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.dev')
-django.setup()
+Ждать готовности зависимостей контейнера без загрузки Django.
 
-from django.db import connection
-from django.core.management import execute_from_command_line
+    python scripts/wait_for_db.py                          # DATABASE_URL
+    python scripts/wait_for_db.py DATABASE_URL REDIS_URL EMAIL_HOST --timeout 120
+    python scripts/wait_for_db.py redis://cache:6379/0
 
+Аргументы - имена переменных окружения с URL (пустые пропускаются), EMAIL_HOST
+(SMTP из EMAIL_HOST/EMAIL_PORT) или сами URL. Зависимости проверяются
+параллельно (config.dependencies): TCP и ответ протокола, затем одна проверка с
+логином; паузы растут экспоненциально со случайным разбросом. Код возврата 1,
+если к --timeout что-то не готово.
+"""
 
-def wait_for_db(max_retries=30, delay=1):
-    """Wait for database connection"""
-    for i in range(max_retries):
-        try:
-            connection.ensure_connection()
-            print("Database is ready!")
-            return True
-        except Exception as e:
-            if i < max_retries - 1:
-                print(f"Waiting for database... ({i+1}/{max_retries})")
-                time.sleep(delay)
-            else:
-                print(f"Database connection failed: {e}")
-                return False
-    return False
+import argparse
+import logging
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+from config import dependencies  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("targets", nargs="*", default=["DATABASE_URL"])
+    parser.add_argument("--timeout", type=float, default=60.0, help="Overall deadline, seconds")
+    parser.add_argument("--no-auth", action="store_true", help="Skip the login check")
+    parser.add_argument(
+        "--max-delay", type=float, default=1.0, help="Upper bound of the pause between attempts"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    targets = dependencies.from_env(args.targets)
+    start = time.monotonic()
+    errors = dependencies.wait(targets, args.timeout, auth=not args.no_auth, cap=args.max_delay)
+    if errors:
+        sys.exit(1)
+    ready = ", ".join(repr(dependency) for dependency in targets) or "nothing to wait for"
+    print(f"Ready in {time.monotonic() - start:.2f}s: {ready}")
 
 
-if __name__ == '__main__':
-    if not wait_for_db():
-        sys.exit(1)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Скомпилированные read-only сериализаторы для списков.
+
+compile_serializer(UserSerializer, fields) один раз разбирает поля DRF
+сериализатора в план: колонка модели и функция преобразования значения
+(или её отсутствие). Строки берутся через values_list() без создания
+экземпляров модели, ответ собирается в одном цикле dict(zip(...)).
+
+Значения, которые JSON renderer (apps.api.renderers) форматирует так же,
+как поле DRF - str, int, bool, UUID, ISO datetime/date в UTC, - отдаются
+как есть: отрендеренный ответ совпадает с ответом сериализатора DRF.
+Для остальных полей вызывается field.to_representation(). Поля с
+source из нескольких атрибутов, вложенные сериализаторы, SerializerMethodField
+и связи (кроме PrimaryKeyRelatedField) не поддерживаются.
+"""
+
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.settings import api_settings
+
+# Поле DRF -> типы колонки модели, значения которых поле возвращает без изменений
+PASSTHROUGH_FIELDS = (
+    (drf_fields.BooleanField, (models.BooleanField,)),
+    (drf_fields.CharField, (models.CharField, models.TextField)),
+    (drf_fields.IntegerField, (models.IntegerField,)),
+    (drf_fields.UUIDField, (models.UUIDField,)),
+)
+
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    drf_fields.SerializerMethodField,
+    drf_fields.HiddenField,
+    relations.ManyRelatedField,
+    relations.RelatedField,
+)
+
+
+def _is_iso(field, default):
+    output_format = getattr(field, "format", default)
+    return output_format is None or output_format.lower() == drf_fields.ISO_8601
+
+
+def _model_field(serializer_class, source):
+    model = getattr(getattr(serializer_class, "Meta", None), "model", None)
+    if model is None:
+        return None
+    try:
+        return model._meta.get_field(source)
+    except FieldDoesNotExist:
+        return None
+
+
+def _passthrough(field, model_field):
+    """
+    None - значение колонки можно отдать как есть, "utc" - как есть только при
+    текущей зоне UTC, False - нужен field.to_representation
+    """
+    if isinstance(field, drf_fields.ReadOnlyField):
+        return None
+    if isinstance(field, relations.PrimaryKeyRelatedField):
+        return None if field.pk_field is None else False
+    if isinstance(field, drf_fields.DateTimeField):
+        if (
+            not isinstance(model_field, models.DateTimeField)
+            or not _is_iso(field, api_settings.DATETIME_FORMAT)
+            or hasattr(field, "timezone")
+        ):
+            return False
+        return "utc"
+    if isinstance(field, drf_fields.DateField):
+        iso = _is_iso(field, api_settings.DATE_FORMAT)
+        return None if iso and type(model_field) is models.DateField else False
+    if isinstance(field, drf_fields.UUIDField) and field.uuid_format != "hex_verbose":
+        return False
+    for field_class, model_field_classes in PASSTHROUGH_FIELDS:
+        if isinstance(field, field_class):
+            return None if isinstance(model_field, model_field_classes) else False
+    return False
+
+
+def _representation(field):
+    to_representation = field.to_representation
+
+    def convert(value):
+        return None if value is None else to_representation(value)
+
+    return convert
+
+
+class CompiledSerializer:
+    """План сериализации: names - ключи ответа, columns - колонки values_list"""
+
+    def __init__(self, serializer_class, fields=None):
+        self.serializer_class = serializer_class
+        declared = serializer_class().fields
+        readable = [name for name, field in declared.items() if not field.write_only]
+        if fields is not None:
+            unknown = set(fields) - set(readable)
+            if unknown:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__} has no readable fields {sorted(unknown)}"
+                )
+        # Порядок ключей - как у сериализатора
+        fields = readable if fields is None else [name for name in readable if name in fields]
+
+        self.names = []
+        self.columns = []
+        # Индекс колонки для каждого ключа: несколько полей могут читать одну колонку
+        self.positions = []
+        self.converters = {}
+        self.utc_only = {}
+        for name in fields:
+            field = declared[name]
+            if isinstance(field, UNSUPPORTED_FIELDS) and not isinstance(
+                field, relations.PrimaryKeyRelatedField
+            ):
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name}: {type(field).__name__} "
+                    "is not supported by CompiledSerializer"
+                )
+            if len(field.source_attrs) != 1:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name}: source {field.source!r} "
+                    "must be a single model field"
+                )
+            index = len(self.names)
+            column = field.source_attrs[0]
+            if column not in self.columns:
+                self.columns.append(column)
+            self.names.append(name)
+            self.positions.append(self.columns.index(column))
+            passthrough = _passthrough(field, _model_field(serializer_class, column))
+            if passthrough is False:
+                self.converters[index] = _representation(field)
+            elif passthrough == "utc":
+                self.utc_only[index] = _representation(field)
+        self.direct = self.positions == list(range(len(self.names)))
+
+    def values(self, queryset, extra=()):
+        """
+        values_list() колонок плана; extra - дополнительные колонки в конце
+        строки (например, ключ пагинации). Строки - namedtuple.
+        """
+        return queryset.values_list(*dict.fromkeys([*self.columns, *extra]), named=True)
+
+    def _plan(self):
+        converters = self.converters
+        if self.utc_only and not (
+            settings.USE_TZ and timezone.get_current_timezone_name() == "UTC"
+        ):
+            converters = {**converters, **self.utc_only}
+        return sorted(converters.items())
+
+    def serialize(self, rows):
+        """Список dict из строк values(); колонки сверх плана отбрасываются"""
+        names = self.names
+        plan = self._plan()
+        if self.direct and not plan:
+            return [dict(zip(names, row)) for row in rows]  # noqa: B905 - extra в конце строки
+        positions = self.positions
+        result = []
+        for row in rows:
+            values = [row[position] for position in positions]
+            for index, convert in plan:
+                values[index] = convert(values[index])
+            result.append(dict(zip(names, values, strict=True)))
+        return result
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(serializer_class, fields=None):
+    """CompiledSerializer для serializer_class и набора полей (tuple или None), с кэшем"""
+    return CompiledSerializer(serializer_class, fields)
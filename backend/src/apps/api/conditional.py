@@ -0,0 +1,58 @@
+"""
+HTTP conditional GET для API views.
+
+ConditionalGetMixin проверяет If-None-Match / If-Modified-Since до запроса
+данных и сериализации. Валидаторы дешёвые: версия таблицы (apps.core.versions)
+для списков или updated_at объекта - тело ответа не хешируется. Совпадение -
+304 без тела. ETag слабый (W/): сжатие меняет байты, но не содержимое.
+
+Cache-Control ответа задаёт cache_control view (по умолчанию клиент хранит
+ответ, но проверяет его при каждом запросе); nginx передаёт заголовок
+view вместо no-store по умолчанию для /api/.
+"""
+
+import hashlib
+from datetime import UTC, datetime
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from apps.core import versions
+
+
+def make_etag(*parts):
+    """Слабый ETag из частей (версия, путь с query string и т.п.)"""
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f"W/{quote_etag(digest)}"
+
+
+class ConditionalGetMixin:
+    """
+    GET с ETag/Last-Modified из get_validators(). По умолчанию - версия
+    таблицы модели queryset и полный путь запроса (фильтры, курсор, поля).
+    """
+
+    # Аргументы patch_cache_control для 200 и 304
+    cache_control = {"private": True, "no_cache": True}
+
+    def get_validators(self, request, *args, **kwargs):
+        """(etag или None, last_modified datetime или None)"""
+        version = versions.get_version(self.get_queryset().model)
+        modified = datetime.fromtimestamp(version / 1e9, tz=UTC)
+        return make_etag(version, request.get_full_path()), modified
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        if etag is not None:
+            response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        if self.cache_control:
+            patch_cache_control(response, **self.cache_control)
+        return response
@@ -0,0 +1,143 @@
+"""
+Потоковый экспорт queryset в NDJSON/CSV.
+
+Строки читаются курсором по chunk_size (QuerySet.iterator, на PostgreSQL -
+server-side cursor), кодируются пачками и отправляются по мере готовности
+(сжатие - apps.core.middleware.CompressionMiddleware, тоже по порциям):
+память процесса не зависит от числа строк. Под ASGI ответу отдаётся
+асинхронный итератор - синхронный Django собрал бы в список целиком.
+"""
+
+import csv
+import io
+from datetime import date
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from rest_framework.negotiation import BaseContentNegotiation
+
+from .renderers import dumps
+
+# Строк на одну порцию вывода (и на одно кодирование)
+ROWS_PER_WRITE = 500
+
+# Строки с этих символов Excel/LibreOffice считают формулой (CSV injection)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+class NDJSONEncoder:
+    content_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def header(self):
+        return b""
+
+    def encode(self, rows):
+        # Значения - в том же формате, что и ответы API (apps.api.renderers)
+        fields = self.fields
+        return b"".join([dumps(dict(zip(fields, row, strict=True))) + b"\n" for row in rows])
+
+
+def csv_value(value):
+    """Значение ячейки CSV; строка, похожая на формулу, экранируется префиксом '"""
+    if isinstance(value, str):
+        return "'" + value if value.startswith(FORMULA_PREFIXES) else value
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class CSVEncoder:
+    content_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, fields):
+        self.fields = fields
+        self.buffer = io.StringIO()
+        self.writer = csv.writer(self.buffer)
+
+    def _flush(self):
+        data = self.buffer.getvalue().encode()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
+
+    def header(self):
+        self.writer.writerow(self.fields)
+        return self._flush()
+
+    def encode(self, rows):
+        self.writer.writerows([[csv_value(value) for value in row] for row in rows])
+        return self._flush()
+
+
+ENCODERS = {encoder.extension: encoder for encoder in (NDJSONEncoder, CSVEncoder)}
+
+
+def encode_rows(rows, encoder):
+    """Итератор bytes: заголовок и пачки по ROWS_PER_WRITE строк"""
+    header = encoder.header()
+    if header:
+        yield header
+    rows = iter(rows)
+    while batch := list(islice(rows, ROWS_PER_WRITE)):
+        yield encoder.encode(batch)
+
+
+def iter_queryset_rows(queryset, fields, chunk_size=None):
+    """
+    Кортежи значений fields. В транзакции: вне неё PostgreSQL открывает
+    курсор WITH HOLD, который материализует весь результат на сервере БД.
+    """
+    chunk_size = chunk_size or getattr(settings, "API_EXPORT_CHUNK_SIZE", 2000)
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+async def iterate_in_thread(iterator):
+    """Синхронный итератор как асинхронный: каждый шаг - в sync потоке запроса"""
+    next_chunk = sync_to_async(next)
+    done = object()
+    try:
+        while (chunk := await next_chunk(iterator, done)) is not done:
+            yield chunk
+    finally:
+        # Закрытие генератора завершает транзакцию и курсор - в том же потоке
+        await sync_to_async(iterator.close)()
+
+
+def export_response(request, queryset, fields, export_format, filename):
+    """StreamingHttpResponse с выгрузкой fields из queryset в NDJSON или CSV"""
+    encoder = ENCODERS[export_format](fields)
+    content = encode_rows(iter_queryset_rows(queryset, fields), encoder)
+    # DRF Request оборачивает HttpRequest в _request
+    if isinstance(getattr(request, "_request", request), ASGIRequest):
+        content = iterate_in_thread(content)
+
+    response = StreamingHttpResponse(content, content_type=encoder.content_type)
+    stamp = timezone.now().strftime("%Y%m%d-%H%M%S")
+    response["Content-Disposition"] = (
+        f'attachment; filename="{filename}-{stamp}.{encoder.extension}"'
+    )
+    response["Cache-Control"] = "no-store"
+    # nginx иначе буферизует ответ целиком перед отправкой клиенту
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    """Формат выгрузки задаёт URL, Accept клиента не проверяется (ошибки - в JSON)"""
+
+    def select_parser(self, request, parsers):
+        return parsers[0] if parsers else None
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
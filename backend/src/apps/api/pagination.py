@@ -0,0 +1,149 @@
+"""
+Keyset (seek) пагинация.
+
+Следующая страница выбирается условием по ключу сортировки последней строки
+текущей страницы, а не OFFSET: при индексе по ключу (для User -
+users_user_created_id_idx) стоимость страницы не зависит от её глубины.
+COUNT(*) на каждый запрос не выполняется - общее число только по ?count=true,
+для больших таблиц PostgreSQL приблизительное (статистика pg_class).
+"""
+
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+TRUE_VALUES = {"1", "true", "yes"}
+
+
+def approximate_count(queryset, threshold=100_000):
+    """
+    Число строк queryset. Для нефильтрованной таблицы PostgreSQL больше
+    threshold строк - reltuples из pg_class (обновляется ANALYZE/autovacuum),
+    иначе точный COUNT(*).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql" and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+        # -1 - таблица ещё не анализировалась
+        if row is not None and row[0] >= threshold:
+            return row[0]
+    return queryset.count()
+
+
+class KeysetPagination(BasePagination):
+    """
+    Пагинация по уникальному ключу сортировки ordering (последнее поле -
+    tie-breaker, обычно id). Курсор - base64 JSON значений ключа последней
+    строки страницы; ответ: {"next", ["count"], "results"}.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in TRUE_VALUES:
+            self.count = approximate_count(queryset)
+
+        queryset = queryset.order_by(*self.ordering)
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self.seek_filter(self.decode_cursor(encoded, queryset)))
+
+        # Лишняя строка - признак следующей страницы без COUNT(*)
+        rows = list(queryset[: self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        self.last_values = [getattr(rows[-1], name) for name in self.field_names] if rows else None
+        return rows
+
+    @property
+    def field_names(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def seek_filter(self, values):
+        """Строки строго после values в порядке ordering"""
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            lookup = "lt" if field.startswith("-") else "gt"
+            equal = dict(zip(self.field_names[:index], values[:index], strict=True))
+            condition |= Q(**equal, **{f"{self.field_names[index]}__{lookup}": values[index]})
+        # Диапазон по первому полю отдельно: по нему идёт index range scan, OR - фильтр
+        first_lookup = "lte" if self.ordering[0].startswith("-") else "gte"
+        return Q(**{f"{self.field_names[0]}__{first_lookup}": values[0]}) & condition
+
+    def encode_cursor(self, values):
+        payload = json.dumps([str(value) for value in values], separators=(",", ":"))
+        return base64.urlsafe_b64encode(payload.encode()).decode("ascii").rstrip("=")
+
+    def decode_cursor(self, encoded, queryset):
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            raw_values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if not isinstance(raw_values, list) or len(raw_values) != len(self.ordering):
+                raise ValueError
+            opts = queryset.model._meta
+            return [
+                opts.get_field(name).to_python(value)
+                for name, value in zip(self.field_names, raw_values, strict=True)
+            ]
+        except (ValueError, TypeError, UnicodeError, binascii.Error, ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.count_query_param)
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(self.last_values)
+        )
+
+    def get_paginated_response(self, data):
+        payload = {"next": self.get_next_link()}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload["results"] = data
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "count": {"type": "integer"},
+                "results": schema,
+            },
+        }
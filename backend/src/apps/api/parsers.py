@@ -0,0 +1,31 @@
+"""
+JSON parser на orjson (requirements/orjson.txt).
+
+Разбирает тело UTF-8 запроса сразу из bytes. NaN/Infinity отклоняются, как
+у JSONParser при STRICT_JSON. Без orjson, при другой кодировке тела или
+STRICT_JSON = False - JSONParser DRF.
+"""
+
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.settings import api_settings
+
+from .renderers import orjson
+
+
+class FastJSONParser(JSONParser):
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get("encoding", settings.DEFAULT_CHARSET)
+        if (
+            orjson is None
+            or not api_settings.STRICT_JSON
+            or codecs.lookup(encoding).name != "utf-8"
+        ):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f"JSON parse error - {exc}") from exc
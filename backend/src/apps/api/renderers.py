@@ -0,0 +1,75 @@
+"""
+JSON renderer на orjson.
+
+Вывод тот же, что у rest_framework.renderers.JSONRenderer: компактный JSON
+в UTF-8, datetime/date/time/UUID как ISO-строки (UTC - с "Z"), Decimal и
+прочие типы - через rest_framework.utils.encoders.JSONEncoder, U+2028/U+2029
+экранированы. Отличие - только запись float в экспоненциальной форме
+(1e16 вместо 1e+16, то же значение). Ответ строится сразу в bytes.
+
+Без orjson (requirements/orjson.txt), для int за пределами 64 бит и для
+indent/ensure_ascii - рендер stdlib json, как у DRF.
+"""
+
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+# Валидный JSON, но не JavaScript: DRF экранирует их для встраивания в <script>
+LINE_SEPARATORS = ((b"\xe2\x80\xa8", b"\\u2028"), (b"\xe2\x80\xa9", b"\\u2029"))
+
+_default = encoders.JSONEncoder().default
+
+
+def _escape_line_separators(data):
+    for raw, escaped in LINE_SEPARATORS:
+        if raw in data:
+            data = data.replace(raw, escaped)
+    return data
+
+
+def _stdlib_dumps(data):
+    return json.dumps(
+        data,
+        cls=encoders.JSONEncoder,
+        ensure_ascii=False,
+        allow_nan=not api_settings.STRICT_JSON,
+        separators=(",", ":"),
+    ).encode()
+
+
+def dumps(data):
+    """data -> bytes в формате JSONRenderer (COMPACT_JSON, UNICODE_JSON)"""
+    if orjson is not None:
+        try:
+            return _escape_line_separators(
+                orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+            )
+        except orjson.JSONEncodeError:
+            # int > 64 бит, рекурсия глубже 254 уровней; TypeError - повторит stdlib
+            pass
+    return _escape_line_separators(_stdlib_dumps(data))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer с выводом через dumps(); indent и нестандартные настройки - как в DRF"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.encoder_class is not encoders.JSONEncoder
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
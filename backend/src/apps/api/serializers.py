@@ -0,0 +1,35 @@
+"""
+API serializers.
+"""
+
+from django.contrib.auth import get_user_model
+from rest_framework import serializers
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer, выдающий только поля из fields (None - все поля Meta.fields)"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class UserSerializer(DynamicFieldsModelSerializer):
+    class Meta:
+        model = get_user_model()
+        fields = (
+            "id",
+            "email",
+            "username",
+            "full_name",
+            "first_name",
+            "last_name",
+            "is_active",
+            "is_staff",
+            "is_email_verified",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
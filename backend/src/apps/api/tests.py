@@ -2,7 +2,37 @@
 Tests for API app.
 """
 
-from django.test import Client, TestCase
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+import uuid
+import zoneinfo
+from datetime import UTC, date, datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import AsyncClient, Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from apps.core import compression
+
+from . import parsers, renderers
+from .compiled import compile_serializer
+from .export import CSVEncoder, encode_rows
+from .parsers import FastJSONParser
+from .renderers import FastJSONRenderer
+from .serializers import UserSerializer
 
 
 class APIRootTestCase(TestCase):
@@ -19,3 +49,354 @@ class APIRootTestCase(TestCase):
         self.assertIn("message", data)
         self.assertIn("version", data)
         self.assertEqual(data["version"], "v1")
+
+
+class UserListTestCase(TestCase):
+    """Tests for keyset-paginated user listing"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        created_at = timezone.now()
+        users = User.objects.bulk_create(
+            User(email=f"user{i}@example.com", username=f"user{i}") for i in range(7)
+        )
+        # Одинаковый created_at у части строк: порядок держится на tie-breaker id
+        User.objects.filter(pk__in=[user.pk for user in users[:4]]).update(created_at=created_at)
+
+    def setUp(self):
+        # Снимки пользователей (apps.users.backends) переживают откат транзакции теста
+        caches["shared"].clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_requires_staff(self):
+        """Test listing is not available to regular users"""
+        client = Client()
+        self.assertEqual(client.get("/api/v1/users/").status_code, 403)
+        client.force_login(get_user_model().objects.exclude(is_staff=True).first())
+        self.assertEqual(client.get("/api/v1/users/").status_code, 403)
+
+    def test_walks_all_pages_in_order(self):
+        """Test cursor pages cover every user once in (created_at, id) order"""
+        expected = list(
+            get_user_model().objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+        self.client.get("/api/v1/users/")  # снимок пользователя - в кэш
+        seen = []
+        url = "/api/v1/users/?page_size=3"
+        while url:
+            with self.assertNumQueries(1):  # сессия и пользователь - из кэша
+                data = self.client.get(url).json()
+            self.assertNotIn("count", data)
+            self.assertLessEqual(len(data["results"]), 3)
+            seen += [row["id"] for row in data["results"]]
+            url = data["next"]
+        self.assertEqual(seen, expected)
+
+    def test_field_selection(self):
+        """Test ?fields= limits both the SELECT and the output"""
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/api/v1/users/?fields=email,id&page_size=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()["results"][0]), {"id", "email"})
+        page_query = captured.captured_queries[-1]["sql"]
+        self.assertNotIn("full_name", page_query)
+        self.assertNotIn("password", page_query)
+
+        response = self.client.get("/api/v1/users/?fields=email,password")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.json())
+
+    def test_count_and_invalid_cursor(self):
+        """Test optional total count and rejection of malformed cursors"""
+        data = self.client.get("/api/v1/users/?count=true&page_size=2").json()
+        self.assertEqual(data["count"], 8)
+        self.assertNotIn("count=", data["next"])
+        self.assertEqual(self.client.get("/api/v1/users/?cursor=bogus").status_code, 404)
+
+
+class UserExportTestCase(TestCase):
+    """Tests for streaming NDJSON/CSV export"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        User.objects.bulk_create(
+            User(email=f"user{i}@example.com", username=f"user{i}", full_name=f"Пользователь {i}")
+            for i in range(5)
+        )
+
+    def setUp(self):
+        # Снимки пользователей (apps.users.backends) переживают откат транзакции теста
+        caches["shared"].clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_csv(self):
+        """Test CSV export streams every user with the requested columns"""
+        response = self.client.get("/api/v1/users/export.csv?fields=id,email,full_name")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["X-Accel-Buffering"], "no")
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(response.getvalue().decode())))
+        self.assertEqual(rows[0], ["id", "email", "full_name"])
+        expected = get_user_model().objects.values_list("id", "email", "full_name")
+        self.assertEqual(rows[1:], [[str(pk), email, name] for pk, email, name in expected])
+
+    def test_csv_escapes_formulas(self):
+        """Test cells that spreadsheets would evaluate as formulas are escaped"""
+        names = ['=HYPERLINK("http://evil")', "+1", "-2", "@SUM(A1)", "a=b"]
+        users = list(get_user_model().objects.exclude(pk=self.admin.pk).order_by("pk"))
+        for user, name in zip(users, names, strict=True):
+            user.full_name = name
+        get_user_model().objects.bulk_update(users, ["full_name"])
+
+        response = self.client.get("/api/v1/users/export.csv?fields=id,full_name")
+        rows = list(csv.reader(io.StringIO(response.getvalue().decode())))
+        exported = {int(pk): name for pk, name in rows[1:]}
+        self.assertEqual(
+            [exported[user.pk] for user in users],
+            ['\'=HYPERLINK("http://evil")', "'+1", "'-2", "'@SUM(A1)", "a=b"],
+        )
+
+    def test_ndjson_gzip(self):
+        """Test NDJSON export is compressed on the fly when the client accepts it"""
+        response = self.client.get(
+            "/api/v1/users/export.ndjson?fields=email,created_at", HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        lines = gzip.decompress(response.getvalue()).decode().splitlines()
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(set(json.loads(lines[0])), {"email", "created_at"})
+
+    def test_requires_staff(self):
+        """Test export is not available to regular users"""
+        self.assertEqual(Client().get("/api/v1/users/export.csv").status_code, 403)
+        self.assertEqual(self.client.get("/api/v1/users/export.xml").status_code, 404)
+
+    async def test_asgi_streams_async(self):
+        """Test ASGI response gets an async iterator instead of a buffered list"""
+        client = AsyncClient()
+        await client.aforce_login(self.admin)
+        response = await client.get("/api/v1/users/export.ndjson")
+        self.assertTrue(response.is_async)
+        body = b"".join([chunk async for chunk in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 6)
+
+    def test_memory_does_not_grow_with_rows(self):
+        """Test peak memory of encoding + streaming gzip is flat in the number of rows"""
+        created_at = timezone.now()
+
+        def peak_memory(count):
+            rows = ((i, f"user{i}@example.com", True, created_at) for i in range(count))
+            encoder = CSVEncoder(["id", "email", "is_active", "created_at"])
+            tracemalloc.start()
+            try:
+                stream = compression.CODECS["gzip"].stream(4)
+                for _ in compression.compress_iterator(encode_rows(rows, encoder), stream):
+                    pass
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        small, large = peak_memory(5_000), peak_memory(50_000)
+        self.assertLess(large, small * 1.5)
+
+
+class FastJSONTestCase(TestCase):
+    """Tests for orjson-backed renderer and parser"""
+
+    def payload(self):
+        moscow = zoneinfo.ZoneInfo("Europe/Moscow")
+        return {
+            "id": 2**40,
+            "email": "юзер@example.com",
+            "created_at": datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=UTC),
+            "local": datetime(2024, 5, 1, 12, 30, tzinfo=moscow),
+            "naive": datetime(2024, 5, 1, 12, 30),
+            "day": date(2024, 5, 1),
+            "at": time(8, 15, 30),
+            "uuid": uuid.UUID("12345678-1234-5678-1234-567812345678"),
+            "amount": Decimal("10.50"),
+            "lazy": gettext_lazy("Пользователь"),
+            "separators": "a\u2028b\u2029c",
+            "nested": [{1: True, "none": None}, (1.5, -0.0)],
+            "huge": 2**70,
+        }
+
+    def test_matches_drf_renderer(self):
+        """Test output is byte-identical to DRF JSONRenderer"""
+        payload = self.payload()
+        expected = JSONRenderer().render(payload)
+        self.assertEqual(FastJSONRenderer().render(payload), expected)
+        del payload["huge"]  # int > 64 бит - через stdlib, без него - через orjson
+        self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_falls_back_without_orjson(self):
+        """Test stdlib json is used when orjson is not installed"""
+        payload = self.payload()
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertEqual(FastJSONRenderer().render(payload), JSONRenderer().render(payload))
+        with mock.patch.object(parsers, "orjson", None):
+            self.assertEqual(FastJSONParser().parse(io.BytesIO(b'{"a": [1]}')), {"a": [1]})
+
+    def test_indent_delegates_to_drf(self):
+        """Test indented output (e.g. Accept: application/json; indent=2) matches DRF"""
+        payload = {"a": [1, 2]}
+        rendered = FastJSONRenderer().render(payload, "application/json; indent=2")
+        self.assertEqual(rendered, JSONRenderer().render(payload, "application/json; indent=2"))
+
+    def test_parser(self):
+        """Test parser reads UTF-8 bodies and rejects invalid JSON like DRF"""
+        parser = FastJSONParser()
+        body = json.dumps({"email": "юзер@example.com", "n": 1.5}).encode()
+        self.assertEqual(parser.parse(io.BytesIO(body)), {"email": "юзер@example.com", "n": 1.5})
+        for invalid in (b"{", b"NaN", b""):
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(invalid))
+
+    def test_api_uses_fast_renderer(self):
+        """Test DRF views render through FastJSONRenderer by default"""
+        admin = get_user_model().objects.create_user(email="admin@example.com", is_staff=True)
+        caches["shared"].clear()
+        client = Client()
+        client.force_login(admin)
+        with mock.patch.object(renderers, "dumps", wraps=renderers.dumps) as dumps:
+            response = client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, 200)
+        dumps.assert_called_once()
+
+
+class CompiledSerializerTestCase(TestCase):
+    """Tests for values_list-based compiled serializers"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        User.objects.create_user(email="first@example.com", full_name="Первый")
+        User.objects.create_user(email="second@example.com", is_staff=True, last_name="")
+
+    def assertMatchesDRF(self, serializer_class, fields=None):
+        queryset = get_user_model().objects.order_by("id")
+        kwargs = {"fields": fields} if fields is not None else {}
+        expected = serializer_class(queryset, many=True, **kwargs).data
+        compiled = compile_serializer(serializer_class, fields)
+        data = compiled.serialize(compiled.values(queryset, extra=["created_at"]))
+        self.assertEqual(FastJSONRenderer().render(data), FastJSONRenderer().render(expected))
+
+    def test_matches_model_serializer(self):
+        """Test compiled output renders exactly like UserSerializer"""
+        self.assertMatchesDRF(UserSerializer)
+        self.assertMatchesDRF(UserSerializer, ("email", "id"))
+        with timezone.override(zoneinfo.ZoneInfo("Europe/Moscow")):
+            self.assertMatchesDRF(UserSerializer)
+
+    def test_converted_fields(self):
+        """Test fields needing to_representation are converted like DRF"""
+
+        class ConvertingSerializer(serializers.ModelSerializer):
+            joined = serializers.DateTimeField(source="date_joined", format="%Y-%m-%d")
+            joined_at = serializers.DateTimeField(source="date_joined")
+            id = serializers.CharField()
+
+            class Meta:
+                model = get_user_model()
+                fields = ("id", "email", "joined", "joined_at", "last_login")
+
+        self.assertMatchesDRF(ConvertingSerializer)
+        compiled = compile_serializer(ConvertingSerializer)
+        self.assertEqual(compiled.columns, ["id", "email", "date_joined", "last_login"])
+
+    def test_unsupported_fields(self):
+        """Test method fields and dotted sources are rejected at compile time"""
+
+        class MethodSerializer(serializers.Serializer):
+            name = serializers.SerializerMethodField()
+
+        class DottedSerializer(serializers.Serializer):
+            domain = serializers.CharField(source="profile.domain")
+
+        for serializer_class in (MethodSerializer, DottedSerializer):
+            with self.assertRaises(ImproperlyConfigured):
+                compile_serializer(serializer_class)
+
+
+class ConditionalGetTestCase(TestCase):
+    """Tests for ETag/Last-Modified handling on API GET endpoints"""
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_user(email="admin@example.com", is_staff=True)
+        cls.user = User.objects.create_user(email="user@example.com")
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_list_not_modified(self):
+        """Test matching If-None-Match returns 304 without touching the users table"""
+        response = self.client.get("/api/v1/users/")
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("Last-Modified", response)
+        self.assertEqual(response["Cache-Control"], "private, no-cache")
+
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+
+        other = self.client.get("/api/v1/users/?fields=id", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+
+    def test_list_etag_changes_with_data(self):
+        """Test saves change the list version after commit, logins do not"""
+        etag = self.client.get("/api/v1/users/")["ETag"]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=["last_login"])
+        response = self.client.get("/api/v1/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.full_name = "Новое имя"
+            self.user.save()
+        response = self.client.get("/api/v1/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            get_user_model().objects.bulk_create_users(
+                [{"email": "bulk@example.com"}], hash_workers=0
+            )
+        response = self.client.get("/api/v1/users/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_uses_updated_at(self):
+        """Test detail validators come from updated_at of the row"""
+        url = f"/api/v1/users/{self.user.pk}/"
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["email"], "user@example.com")
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, 304)
+        etag = response["ETag"]
+
+        get_user_model().objects.filter(pk=self.user.pk).update(
+            updated_at=timezone.now() + timedelta(seconds=5)
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get("/api/v1/users/0/").status_code, 404)
@@ -3,21 +3,29 @@ API URLs - минимальный скелет для DRF.
 Может быть пустым, если API не используется.
 """
 
-from django.urls import path
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
+from django.http import JsonResponse
+from django.urls import path, re_path
+from django.views.decorators.http import require_http_methods
 
+from .views import UserDetailView, UserExportView, UserListView
 
-@api_view(["GET"])
-def api_root(request):
-    """API root endpoint"""
-    return Response(
+
+@require_http_methods(["GET"])
+async def api_root(request):
+    """
+    API root endpoint.
+
+    Обычный async view, а не DRF @api_view: DRF views синхронные и под ASGI
+    выполнялись бы в потоке. Ответ статический - content negotiation не нужен.
+    """
+    return JsonResponse(
         {
             "message": "Django Base Project API",
             "version": "v1",
             "endpoints": {
                 "health": "/health/",
                 "readiness": "/readiness/",
+                "users": "/api/v1/users/",
             },
         }
     )
@@ -27,4 +35,11 @@ app_name = "api"
 
 urlpatterns = [
     path("", api_root, name="api-root"),
+    path("users/", UserListView.as_view(), name="user-list"),
+    path("users/<int:pk>/", UserDetailView.as_view(), name="user-detail"),
+    re_path(
+        r"^users/export\.(?P<export_format>ndjson|csv)$",
+        UserExportView.as_view(),
+        name="user-export",
+    ),
 ]
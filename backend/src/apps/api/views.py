@@ -1,5 +1,121 @@
 """
-API views - placeholder for future API endpoints.
+API views.
 """
 
-# Placeholder for future API views
+from django.contrib.auth import get_user_model
+from django.utils.functional import cached_property
+from rest_framework import generics, permissions
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from .compiled import compile_serializer
+from .conditional import ConditionalGetMixin, make_etag
+from .export import ExportContentNegotiation, export_response
+from .pagination import KeysetPagination
+from .serializers import UserSerializer
+
+
+def ordering_fields(view, queryset):
+    """Поля ключа сортировки пагинации view (или Meta.ordering модели)"""
+    ordering = getattr(view.pagination_class, "ordering", None) or queryset.model._meta.ordering
+    return [field.lstrip("-") for field in ordering]
+
+
+class FieldSelectionMixin:
+    """
+    ?fields=id,email - выбрать колонки: SELECT только их (и ключа пагинации),
+    сериализатор выдаёт только их. Поля - из Meta.fields сериализатора.
+    """
+
+    fields_query_param = "fields"
+
+    @cached_property
+    def requested_fields(self):
+        allowed = self.get_serializer_class().Meta.fields
+        raw = self.request.query_params.get(self.fields_query_param, "")
+        fields = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+        if not fields:
+            return list(allowed)
+        unknown = [name for name in fields if name not in allowed]
+        if unknown:
+            raise ValidationError(
+                {self.fields_query_param: [f"Unknown fields: {', '.join(unknown)}"]}
+            )
+        return fields
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fields = [*self.requested_fields, *ordering_fields(self, queryset)]
+        return queryset.only(*dict.fromkeys(fields))
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault("fields", self.requested_fields)
+        return super().get_serializer(*args, **kwargs)
+
+
+class CompiledListMixin:
+    """
+    list() через CompiledSerializer (apps.api.compiled): строки values_list()
+    без экземпляров модели и полей DRF, ответ тот же, что у сериализатора.
+    """
+
+    def list(self, request, *args, **kwargs):
+        fields = getattr(self, "requested_fields", None)
+        compiled = compile_serializer(
+            self.get_serializer_class(), tuple(fields) if fields is not None else None
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = compiled.values(queryset, extra=ordering_fields(self, queryset))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(rows))
+
+
+class UserListView(
+    ConditionalGetMixin, CompiledListMixin, FieldSelectionMixin, generics.ListAPIView
+):
+    """
+    Список пользователей (только staff): keyset пагинация по (created_at, id),
+    ?cursor=, ?page_size= (до 100), ?count=true, ?fields=. ETag - версия таблицы.
+    """
+
+    queryset = get_user_model().objects.all()
+    serializer_class = UserSerializer
+    pagination_class = KeysetPagination
+    permission_classes = [permissions.IsAdminUser]
+
+
+class UserDetailView(ConditionalGetMixin, FieldSelectionMixin, generics.RetrieveAPIView):
+    """Пользователь по id (только staff), ?fields=. ETag и Last-Modified - из updated_at"""
+
+    queryset = get_user_model().objects.all()
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAdminUser]
+
+    def get_validators(self, request, *args, **kwargs):
+        updated_at = (
+            self.get_queryset().filter(pk=kwargs["pk"]).values_list("updated_at", flat=True).first()
+        )
+        if updated_at is None:
+            return None, None
+        return make_etag(kwargs["pk"], updated_at.isoformat(), request.get_full_path()), updated_at
+
+
+class UserExportView(FieldSelectionMixin, generics.GenericAPIView):
+    """
+    Выгрузка всех пользователей (только staff): /users/export.ndjson или
+    /users/export.csv, ?fields=. Ответ потоковый, сжимается по порциям.
+    """
+
+    queryset = get_user_model().objects.all()
+    serializer_class = UserSerializer
+    permission_classes = [permissions.IsAdminUser]
+    content_negotiation_class = ExportContentNegotiation
+    pagination_class = None
+
+    def get(self, request, export_format):
+        queryset = self.filter_queryset(self.get_queryset())
+        return export_response(
+            request, queryset, self.requested_fields, export_format, filename="users"
+        )
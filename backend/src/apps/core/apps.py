@@ -11,3 +11,11 @@ class CoreConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.core"
     verbose_name = "Основные компоненты"
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+
+        from .db.queries import install_query_timer
+
+        # Учёт SQL запроса - на каждом соединении, в любом потоке (и под ASGI)
+        connection_created.connect(install_query_timer, dispatch_uid="apps.core.query_timer")
@@ -0,0 +1,141 @@
+"""
+Async-native версии стандартных middleware для ASGI.
+
+Django оборачивает process_request/process_response каждого MiddlewareMixin
+в sync_to_async, а sync-only middleware (WhiteNoise) переводит в sync весь
+оставшийся стек. Под ASGI это переход в поток на каждый запрос.
+
+Здесь те же middleware, но хуки без I/O вызываются прямо в event loop.
+В sync режиме (WSGI) поведение не меняется - это подклассы оригиналов.
+В поток уходят только шаги с реальным I/O: сохранение сессии и отдача
+статического файла.
+"""
+
+import types
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.contrib.auth import middleware as auth
+from django.contrib.messages import middleware as messages
+from django.contrib.sessions import middleware as sessions
+from django.middleware import clickjacking, common, csrf, security
+from whitenoise import middleware as whitenoise
+
+HOOKS = ("process_view", "process_template_response", "process_exception")
+
+
+def make_inline_async(method):
+    """
+    Coroutine-обёртка над sync методом без I/O: выполняется без sync_to_async.
+    Остаётся bound методом - BaseHandler берёт из __self__ имя middleware.
+    """
+
+    async def wrapper(self, *args):
+        return method(*args)
+
+    wrapper.__name__ = method.__name__
+    return types.MethodType(wrapper, method.__self__)
+
+
+def adapt_hooks(middleware):
+    """
+    BaseHandler адаптирует process_view и др. через sync_to_async, если они
+    не coroutine. В async режиме подменяем их inline coroutine-обёртками.
+    """
+    for name in HOOKS:
+        method = getattr(middleware, name, None)
+        if method is not None:
+            setattr(middleware, name, make_inline_async(method))
+
+
+class InlineAsyncMixin:
+    """
+    Для MiddlewareMixin, у которого хуки не делают I/O:
+    в async режиме вызывает их прямо в event loop.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if self.async_mode:
+            adapt_hooks(self)
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, "process_request"):
+            response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, "process_response"):
+            response = self.process_response(request, response)
+        return response
+
+
+class SecurityMiddleware(InlineAsyncMixin, security.SecurityMiddleware):
+    pass
+
+
+class CommonMiddleware(InlineAsyncMixin, common.CommonMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(InlineAsyncMixin, csrf.CsrfViewMiddleware):
+    """CSRF токен хранится в cookie (CSRF_USE_SESSIONS=False) - без I/O"""
+
+
+class AuthenticationMiddleware(InlineAsyncMixin, auth.AuthenticationMiddleware):
+    """request.user ленивый; в async view используйте await request.auser()"""
+
+
+class XFrameOptionsMiddleware(InlineAsyncMixin, clickjacking.XFrameOptionsMiddleware):
+    pass
+
+
+class SessionMiddleware(InlineAsyncMixin, sessions.SessionMiddleware):
+    """Сессия сохраняется в БД/кэш - в поток только если к ней обращались"""
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        response = await self.get_response(request)
+        if request.session.accessed:
+            return await sync_to_async(self.process_response)(request, response)
+        return self.process_response(request, response)
+
+
+class MessageMiddleware(InlineAsyncMixin, messages.MessageMiddleware):
+    """Сообщения пишутся в сессию - в поток только если их читали или добавляли"""
+
+    async def __acall__(self, request):
+        self.process_request(request)
+        response = await self.get_response(request)
+        storage = request._messages
+        if storage.used or storage.added_new:
+            return await sync_to_async(self.process_response)(request, response)
+        return self.process_response(request, response)
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """
+    WhiteNoise без поддержки async: поиск файла - словарь в памяти,
+    в поток уходит только открытие найденного файла.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,282 @@
+"""
+Двухуровневый кэш: LRU в памяти процесса перед общим кэшем.
+
+Общий уровень - любой другой backend из CACHES (Redis, а без Redis -
+файловый кэш на общем диске контейнера), задаётся OPTIONS["SHARED"].
+Чтение сначала идёт в локальный LRU (без сети и сериализации в общий
+backend), при промахе - в общий кэш, найденное значение кладётся локально.
+
+Другие воркеры не инвалидируют локальный уровень: запись живёт в нём не
+дольше LOCAL_TIMEOUT секунд (и не дольше своего timeout), это и есть
+максимальное время, в течение которого воркер может видеть старое значение.
+
+get_or_set защищён от cache stampede: значение вычисляет один поток в
+процессе и один процесс среди воркеров (lock-ключ в общем кэше через add),
+остальные ждут его результат.
+
+    CACHES = {
+        "default": {
+            "BACKEND": "apps.core.cache.TwoTierCache",
+            "OPTIONS": {"SHARED": "shared", "LOCAL_MAX_ENTRIES": 1000, "LOCAL_TIMEOUT": 5},
+        },
+        "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache", ...},
+    }
+"""
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+from . import metrics
+
+LOCK_POLL_INTERVAL = 0.05
+
+
+class LocalLRU:
+    """Ограниченный LRU с TTL записей, общий для всех потоков процесса"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Сериализованное значение или None (нет записи или истекла)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, pickled, expires_at):
+        if self.max_entries <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            self._data[key] = (expires_at, pickled)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.CACHE_EVICTIONS.inc(evicted)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# CacheHandler создаёт экземпляр backend на поток - локальный уровень
+# хранится на уровне модуля, чтобы быть общим для потоков (как у LocMemCache)
+_stores = {}
+_stores_lock = threading.Lock()
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def get_local_store(name, max_entries):
+    with _stores_lock:
+        store = _stores.get(name)
+        if store is None:
+            store = _stores[name] = LocalLRU(max_entries)
+        return store
+
+
+@contextmanager
+def _key_lock(key):
+    """Lock на ключ внутри процесса (не на весь кэш)"""
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _key_locks[key]
+
+
+class TwoTierCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get("OPTIONS", {})
+        self.shared_alias = options.get("SHARED", "shared")
+        self.local_timeout = options.get("LOCAL_TIMEOUT", 5)
+        self.lock_timeout = options.get("LOCK_TIMEOUT", 10)
+        self.local = get_local_store(
+            location or self.shared_alias, options.get("LOCAL_MAX_ENTRIES", 1000)
+        )
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def _resolve_timeout(self, timeout):
+        return self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+
+    def _set_local(self, local_key, value, timeout):
+        if timeout is not None and timeout <= 0:
+            self.local.delete(local_key)
+            return
+        ttl = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.local.set(local_key, pickled, time.monotonic() + ttl)
+
+    def _lookup(self, key, version):
+        """(значение или _missing_key, уровень: local/shared/miss)"""
+        local_key = self.make_and_validate_key(key, version=version)
+        pickled = self.local.get(local_key)
+        if pickled is not None:
+            return pickle.loads(pickled), "local"
+        value = self.shared.get(key, self._missing_key, version=version)
+        if value is self._missing_key:
+            return value, "miss"
+        # Оставшийся TTL общего уровня неизвестен - локально держим LOCAL_TIMEOUT
+        self._set_local(local_key, value, None)
+        return value, "shared"
+
+    def get(self, key, default=None, version=None):
+        value, result = self._lookup(key, version)
+        metrics.CACHE_REQUESTS.labels(result).inc()
+        return default if value is self._missing_key else value
+
+    def get_many(self, keys, version=None):
+        found = {}
+        missing = []
+        for key in keys:
+            pickled = self.local.get(self.make_and_validate_key(key, version=version))
+            if pickled is None:
+                missing.append(key)
+            else:
+                found[key] = pickle.loads(pickled)
+        if found:
+            metrics.CACHE_REQUESTS.labels("local").inc(len(found))
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            for key, value in shared.items():
+                self._set_local(self.make_and_validate_key(key, version=version), value, None)
+            found.update(shared)
+            if shared:
+                metrics.CACHE_REQUESTS.labels("shared").inc(len(shared))
+            if len(shared) < len(missing):
+                metrics.CACHE_REQUESTS.labels("miss").inc(len(missing) - len(shared))
+        return found
+
+    def has_key(self, key, version=None):
+        if self.local.get(self.make_and_validate_key(key, version=version)) is not None:
+            return True
+        return self.shared.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        self.shared.set(key, value, timeout=timeout, version=version)
+        self._set_local(self.make_and_validate_key(key, version=version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        added = self.shared.add(key, value, timeout=timeout, version=version)
+        if added:
+            self._set_local(self.make_and_validate_key(key, version=version), value, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self._resolve_timeout(timeout)
+        failed = self.shared.set_many(data, timeout=timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._set_local(self.make_and_validate_key(key, version=version), value, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        # Локальную копию сбрасываем: следующий get возьмёт её с новым TTL
+        self.local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.touch(key, timeout=self._resolve_timeout(timeout), version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self.local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.incr(key, delta, version=version)
+
+    def delete(self, key, version=None):
+        self.local.delete(self.make_and_validate_key(key, version=version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self.local.delete(self.make_and_validate_key(key, version=version))
+        self.shared.delete_many(keys, version=version)
+
+    def clear(self):
+        self.local.clear()
+        return self.shared.clear()
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        """
+        Как BaseCache.get_or_set, но callable вычисляется один раз:
+        в процессе - под lock на ключ, между процессами - под lock-ключом
+        в общем кэше. Не получившие lock ждут значение до LOCK_TIMEOUT,
+        затем вычисляют сами.
+        """
+        value = self.get(key, self._missing_key, version=version)
+        if value is not self._missing_key:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout=timeout, version=version)
+
+        with _key_lock(self.make_and_validate_key(key, version=version)):
+            # Пока ждали lock, значение мог вычислить другой поток
+            value, _ = self._lookup(key, version)
+            if value is not self._missing_key:
+                return value
+
+            lock_key = f"{key}:lock"
+            acquired = self.shared.add(lock_key, 1, timeout=self.lock_timeout, version=version)
+            if not acquired:
+                metrics.CACHE_LOCK_WAITS.inc()
+                value = self._wait_for_value(key, lock_key, version)
+                if value is not self._missing_key:
+                    return value
+            try:
+                value = default()
+                self.set(key, value, timeout=timeout, version=version)
+            finally:
+                if acquired:
+                    self.shared.delete(lock_key, version=version)
+        return value
+
+    async def aget_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        return await sync_to_async(self.get_or_set)(key, default, timeout, version)
+
+    def _wait_for_value(self, key, lock_key, version):
+        """Ждать значение, которое вычисляет другой процесс"""
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            value, _ = self._lookup(key, version)
+            if value is not self._missing_key:
+                return value
+            if not self.shared.has_key(lock_key, version=version):
+                # Владелец lock завершился без результата (ошибка) - вычисляем сами
+                break
+        return self._missing_key
@@ -0,0 +1,191 @@
+"""
+Кодеки сжатия ответов (br, zstd, gzip) и выбор кодека по Accept-Encoding.
+
+Используются apps.core.middleware.CompressionMiddleware. Каждый кодек умеет
+сжать тело целиком (compress) и потоково (stream): порция на входе - порция
+на выходе, сброшенная до границы блока, чтобы клиент мог распаковать её
+сразу, без ожидания конца ответа.
+
+brotli и zstandard - requirements/compression.txt; без них доступен только gzip.
+"""
+
+import zlib
+from functools import lru_cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Помимо text/*, *+json и *+xml
+COMPRESSIBLE_TYPES = frozenset(
+    {
+        "application/json",
+        "application/javascript",
+        "application/xml",
+        "application/x-ndjson",
+        "application/vnd.oai.openapi",
+        "image/svg+xml",
+    }
+)
+
+
+class GzipStream:
+    def __init__(self, level):
+        # wbits=31: заголовок и CRC gzip (mtime=0)
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdStream:
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self):
+        return self.compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+class Codec:
+    """Content-Encoding name, уровень по умолчанию и потоковый компрессор stream_class"""
+
+    def __init__(self, name, stream_class, compress, default_level):
+        self.name = name
+        self.stream_class = stream_class
+        self._compress = compress
+        self.default_level = default_level
+
+    def compress(self, data, level):
+        return self._compress(data, level)
+
+    def stream(self, level):
+        return self.stream_class(level)
+
+    def __repr__(self):
+        return f"<Codec {self.name}>"
+
+
+def _gzip_compress(data, level):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(data) + compressor.flush()
+
+
+CODECS = {"gzip": Codec("gzip", GzipStream, _gzip_compress, 6)}
+if brotli is not None:
+    CODECS["br"] = Codec(
+        "br", BrotliStream, lambda data, level: brotli.compress(data, quality=level), 4
+    )
+if zstandard is not None:
+    CODECS["zstd"] = Codec(
+        "zstd",
+        ZstdStream,
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        3,
+    )
+
+
+def available_encodings(preferred):
+    """Кодеки из preferred (в порядке предпочтения сервера), которые установлены"""
+    return tuple(name for name in preferred if name in CODECS)
+
+
+def _parse_accept_encoding(header):
+    weights = {}
+    for item in header.lower().split(","):
+        name, *params = item.split(";")
+        name = name.strip()
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights["gzip" if name == "x-gzip" else name] = weight
+    return weights
+
+
+@lru_cache(maxsize=512)
+def select_encoding(accept_encoding, encodings):
+    """
+    Кодек из encodings с наибольшим q в Accept-Encoding (при равных q - первый
+    в encodings) или None. "*" задаёт q для неперечисленных кодеков, q=0 - запрет.
+    """
+    if not accept_encoding:
+        return None
+    weights = _parse_accept_encoding(accept_encoding)
+    default = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in encodings:
+        weight = weights.get(name, default)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+def media_type(content_type):
+    return content_type.partition(";")[0].strip().lower()
+
+
+def is_compressible(content_type):
+    mime = media_type(content_type)
+    return (
+        mime.startswith("text/") or mime in COMPRESSIBLE_TYPES or mime.endswith(("+json", "+xml"))
+    )
+
+
+def levels_for(levels, content_type):
+    """
+    Уровни кодеков для Content-Type из настройки вида
+    {"*": {"gzip": 6}, "text/*": {...}, "application/json": {...}}:
+    точный тип важнее "type/*", тот - важнее "*", недостающее - default_level кодека
+    """
+    mime = media_type(content_type)
+    result = {name: codec.default_level for name, codec in CODECS.items()}
+    for key in ("*", mime.partition("/")[0] + "/*", mime):
+        result.update(levels.get(key, {}))
+    return {name: level for name, level in result.items() if name in CODECS}
+
+
+def compress_iterator(iterator, stream):
+    """Синхронный streaming_content -> сжатые порции"""
+    for chunk in iterator:
+        if chunk and (data := stream.compress(chunk)):
+            yield data
+    yield stream.finish()
+
+
+async def acompress_iterator(iterator, stream):
+    """Асинхронный streaming_content -> сжатые порции"""
+    async for chunk in iterator:
+        if chunk and (data := stream.compress(chunk)):
+            yield data
+    yield stream.finish()
@@ -0,0 +1,54 @@
+"""
+Request context на contextvars.
+
+Работает одинаково под WSGI (поток на запрос) и ASGI (корутина на запрос):
+каждый запрос видит только свой контекст, в том числе внутри sync_to_async.
+"""
+
+import time
+from contextvars import ContextVar
+
+
+class RequestContext:
+    """Данные текущего запроса для логов и метрик"""
+
+    __slots__ = ("request_id", "user_id", "route", "started_at", "queries")
+
+    def __init__(self, request_id, user_id=None, route=None, started_at=None):
+        self.request_id = request_id
+        self.user_id = user_id
+        self.route = route
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        # QueryTimer запроса (PerformanceMiddleware, apps.core.db.queries)
+        self.queries = None
+
+    def __repr__(self):
+        return f"<RequestContext request_id={self.request_id!r} route={self.route!r}>"
+
+
+_request_context = ContextVar("request_context", default=None)
+
+
+def get_request_context():
+    """
+    Текущий RequestContext или None вне запроса.
+
+    Возвращает уже существующий объект - без аллокаций, подходит для logging filter.
+    """
+    return _request_context.get()
+
+
+def bind_request_context(request_id, **kwargs):
+    """Создать контекст запроса. Возвращает token для reset_request_context"""
+    return _request_context.set(RequestContext(request_id, **kwargs))
+
+
+def reset_request_context(token):
+    """Восстановить контекст, который был до bind_request_context"""
+    _request_context.reset(token)
+
+
+def get_request_id():
+    """Request ID текущего запроса или None"""
+    ctx = _request_context.get()
+    return ctx.request_id if ctx is not None else None
@@ -0,0 +1,3 @@
+"""
+Database backends with instrumentation.
+"""
@@ -0,0 +1,41 @@
+"""
+Статистика пулов соединений psycopg3 (DB_POOL=true).
+"""
+
+from django.db import connections
+
+
+def get_pools():
+    """{alias: ConnectionPool} для баз, у которых настроен OPTIONS["pool"]"""
+    pools = {}
+    for alias in connections:
+        pool = getattr(connections[alias], "pool", None)
+        if pool is not None:
+            pools[alias] = pool
+    return pools
+
+
+def pop_pool_stats():
+    """
+    Снять статистику всех пулов.
+
+    Счётчики (requests_num, requests_wait_ms, ...) сбрасываются -
+    значения относятся к периоду с предыдущего вызова.
+    """
+    stats = {}
+    for alias, pool in get_pools().items():
+        raw = pool.pop_stats()
+        size = raw.get("pool_size", 0)
+        available = raw.get("pool_available", 0)
+        stats[alias] = {
+            "size": size,
+            "max_size": raw.get("pool_max", 0),
+            "checked_out": size - available,
+            "idle": available,
+            "waiting": raw.get("requests_waiting", 0),
+            "requests": raw.get("requests_num", 0),
+            "wait_ms": raw.get("requests_wait_ms", 0),
+            "errors": raw.get("requests_errors", 0),
+            "connections_lost": raw.get("connections_lost", 0),
+        }
+    return stats
@@ -0,0 +1,5 @@
+"""
+PostgreSQL backend с метриками соединений.
+
+Использование: ENGINE = "apps.core.db.postgresql"
+"""
@@ -0,0 +1,19 @@
+"""
+DatabaseWrapper поверх django.db.backends.postgresql.
+"""
+
+import time
+
+from django.db.backends.postgresql import base
+
+from apps.core.metrics import DB_CONNECTION_ACQUIRE
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL DatabaseWrapper, замеряющий время получения нового соединения"""
+
+    def get_new_connection(self, conn_params):
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        DB_CONNECTION_ACQUIRE.labels(self.alias).observe(time.perf_counter() - start)
+        return connection
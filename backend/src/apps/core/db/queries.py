@@ -0,0 +1,46 @@
+"""
+Учёт SQL-запросов текущего HTTP запроса (PerformanceMiddleware).
+
+time_query - execute_wrapper, который ставится один раз на каждое соединение
+(сигнал connection_created, apps.core.apps). QueryTimer запроса он берёт из
+request context (contextvars), а не из соединения потока middleware: под ASGI
+middleware работает в потоке event loop, а SQL sync view и async ORM
+выполняется в потоке sync_to_async, на другом соединении (asgiref Local).
+"""
+
+import time
+
+from apps.core.context import get_request_context
+
+
+class QueryTimer:
+    """Количество и суммарное время SQL-запросов"""
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+def time_query(execute, sql, params, many, context):
+    """execute_wrapper: запрос учитывается в QueryTimer из request context, если он есть"""
+    ctx = get_request_context()
+    timer = ctx.queries if ctx is not None else None
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """connection_created: DatabaseWrapper переживает переподключения - ставим один раз"""
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
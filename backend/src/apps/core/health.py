@@ -1,16 +1,20 @@
 """
 Health check endpoints для мониторинга.
+
+Async views: под ASGI обрабатываются в event loop без перехода в поток.
 """
 
-from django.db import connection
+from asgiref.sync import sync_to_async
 from django.http import JsonResponse
 from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_http_methods
 
+from .readiness import get_monitor
+
 
 @require_http_methods(["GET"])
 @never_cache
-def health_check(request):
+async def health_check(request):
     """
     Простая проверка, что приложение работает.
     Не проверяет БД.
@@ -20,13 +24,28 @@ def health_check(request):
 
 @require_http_methods(["GET"])
 @never_cache
-def readiness_check(request):
+async def readiness_check(request):
     """
     Проверка готовности принимать трафик.
-    Проверяет доступность БД.
+
+    Читает закэшированный результат проверок (БД, кэш, диск, миграции),
+    которые выполняет фоновый поток - см. apps.core.readiness.
+    ?detail=1 добавляет результаты по каждой проверке.
     """
-    try:
-        connection.ensure_connection()
-        return JsonResponse({"status": "ready"})
-    except Exception as e:
-        return JsonResponse({"status": "not ready", "error": str(e)}, status=503)
+    monitor = get_monitor()
+    if monitor.needs_refresh():
+        # Проверки ходят в БД - только первый probe процесса (или без фонового потока)
+        snapshot = await sync_to_async(monitor.get_snapshot)()
+    else:
+        snapshot = monitor.get_snapshot()
+    if snapshot is None:
+        return JsonResponse({"status": "not ready", "error": "readiness data is stale"}, status=503)
+
+    data = {"status": "ready" if snapshot.ready else "not ready"}
+    if request.GET.get("detail"):
+        data["checks"] = {name: result.as_dict() for name, result in snapshot.results.items()}
+    elif not snapshot.ready:
+        data["error"] = "; ".join(
+            f"{name}: {result.error}" for name, result in snapshot.results.items() if not result.ok
+        )
+    return JsonResponse(data, status=200 if snapshot.ready else 503)
@@ -1,33 +1,122 @@
 """
-Custom logging formatters and filters.
+Custom logging formatters, filters and handlers.
 """
 
+import copy
+import importlib
 import json
 import logging
+import os
+import queue
+import sys
 import threading
-from datetime import datetime
+from datetime import UTC, datetime
 
-# Thread-local storage для request ID
-_thread_local = threading.local()
+from .context import (
+    bind_request_context,
+    get_request_context,
+    get_request_id,  # noqa: F401 - обратная совместимость импорта
+)
 
-
-def get_request_id():
-    """Получить request ID из thread-local storage"""
-    return getattr(_thread_local, "request_id", None)
+# Стандартные атрибуты LogRecord, которые не попадают в extra fields.
+# frozenset вместо списка: проверка O(1) на каждый атрибут каждой записи.
+RESERVED_ATTRS = frozenset(
+    {
+        "name",
+        "msg",
+        "args",
+        "created",
+        "filename",
+        "funcName",
+        "levelname",
+        "levelno",
+        "lineno",
+        "module",
+        "msecs",
+        "message",
+        "pathname",
+        "process",
+        "processName",
+        "relativeCreated",
+        "thread",
+        "threadName",
+        "taskName",
+        "exc_info",
+        "exc_text",
+        "stack_info",
+        "request_id",
+    }
+)
 
 
 def set_request_id(request_id):
-    """Установить request ID в thread-local storage"""
-    _thread_local.request_id = request_id
+    """Установить request ID в текущем request context (см. apps.core.context)"""
+    ctx = get_request_context()
+    if ctx is None:
+        bind_request_context(request_id)
+    else:
+        ctx.request_id = request_id
+
+
+def _stdlib_encoder(data):
+    return json.dumps(data, default=str, ensure_ascii=False)
+
+
+def _orjson_encoder():
+    try:
+        import orjson
+    except ImportError:
+        return None
+
+    option = orjson.OPT_NON_STR_KEYS
+
+    def encode(data):
+        return orjson.dumps(data, default=str, option=option).decode()
+
+    return encode
+
+
+def get_json_encoder(name="auto"):
+    """
+    Вернуть функцию dict -> str для JSONFormatter.
+
+    - "auto": orjson, если установлен, иначе stdlib json
+    - "orjson" / "json": явный выбор
+    - dotted path ("package.module.func"): произвольный callable
+    """
+    if callable(name):
+        return name
+    if name in ("auto", "orjson"):
+        encoder = _orjson_encoder()
+        if encoder is not None:
+            return encoder
+        if name == "orjson":
+            raise ImportError("orjson is not installed")
+        return _stdlib_encoder
+    if name == "json":
+        return _stdlib_encoder
+
+    module_path, _, attr = name.rpartition(".")
+    return getattr(importlib.import_module(module_path), attr)
 
 
 class RequestIDFilter(logging.Filter):
     """
     Logging filter для добавления request_id в каждую запись лога.
+
+    user_id и route добавляются, только если известны в контексте запроса.
     """
 
     def filter(self, record):
-        record.request_id = get_request_id() or "no-request-id"
+        ctx = get_request_context()
+        if ctx is None:
+            record.request_id = "no-request-id"
+            return True
+        record.request_id = ctx.request_id or "no-request-id"
+        if ctx.user_id is not None:
+            record.user_id = ctx.user_id
+        if ctx.route is not None:
+            record.route = ctx.route
         return True
 
 
@@ -35,11 +124,21 @@ class JSONFormatter(logging.Formatter):
     """
     JSON formatter для structured logging.
     Используется в production для интеграции с log aggregators.
+
+    Encoder выбирается параметром ``encoder`` (см. ``get_json_encoder``),
+    в LOGGING его можно передать как ключ formatter'а.
     """
 
+    def __init__(self, *args, encoder="auto", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.encode = get_json_encoder(encoder)
+
     def format(self, record):
         log_data = {
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "timestamp": datetime.fromtimestamp(record.created, UTC)
+            .replace(tzinfo=None)
+            .isoformat()
+            + "Z",
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -53,36 +152,176 @@ class JSONFormatter(logging.Formatter):
         if request_id:
             log_data["request_id"] = request_id
 
-        # Добавляем exception info, если есть
+        # Добавляем exception info, если есть (AsyncBatchingHandler передаёт готовый exc_text)
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
 
         # Добавляем extra fields
         for key, value in record.__dict__.items():
-            if key not in [
-                "name",
-                "msg",
-                "args",
-                "created",
-                "filename",
-                "funcName",
-                "levelname",
-                "levelno",
-                "lineno",
-                "module",
-                "msecs",
-                "message",
-                "pathname",
-                "process",
-                "processName",
-                "relativeCreated",
-                "thread",
-                "threadName",
-                "exc_info",
-                "exc_text",
-                "stack_info",
-                "request_id",
-            ]:
+            if key not in RESERVED_ATTRS:
                 log_data[key] = value
 
-        return json.dumps(log_data)
+        return self.encode(log_data)
+
+
+class AsyncBatchingHandler(logging.Handler):
+    """
+    Queue-backed handler: запись лога только кладётся в bounded очередь,
+    форматирование и запись в stream выполняет фоновый writer пачками.
+
+    Фильтры (например, RequestIDFilter) отрабатывают в потоке запроса,
+    до постановки в очередь, поэтому контекст запроса не теряется. Там же,
+    как в QueueHandler.prepare, сообщение подставляется в msg, а traceback
+    форматируется в exc_text: аргументы, изменённые после вызова лога, не
+    попадают в запись, а traceback с locals не живёт до записи.
+
+    Параметры:
+    - capacity: максимальный размер очереди
+    - batch_size: максимум записей за одну запись в stream
+    - flush_interval: как долго writer ждёт новые записи (секунды)
+    - high_water: глубина очереди, при которой writer будится немедленно
+    - overflow: "drop" (отбросить запись при заполненной очереди)
+      или "block" (ждать место не дольше block_timeout секунд)
+    """
+
+    OVERFLOW_POLICIES = ("drop", "block")
+
+    def __init__(
+        self,
+        stream=None,
+        capacity=10000,
+        batch_size=256,
+        flush_interval=0.5,
+        high_water=None,
+        overflow="drop",
+        block_timeout=1.0,
+    ):
+        super().__init__()
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}, got {overflow!r}")
+        self.stream = stream if stream is not None else sys.stderr
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.high_water = high_water if high_water is not None else max(1, capacity * 3 // 4)
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=capacity)
+        self._wakeup = threading.Event()
+        self._writer = None
+        self._writer_pid = None
+        self._closed = False
+
+    def _ensure_writer(self):
+        # После fork (gunicorn preload) поток родителя в воркере не существует
+        if self._writer_pid == os.getpid():
+            return
+        with self.lock:
+            if self._writer_pid == os.getpid():
+                return
+            if self._writer_pid is not None:
+                self._queue = queue.Queue(maxsize=self.capacity)
+                self._wakeup = threading.Event()
+            self._writer = threading.Thread(
+                target=self._run, name="log-writer", args=(self._queue,), daemon=True
+            )
+            self._writer.start()
+            self._writer_pid = os.getpid()
+
+    def prepare(self, record):
+        """Копия записи без ссылок на аргументы и traceback - для очереди"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            formatter = self.formatter or logging.Formatter()
+            record.exc_text = formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        if self._closed:
+            return
+        self._ensure_writer()
+        try:
+            record = self.prepare(record)
+        except Exception:
+            self.handleError(record)
+            return
+        try:
+            if self.overflow == "block":
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return
+        if self._queue.qsize() >= self.high_water:
+            self._wakeup.set()
+
+    def _run(self, q):
+        while True:
+            # Копим пачку до flush_interval, если только не достигнут high_water
+            if q.qsize() < self.batch_size:
+                self._wakeup.wait(timeout=self.flush_interval)
+                self._wakeup.clear()
+
+            batch = []
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    record = q.get_nowait()
+                except queue.Empty:
+                    break
+                if record is None:
+                    q.task_done()
+                    stop = True
+                    break
+                batch.append(record)
+
+            if batch:
+                try:
+                    self._write_batch(batch)
+                finally:
+                    for _ in batch:
+                        q.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        if not lines:
+            return
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.stream.flush()
+        except Exception:
+            self.handleError(batch[-1])
+
+    def flush(self):
+        """Дождаться, пока writer обработает всё, что уже в очереди"""
+        if self._writer is None or self._writer_pid != os.getpid():
+            return
+        while self._queue.unfinished_tasks and self._writer.is_alive():
+            # Queue.join без таймаута может повиснуть, если writer упал
+            self._wakeup.set()
+            with self._queue.all_tasks_done:
+                self._queue.all_tasks_done.wait(timeout=0.05)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            if self._writer is not None and self._writer_pid == os.getpid():
+                self._queue.put(None)
+                self._wakeup.set()
+                self._writer.join(timeout=5)
+        super().close()
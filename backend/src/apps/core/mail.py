@@ -0,0 +1,161 @@
+"""
+Фоновая отправка почты.
+
+EMAIL_BACKEND = "apps.core.mail.QueuedEmailBackend": send_mail() в запросе не
+ждёт SMTP, а ставит письма задачами в очередь EMAIL_QUEUE (apps.core.tasks) -
+одним INSERT на вызов, в текущей транзакции; неотправленные письма переживают
+перезапуск. Воркер (run_worker, очередь "email") отправляет их через SMTP
+(EMAIL_HOST, EMAIL_PORT, ...): у каждого потока воркера своё постоянное
+соединение, через которое идут письмо за письмом - без TLS handshake и
+логина на каждое. Соединение закрывается после EMAIL_SMTP_MAX_MESSAGES писем
+или EMAIL_SMTP_IDLE_TIMEOUT секунд простоя.
+
+Временная ошибка (разрыв соединения, таймаут, ответ 4xx, ошибка логина) -
+повтор задачи с задержкой (TASKS_RETRY_BACKOFF); постоянная (5xx на
+отправителя, получателей или данные) - письмо отбрасывается с записью в лог.
+"""
+
+import base64
+import logging
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.backends.smtp import EmailBackend as SMTPBackend
+from django.core.mail.message import sanitize_address
+
+from apps.core import metrics
+from apps.core.tasks import task
+
+logger = logging.getLogger(__name__)
+
+EMAIL_QUEUE = "email"
+
+
+class SMTPConnectionPool:
+    """Постоянные SMTP соединения, по одному на поток"""
+
+    def __init__(self, max_messages=None, idle_timeout=None):
+        if max_messages is None:
+            max_messages = getattr(settings, "EMAIL_SMTP_MAX_MESSAGES", 100)
+        if idle_timeout is None:
+            idle_timeout = getattr(settings, "EMAIL_SMTP_IDLE_TIMEOUT", 30)
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.local = threading.local()
+
+    def get(self):
+        """Открытый SMTP backend потока; истёкшее соединение заменяется новым"""
+        state = self.local
+        now = time.monotonic()
+        if getattr(state, "backend", None) is not None and (
+            state.sent >= self.max_messages or now - state.used > self.idle_timeout
+        ):
+            self.close()
+        if getattr(state, "backend", None) is None:
+            backend = SMTPBackend(fail_silently=False)
+            backend.open()
+            state.backend, state.sent = backend, 0
+            metrics.SMTP_CONNECTIONS.inc()
+        state.used = now
+        return state.backend
+
+    def close(self):
+        backend = getattr(self.local, "backend", None)
+        self.local.backend = None
+        if backend is not None:
+            try:
+                backend.close()
+            except Exception:
+                logger.debug("SMTP connection close failed", exc_info=True)
+
+    def send(self, from_email, recipients, message):
+        """sendmail через соединение потока; словарь отклонённых получателей"""
+        reused = getattr(self.local, "backend", None) is not None
+        backend = self.get()
+        try:
+            refused = backend.connection.sendmail(from_email, recipients, message)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            if not reused:
+                raise
+            # Сервер закрыл простаивавшее соединение - одна попытка через новое
+            return self.send(from_email, recipients, message)
+        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+            # Ответ сервера на письмо: smtplib сбросил транзакцию (RSET),
+            # соединение годно для следующего письма
+            raise
+        except Exception:
+            self.close()
+            raise
+        self.local.sent += 1
+        return refused
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        _pool = SMTPConnectionPool()
+    return _pool
+
+
+def is_permanent(exc):
+    """Ошибка, после которой повтор не поможет (5xx на письмо)"""
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in exc.recipients.values())
+    if isinstance(exc, smtplib.SMTPSenderRefused | smtplib.SMTPDataError):
+        return exc.smtp_code >= 500
+    return False
+
+
+@task(name="apps.core.mail.send_email", queue=EMAIL_QUEUE)
+def send_email(from_email, recipients, message):
+    """Отправить письмо (message - base64 от готового MIME)"""
+    try:
+        refused = get_pool().send(from_email, recipients, base64.b64decode(message))
+    except Exception as exc:
+        if not is_permanent(exc):
+            raise
+        metrics.EMAIL_MESSAGES.labels("rejected").inc()
+        logger.error("Email from %s to %s rejected: %s", from_email, recipients, exc)
+        return
+    if refused:
+        logger.warning("Email from %s: recipients refused %s", from_email, refused)
+    metrics.EMAIL_MESSAGES.labels("sent").inc()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Email backend: письма отправляет воркер задач, запрос их только ставит в очередь"""
+
+    def send_messages(self, email_messages):
+        calls = []
+        for message in email_messages:
+            recipients = message.recipients()
+            if not recipients:
+                continue
+            encoding = message.encoding or settings.DEFAULT_CHARSET
+            try:
+                # MIME собирается здесь: ошибки в письме видны вызывающему коду
+                data = message.message().as_bytes(linesep="\r\n")
+                from_email = sanitize_address(message.from_email, encoding)
+                recipients = [sanitize_address(address, encoding) for address in recipients]
+            except Exception:
+                if not self.fail_silently:
+                    raise
+                continue
+            calls.append(((from_email, recipients, base64.b64encode(data).decode("ascii")), {}))
+        if not calls:
+            return 0
+        try:
+            send_email.enqueue_many(calls)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        metrics.EMAIL_MESSAGES.labels("queued").inc(len(calls))
+        return len(calls)
@@ -0,0 +1,77 @@
+"""
+Старт контейнера в одном интерпретаторе (entrypoint.sh).
+
+    python manage.py bootstrap --migrate --serve
+    python manage.py bootstrap --no-static
+
+Шаги: ожидание БД (--db-timeout), миграции (--migrate; без него - только
+предупреждение о неприменённых), collectstatic (--no-static - пропустить).
+--serve затем запускает gunicorn в этом же процессе (gunicorn.conf.py из
+текущей директории): Django уже настроен, модули импортированы. Время каждого
+шага выводится.
+"""
+
+import sys
+import time
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from apps.core import startup
+
+
+class Command(BaseCommand):
+    help = "Wait for the database, migrate, collect static files and optionally start gunicorn"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--db-timeout", type=float, default=30.0, help="Seconds to wait for the database"
+        )
+        parser.add_argument("--migrate", action="store_true", help="Apply migrations")
+        parser.add_argument("--no-static", action="store_true", help="Skip collectstatic")
+        parser.add_argument(
+            "--serve", action="store_true", help="Start gunicorn in this process afterwards"
+        )
+
+    def step(self, name, func):
+        start = time.perf_counter()
+        result = func()
+        self.stdout.write(f"{name}: {time.perf_counter() - start:.2f}s")
+        return result
+
+    def handle(self, *args, **options):
+        try:
+            self.step("database", lambda: startup.wait_for_database(options["db_timeout"]))
+        except Exception as exc:
+            raise CommandError(f"Database is not available: {exc}") from exc
+
+        if options["migrate"]:
+            self.step("migrate", lambda: call_command("migrate", interactive=False, verbosity=1))
+        else:
+            pending = self.step("migrations check", startup.pending_migrations)
+            if pending:
+                self.stderr.write(
+                    self.style.WARNING(
+                        f"{len(pending)} unapplied migrations: "
+                        + ", ".join(f"{app}.{name}" for app, name in pending)
+                    )
+                )
+
+        if not options["no_static"]:
+            self.step(
+                "collectstatic",
+                lambda: call_command("collectstatic", interactive=False, verbosity=0),
+            )
+
+        # gunicorn master (и воркеры после fork) открывают свои соединения
+        connections.close_all()
+        if options["serve"]:
+            self.serve()
+
+    def serve(self):
+        from gunicorn.app.wsgiapp import WSGIApplication
+
+        self.stdout.flush()
+        sys.argv = ["gunicorn"]
+        WSGIApplication("%(prog)s [OPTIONS] [APP_MODULE]", prog="gunicorn").run()
@@ -0,0 +1,96 @@
+"""
+migrate с защитой больших таблиц (apps.core.safe_migrations).
+
+    python manage.py migrate
+    python manage.py migrate --lock-timeout 2s --statement-timeout 30min
+    python manage.py migrate --allow-locking        # окно обслуживания
+
+Поверх стандартной команды: advisory lock на время миграций (ждать его не
+дольше --lock-wait секунд), lock_timeout/statement_timeout сессии, проверка
+плана перед применением - индексы на больших таблицах строятся CONCURRENTLY,
+прочие блокирующие операции на них требуют --allow-locking. Значения по
+умолчанию - MIGRATIONS_* в настройках. Не на PostgreSQL - стандартный migrate.
+"""
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.core.management.commands.migrate import Command as MigrateCommand
+from django.db import connections
+from django.db.models.signals import pre_migrate
+
+from apps.core import safe_migrations
+
+
+class Command(MigrateCommand):
+    help = (
+        "Updates database schema under an advisory lock with lock/statement timeouts, "
+        "building indexes on large tables concurrently."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--lock-timeout", help="PostgreSQL lock_timeout during migrations, e.g. 5s"
+        )
+        parser.add_argument(
+            "--statement-timeout", help="PostgreSQL statement_timeout during migrations"
+        )
+        parser.add_argument(
+            "--lock-wait", type=float, help="Seconds to wait for another process migrating"
+        )
+        parser.add_argument(
+            "--allow-locking",
+            action="store_true",
+            help="Apply operations that lock large tables",
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options["database"]]
+        if options["plan"] or options["check_unapplied"]:
+            return super().handle(*args, **options)
+
+        self.safety_options = options
+        self.checked = False
+        pre_migrate.connect(self.check_plan, weak=False, dispatch_uid="safe_migrations")
+        try:
+            lock_wait = options["lock_wait"] or settings.MIGRATIONS_LOCK_WAIT
+            with safe_migrations.advisory_lock(connection, lock_wait) as waited:
+                if waited > 1 and options["verbosity"] >= 1:
+                    self.stdout.write(f"Waited {waited:.1f}s for another process migrating")
+                with safe_migrations.session_timeouts(
+                    connection,
+                    options["lock_timeout"] or settings.MIGRATIONS_LOCK_TIMEOUT,
+                    options["statement_timeout"] or settings.MIGRATIONS_STATEMENT_TIMEOUT,
+                ):
+                    return super().handle(*args, **options)
+        except TimeoutError as exc:
+            raise CommandError(str(exc)) from exc
+        finally:
+            pre_migrate.disconnect(dispatch_uid="safe_migrations")
+
+    def check_plan(self, using, plan, **kwargs):
+        """pre_migrate (по разу на приложение): план один, проверяется первый раз"""
+        if self.checked or not plan:
+            return
+        self.checked = True
+        findings = safe_migrations.check_plan(
+            connections[using], plan, settings.MIGRATIONS_LARGE_TABLE_ROWS
+        )
+        rewritten = [finding for finding in findings if finding.rewritten]
+        if rewritten and self.safety_options["verbosity"] >= 1:
+            self.stdout.write(self.style.MIGRATE_HEADING("Large tables:"))
+            for finding in rewritten:
+                self.stdout.write(f"  {finding}")
+        locking = [finding for finding in findings if not finding.rewritten]
+        if not locking:
+            return
+        message = "\n".join(f"  {finding}" for finding in locking)
+        if self.safety_options["allow_locking"]:
+            self.stderr.write(self.style.WARNING(f"Locking operations allowed:\n{message}"))
+            return
+        raise CommandError(
+            "Migrations lock large tables:\n"
+            f"{message}\n"
+            "Split them into non-locking steps (NOT VALID constraints, a new column "
+            "instead of a type change) or run migrate --allow-locking in a maintenance window."
+        )
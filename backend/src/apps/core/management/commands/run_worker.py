@@ -0,0 +1,64 @@
+"""
+Воркер фоновых задач (apps.core.tasks).
+
+    python manage.py run_worker
+    python manage.py run_worker --queue default=4 --queue email=2
+    python manage.py run_worker --burst
+
+Без --queue - все очереди TASKS_QUEUES. --burst - выполнить готовые задачи
+и завершиться (cron, бенчмарк). --metrics-port - отдавать Prometheus метрики
+воркера (глубина очередей, задержка, время выполнения) на этом порту.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core import tasks
+from apps.core.startup import init_sentry
+
+
+def parse_queue(value):
+    name, _, concurrency = value.partition("=")
+    try:
+        concurrency = int(concurrency or 1)
+    except ValueError:
+        raise CommandError(f"Invalid --queue {value!r}, expected name=concurrency") from None
+    if not name or concurrency < 1:
+        raise CommandError(f"Invalid --queue {value!r}, expected name=concurrency")
+    return name, concurrency
+
+
+class Command(BaseCommand):
+    help = "Run a background task worker"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            default=[],
+            help="Queue and its concurrency, name=N (repeatable, default: TASKS_QUEUES)",
+        )
+        parser.add_argument(
+            "--burst", action="store_true", help="Exit when there are no ready tasks"
+        )
+        parser.add_argument(
+            "--metrics-port", type=int, help="Serve Prometheus metrics on this port"
+        )
+
+    def handle(self, *args, **options):
+        init_sentry()
+        if options["queue"]:
+            queues = dict(parse_queue(value) for value in options["queue"])
+        else:
+            queues = dict(getattr(settings, "TASKS_QUEUES", {tasks.DEFAULT_QUEUE: 1}))
+        if options["metrics_port"]:
+            from prometheus_client import start_http_server
+
+            start_http_server(options["metrics_port"])
+
+        tasks.autodiscover()
+        self.stdout.write(
+            f"Worker ({settings.TASKS_BACKEND.rpartition('.')[2]}): "
+            + ", ".join(f"{name}={concurrency}" for name, concurrency in queues.items())
+        )
+        tasks.get_backend().run_worker(queues, burst=options["burst"])
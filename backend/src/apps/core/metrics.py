@@ -0,0 +1,198 @@
+"""
+Prometheus метрики приложения.
+
+Под gunicorn каждый воркер - отдельный процесс, поэтому при заданной
+переменной окружения PROMETHEUS_MULTIPROC_DIR prometheus_client пишет значения
+в mmap-файлы в этой директории (см. entrypoint.sh), а /metrics агрегирует
+их по всем воркерам через MultiProcessCollector.
+"""
+
+import os
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_http_methods
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["route", "method", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being processed",
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL queries executed while handling HTTP requests",
+    ["route"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_request_query_duration_seconds",
+    "Total SQL time per HTTP request",
+    ["route"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float("inf")),
+)
+DB_CONNECTION_ACQUIRE = Histogram(
+    "db_connection_acquire_seconds",
+    "Time to open a new database connection",
+    ["alias"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, float("inf")),
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "db_pool_connections",
+    "psycopg pool connections by state",
+    ["alias", "state"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_WAITING = Gauge(
+    "db_pool_requests_waiting",
+    "Requests waiting for a pooled connection",
+    ["alias"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_REQUESTS = Counter(
+    "db_pool_requests",
+    "Connections requested from the pool",
+    ["alias"],
+)
+DB_POOL_WAIT = Counter(
+    "db_pool_wait_seconds",
+    "Total time spent waiting for a pooled connection",
+    ["alias"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests",
+    "Cache reads by outcome (apps.core.cache.TwoTierCache)",
+    ["result"],
+)
+CACHE_EVICTIONS = Counter(
+    "cache_local_evictions",
+    "Entries evicted from the in-process LRU tier",
+)
+CACHE_LOCK_WAITS = Counter(
+    "cache_lock_waits",
+    "get_or_set calls that waited for another process to compute the value",
+)
+SESSION_OPERATIONS = Counter(
+    "session_operations",
+    "Session store reads by source and writes (apps.core.sessions)",
+    ["operation"],
+)
+SESSION_DURATION = Histogram(
+    "session_operation_duration_seconds",
+    "Session load/save latency",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, float("inf")),
+)
+PASSWORD_HASHES = Counter(
+    "password_hashes",
+    "Password hash computations by slot outcome (apps.users.passwords)",
+    ["result"],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time a password hashing slot was held",
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, float("inf")),
+)
+PASSWORD_REHASHES = Counter(
+    "password_rehashes",
+    "Background password hash upgrades by outcome",
+    ["result"],
+)
+TASKS_ENQUEUED = Counter(
+    "tasks_enqueued",
+    "Background tasks enqueued (apps.core.tasks)",
+    ["queue"],
+)
+TASKS_PROCESSED = Counter(
+    "tasks_processed",
+    "Background task attempts by outcome",
+    ["queue", "task", "result"],
+)
+TASK_DURATION = Histogram(
+    "task_duration_seconds",
+    "Background task execution time",
+    ["queue", "task"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf")),
+)
+TASK_LATENCY = Histogram(
+    "task_queue_latency_seconds",
+    "Time from a task becoming ready to its execution start",
+    ["queue"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, float("inf")),
+)
+TASK_QUEUE_DEPTH = Gauge(
+    "task_queue_depth",
+    "Background tasks in the queue by state",
+    ["queue", "state"],
+    multiprocess_mode="mostrecent",
+)
+
+EMAIL_MESSAGES = Counter(
+    "email_messages",
+    "Emails by outcome: queued, sent, rejected (apps.core.mail)",
+    ["result"],
+)
+SMTP_CONNECTIONS = Counter(
+    "smtp_connections_opened",
+    "SMTP connections opened by the email sender",
+)
+
+
+def observe_request(route, method, status, duration, queries, query_duration):
+    """Записать метрики завершённого запроса (вызывается из PerformanceMiddleware)"""
+    route = route or UNMATCHED_ROUTE
+    REQUEST_DURATION.labels(route, method, status).observe(duration)
+    if queries:
+        DB_QUERIES.labels(route).inc(queries)
+    DB_QUERY_DURATION.labels(route).observe(query_duration)
+
+
+def observe_pool_stats(stats):
+    """Обновить метрики пулов из apps.core.db.pool.pop_pool_stats()"""
+    for alias, pool in stats.items():
+        DB_POOL_CONNECTIONS.labels(alias, "checked_out").set(pool["checked_out"])
+        DB_POOL_CONNECTIONS.labels(alias, "idle").set(pool["idle"])
+        DB_POOL_WAITING.labels(alias).set(pool["waiting"])
+        DB_POOL_REQUESTS.labels(alias).inc(pool["requests"])
+        DB_POOL_WAIT.labels(alias).inc(pool["wait_ms"] / 1000)
+
+
+def observe_queue_depth(depth):
+    """Обновить TASK_QUEUE_DEPTH из backend.queue_depth()"""
+    for queue, states in depth.items():
+        for state, count in states.items():
+            TASK_QUEUE_DEPTH.labels(queue, state).set(count)
+
+
+def get_registry():
+    """Registry для /metrics: агрегат всех процессов или текущий процесс"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+@require_http_methods(["GET"])
+@never_cache
+def metrics_view(request):
+    """Prometheus text exposition format"""
+    if not getattr(settings, "METRICS_ENABLED", False):
+        raise Http404
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -1,29 +1,80 @@
 """
-Custom middleware for request ID tracking.
+Custom middleware for request ID tracking, per-request performance instrumentation
+and response compression.
 """
 
+import logging
+import time
 import uuid
 
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
 
+from . import compression, metrics
+from .async_middleware import adapt_hooks
+from .context import bind_request_context, get_request_context, reset_request_context
+from .db.queries import QueryTimer
 
-class RequestIDMiddleware(MiddlewareMixin):
+access_logger = logging.getLogger("apps.access")
+
+
+class RequestIDMiddleware:
     """
     Middleware для генерации и передачи Request ID через весь request lifecycle.
 
     Генерирует уникальный ID для каждого запроса и добавляет его:
     - В request.META
     - В response headers
-    - В logging context (через thread-local storage)
+    - В request context (apps.core.context, contextvars) для логов
+
+    Поддерживает sync и async стек без MiddlewareMixin: под ASGI запрос
+    не проходит через лишний sync_to_async.
     """
 
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            adapt_hooks(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self.process_request(request)
+        try:
+            response = self.get_response(request)
+            return self.process_response(request, response)
+        finally:
+            self.finish_request(request, token)
+
+    async def __acall__(self, request):
+        token = self.process_request(request)
+        try:
+            response = await self.get_response(request)
+            return self.process_response(request, response)
+        finally:
+            self.finish_request(request, token)
+
     def process_request(self, request):
-        """Генерируем или получаем Request ID из заголовка"""
+        """Генерируем или получаем Request ID из заголовка, открываем request context"""
         request_id = request.META.get("HTTP_X_REQUEST_ID")
         if not request_id:
             request_id = str(uuid.uuid4())
 
         request.META["REQUEST_ID"] = request_id
+        return bind_request_context(request_id)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Запоминаем route, когда URL уже разрешён"""
+        match = request.resolver_match
+        ctx = get_request_context()
+        if match is not None and ctx is not None:
+            ctx.route = match.view_name or match.route
         return None
 
     def process_response(self, request, response):
@@ -31,4 +82,259 @@ class RequestIDMiddleware(MiddlewareMixin):
         request_id = request.META.get("REQUEST_ID")
         if request_id:
             response["X-Request-ID"] = request_id
+
+        # Пользователь попадает в контекст, только если его уже загрузил
+        # AuthenticationMiddleware/view: лишний запрос к БД ради логов не делаем
+        user = getattr(request, "_cached_user", None)
+        ctx = get_request_context()
+        if ctx is not None and user is not None and user.is_authenticated:
+            ctx.user_id = user.pk
+        return response
+
+    def finish_request(self, request, token):
+        """Закрываем request context (вызывается всегда, даже при исключении)"""
+        reset_request_context(token)
+
+
+class RequestTimings:
+    """Замеры одного запроса"""
+
+    __slots__ = ("started_at", "queries", "render_started_at", "render_duration")
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.queries = QueryTimer()
+        self.render_started_at = None
+        self.render_duration = 0.0
+
+
+class PerformanceMiddleware(RequestIDMiddleware):
+    """
+    RequestIDMiddleware + замеры времени запроса.
+
+    Собирает общее время, время и число SQL-запросов (apps.core.db.queries: из
+    любого потока запроса, в том числе sync_to_async под ASGI) и время
+    рендеринга TemplateResponse / DRF Response. Результат:
+    - заголовок Server-Timing (PERFORMANCE_SERVER_TIMING)
+    - access log "apps.access" со structured полями (PERFORMANCE_ACCESS_LOG),
+      WARNING, если превышен PERFORMANCE_QUERY_BUDGET или PERFORMANCE_LATENCY_BUDGET_MS
+    - Prometheus метрики по route (METRICS_ENABLED, см. apps.core.metrics)
+
+    Замеры доступны view через request.timings.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.server_timing = getattr(settings, "PERFORMANCE_SERVER_TIMING", True)
+        self.access_log = getattr(settings, "PERFORMANCE_ACCESS_LOG", True)
+        self.query_budget = getattr(settings, "PERFORMANCE_QUERY_BUDGET", None)
+        latency_budget = getattr(settings, "PERFORMANCE_LATENCY_BUDGET_MS", None)
+        self.latency_budget = latency_budget / 1000 if latency_budget is not None else None
+        self.metrics = getattr(settings, "METRICS_ENABLED", False)
+
+    def process_request(self, request):
+        token = super().process_request(request)
+        timings = request.timings = RequestTimings()
+        # SQL учитывает execute_wrapper соединений (apps.core.db.queries) через
+        # request context - он общий для потоков sync_to_async этого запроса
+        get_request_context().queries = timings.queries
+        if self.metrics:
+            metrics.REQUESTS_IN_PROGRESS.inc()
+        return token
+
+    def process_template_response(self, request, response):
+        """Рендеринг идёт после всех process_template_response - засекаем его отсюда"""
+        timings = request.timings
+        timings.render_started_at = time.perf_counter()
+
+        def render_finished(response):
+            timings.render_duration = time.perf_counter() - timings.render_started_at
+
+        response.add_post_render_callback(render_finished)
+        return response
+
+    def process_response(self, request, response):
+        response = super().process_response(request, response)
+        timings = request.timings
+        total = time.perf_counter() - timings.started_at
+        queries = timings.queries
+        # Обращения к сессии (apps.core.sessions), если request.session загружалась
+        session = getattr(getattr(request, "session", None), "timing", None)
+        if session is not None and not session.used:
+            session = None
+
+        if self.server_timing:
+            server_timing = [
+                f"total;dur={total * 1000:.1f}",
+                f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries"',
+            ]
+            if timings.render_started_at is not None:
+                server_timing.append(f"render;dur={timings.render_duration * 1000:.1f}")
+            if session is not None:
+                server_timing.append(
+                    f'session;dur={session.duration * 1000:.1f};desc="{session.source or "-"}, '
+                    f'{session.writes} writes"'
+                )
+            response["Server-Timing"] = ", ".join(server_timing)
+
+        if self.metrics:
+            ctx = get_request_context()
+            metrics.observe_request(
+                ctx.route if ctx is not None else None,
+                request.method,
+                response.status_code,
+                total,
+                queries.count,
+                queries.duration,
+            )
+
+        over_budget = []
+        if self.query_budget is not None and queries.count > self.query_budget:
+            over_budget.append("queries")
+        if self.latency_budget is not None and total > self.latency_budget:
+            over_budget.append("latency")
+
+        if over_budget or (self.access_log and access_logger.isEnabledFor(logging.INFO)):
+            extra = {
+                "method": request.method,
+                "path": request.path,
+                "status_code": response.status_code,
+                "duration_ms": round(total * 1000, 3),
+                "db_ms": round(queries.duration * 1000, 3),
+                "db_queries": queries.count,
+                "render_ms": round(timings.render_duration * 1000, 3),
+            }
+            if session is not None:
+                extra["session_ms"] = round(session.duration * 1000, 3)
+                extra["session_source"] = session.source
+                extra["session_writes"] = session.writes
+            if over_budget:
+                extra["over_budget"] = over_budget
+                access_logger.warning("request over budget", extra=extra)
+            else:
+                access_logger.info("request finished", extra=extra)
+        return response
+
+    def finish_request(self, request, token):
+        if self.metrics:
+            metrics.REQUESTS_IN_PROGRESS.dec()
+        super().finish_request(request, token)
+
+
+class CompressionMiddleware:
+    """
+    Сжатие ответов br / zstd / gzip (apps.core.compression) по Accept-Encoding.
+
+    Сжимаются ответы 200 с текстовыми типами (text/*, JSON, NDJSON, XML, SVG)
+    без Content-Encoding (файлы WhiteNoise с готовыми .br/.gz отдаются как есть)
+    и без Cache-Control: no-transform. Тело короче COMPRESSION_MIN_SIZE не
+    сжимается; streaming ответ сжимается по порциям, без буферизации. Порядок
+    кодеков - COMPRESSION_ENCODINGS, уровни по Content-Type - COMPRESSION_LEVELS.
+
+    BREACH: ответ, для которого в запросе получали CSRF токен (форма с
+    {% csrf_token %}, get_token(), смена токена при логине), не сжимается -
+    размер сжатого тела не выдаёт секрет. Под ASGI тело от
+    COMPRESSION_THREAD_MIN_SIZE сжимается в потоке, не блокируя event loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.encodings = compression.available_encodings(
+            getattr(settings, "COMPRESSION_ENCODINGS", ("br", "zstd", "gzip"))
+        )
+        self.min_size = getattr(settings, "COMPRESSION_MIN_SIZE", 1024)
+        self.thread_min_size = getattr(settings, "COMPRESSION_THREAD_MIN_SIZE", 256 * 1024)
+        self.levels = getattr(settings, "COMPRESSION_LEVELS", {})
+        # Content-Type -> уровни кодеков
+        self.levels_cache = {}
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.get_response(request)
+        codec = self.select_codec(request, response)
+        if codec is None:
+            return response
+        return self.compress(response, *codec)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        codec = self.select_codec(request, response)
+        if codec is None:
+            return response
+        if not response.streaming and len(response.content) >= self.thread_min_size:
+            return await sync_to_async(self.compress, thread_sensitive=False)(response, *codec)
+        return self.compress(response, *codec)
+
+    def select_codec(self, request, response):
+        """(кодек, уровень) или None, если ответ не сжимается"""
+        if response.status_code != 200 or response.has_header("Content-Encoding"):
+            return None
+        content_type = response.get("Content-Type", "")
+        if not compression.is_compressible(content_type):
+            return None
+        if "no-transform" in response.get("Cache-Control", ""):
+            return None
+        if self.csrf_token_used(request, response):
+            return None
+        if not response.streaming and len(response.content) < self.min_size:
+            return None
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        name = compression.select_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", ""), self.encodings
+        )
+        if name is None:
+            return None
+        levels = self.levels_cache.get(content_type)
+        if levels is None:
+            levels = self.levels_cache[content_type] = compression.levels_for(
+                self.levels, content_type
+            )
+        return compression.CODECS[name], levels[name]
+
+    @staticmethod
+    def csrf_token_used(request, response):
+        """
+        Попал ли CSRF токен в ответ. CSRF_COOKIE_NEEDS_UPDATE ставит get_token(),
+        но CsrfViewMiddleware (и csrf_protect у view) сбрасывает его в
+        process_response, выставив cookie - снаружи виден только cookie.
+        """
+        if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            return True
+        if settings.CSRF_USE_SESSIONS:
+            # Токен в сессии, по ответу не видно - любой запрос с токеном
+            return "CSRF_COOKIE" in request.META
+        return settings.CSRF_COOKIE_NAME in response.cookies
+
+    def compress(self, response, codec, level):
+        if response.streaming:
+            stream = codec.stream(level)
+            if response.is_async:
+                response.streaming_content = compression.acompress_iterator(
+                    response.streaming_content, stream
+                )
+            else:
+                response.streaming_content = compression.compress_iterator(
+                    response.streaming_content, stream
+                )
+            del response.headers["Content-Length"]
+        else:
+            compressed = codec.compress(response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        # Сильный ETag описывает байты тела - после сжатия он слабый (RFC 9110 8.8.1)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = codec.name
         return response
@@ -0,0 +1,52 @@
+"""
+Models for core app.
+"""
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class QueuedTask(models.Model):
+    """
+    Задача очереди в БД (apps.core.tasks.backends.DatabaseBackend).
+
+    Выполненная задача удаляется: в таблице остаются ожидающие, выполняемые
+    (locked_until в будущем) и упавшие после всех повторов (status=failed).
+    """
+
+    QUEUED = "queued"
+    FAILED = "failed"
+    STATUS_CHOICES = [(QUEUED, "В очереди"), (FAILED, "Ошибка")]
+
+    queue = models.CharField(max_length=64, verbose_name="Очередь")
+    name = models.CharField(max_length=255, verbose_name="Задача")
+    args = models.JSONField(default=list, encoder=DjangoJSONEncoder, verbose_name="Аргументы")
+    kwargs = models.JSONField(
+        default=dict, encoder=DjangoJSONEncoder, verbose_name="Именованные аргументы"
+    )
+    status = models.CharField(
+        max_length=16, choices=STATUS_CHOICES, default=QUEUED, verbose_name="Статус"
+    )
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Попыток")
+    max_retries = models.PositiveIntegerField(default=0, verbose_name="Повторов")
+    enqueued_at = models.DateTimeField(default=timezone.now, verbose_name="Поставлена")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="Выполнить после")
+    # Задача взята воркером до этого времени; позже - воркер считается упавшим
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="Занята до")
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")
+
+    class Meta:
+        verbose_name = "Фоновая задача"
+        verbose_name_plural = "Фоновые задачи"
+        indexes = [
+            # Выборка воркером: WHERE queue = ... AND run_after <= now() ORDER BY run_after, id
+            models.Index(
+                fields=["queue", "run_after", "id"],
+                name="core_task_ready_idx",
+                condition=models.Q(status="queued"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} [{self.queue}] #{self.pk}"
@@ -0,0 +1,320 @@
+"""
+Readiness checks с кэшированием результата.
+
+Проверки зависимостей (БД, кэш, диск, миграции) выполняются фоновым потоком
+раз в READINESS_INTERVAL секунд, probe только читает последний snapshot.
+Если snapshot старше READINESS_TTL (поток умер или завис) - сервис не готов.
+
+Приложения добавляют свои проверки через register_check:
+
+    from apps.core.readiness import register_check
+
+    @register_check("payments", critical=False)
+    def check_payments():
+        client.ping()  # исключение = проверка не прошла
+
+Проверка может вернуть dict - он попадёт в "details" в режиме ?detail=1.
+"""
+
+import logging
+import os
+import shutil
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+_checks = {}
+
+
+class Check:
+    """Зарегистрированная проверка"""
+
+    __slots__ = ("name", "func", "critical")
+
+    def __init__(self, name, func, critical):
+        self.name = name
+        self.func = func
+        self.critical = critical
+
+
+class CheckResult:
+    """Результат последнего запуска проверки"""
+
+    __slots__ = ("ok", "latency", "checked_at", "last_success", "error", "details")
+
+    def __init__(self, ok, latency, checked_at, last_success, error=None, details=None):
+        self.ok = ok
+        self.latency = latency
+        self.checked_at = checked_at
+        self.last_success = last_success
+        self.error = error
+        self.details = details
+
+    def as_dict(self):
+        data = {
+            "ok": self.ok,
+            "latency_ms": round(self.latency * 1000, 3),
+            "checked_at": self.checked_at,
+            "last_success": self.last_success,
+            "error": self.error,
+        }
+        if self.details is not None:
+            data["details"] = self.details
+        return data
+
+
+class Snapshot:
+    """Неизменяемый результат одного прогона всех проверок"""
+
+    __slots__ = ("ready", "results", "created_at")
+
+    def __init__(self, ready, results, created_at):
+        self.ready = ready
+        self.results = results
+        self.created_at = created_at
+
+
+def register_check(name, func=None, critical=True):
+    """
+    Зарегистрировать проверку. Проверка - функция без аргументов,
+    исключение означает неуспех. Можно использовать как декоратор.
+
+    critical=False: результат виден в detail-режиме, но не влияет на readiness.
+    """
+
+    def decorator(func):
+        _checks[name] = Check(name, func, critical)
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def unregister_check(name):
+    _checks.pop(name, None)
+
+
+def get_checks():
+    return list(_checks.values())
+
+
+# ---------------------------------------------------------------------------
+# Встроенные проверки
+# ---------------------------------------------------------------------------
+
+
+@register_check("database")
+def check_database():
+    # Соединение потока проверок переиспользуется между прогонами (release_connections);
+    # при ошибке закрываем его, чтобы следующий прогон переподключился
+    connection = connections[DEFAULT_DB_ALIAS]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except Exception:
+        connection.close()
+        raise
+
+
+@register_check("cache", critical=False)
+def check_cache():
+    cache = caches["default"]
+    # Двухуровневый кэш: проверяем общий уровень, локальный всегда доступен
+    cache = getattr(cache, "shared", cache)
+    key = f"readiness:{os.getpid()}"
+    cache.set(key, 1, timeout=60)
+    if cache.get(key) != 1:
+        raise RuntimeError("cache round trip failed")
+
+
+@register_check("disk", critical=False)
+def check_disk():
+    path = getattr(settings, "READINESS_DISK_PATH", None) or settings.MEDIA_ROOT
+    if not os.path.exists(path):
+        path = os.path.dirname(os.fspath(path)) or "/"
+    min_free = getattr(settings, "READINESS_DISK_MIN_FREE_MB", 100) * 1024 * 1024
+    free = shutil.disk_usage(path).free
+    if free < min_free:
+        raise RuntimeError(f"low disk space: {free // (1024 * 1024)} MB free")
+
+
+@register_check("database_pool", critical=False)
+def check_database_pool():
+    # Статистика пула за период с прошлого прогона; заодно обновляет /metrics
+    from .db.pool import pop_pool_stats
+    from .metrics import observe_pool_stats
+
+    stats = pop_pool_stats()
+    if not stats:
+        return None
+    if getattr(settings, "METRICS_ENABLED", False):
+        observe_pool_stats(stats)
+    return stats
+
+
+_migrations_applied = False
+
+
+@register_check("migrations")
+def check_migrations():
+    # Применённые миграции не откатываются сами по себе - после первого успеха
+    # не загружаем граф миграций повторно
+    global _migrations_applied
+    if _migrations_applied:
+        return
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connections[DEFAULT_DB_ALIAS])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    if plan:
+        raise RuntimeError(f"{len(plan)} unapplied migrations")
+    _migrations_applied = True
+
+
+# ---------------------------------------------------------------------------
+# Monitor
+# ---------------------------------------------------------------------------
+
+
+def release_connections():
+    """
+    Соединения потока проверок после прогона. С пулом (OPTIONS["pool"])
+    соединение возвращается в пул и не занимает слот пула воркера между
+    прогонами. Без пула оно остаётся открытым на всё время жизни потока
+    независимо от CONN_MAX_AGE (0 по умолчанию и под ASGI - иначе каждый
+    прогон подключался бы заново) и закрывается, только если сломано.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            connection.close()
+        elif connection.connection is not None and connection.errors_occurred:
+            # Как close_if_unusable_or_obsolete, но без CONN_MAX_AGE
+            if connection.is_usable():
+                connection.errors_occurred = False
+            else:
+                connection.close()
+
+
+class ReadinessMonitor:
+    """
+    Выполняет проверки и хранит последний Snapshot.
+
+    background=True: отдельный daemon-поток обновляет snapshot раз в interval секунд
+    (запускается лениво, после fork - заново в каждом воркере).
+    background=False: snapshot обновляется в потоке probe, не чаще раза в ttl секунд.
+    """
+
+    def __init__(self, interval=5.0, ttl=15.0, background=True):
+        self.interval = interval
+        self.ttl = ttl
+        self.background = background
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stop = threading.Event()
+
+    def run_checks(self):
+        """Выполнить все проверки и сохранить новый snapshot"""
+        previous = self._snapshot.results if self._snapshot is not None else {}
+        results = {}
+        ready = True
+        for check in get_checks():
+            start = time.perf_counter()
+            error = None
+            details = None
+            try:
+                details = check.func()
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            latency = time.perf_counter() - start
+            now = time.time()
+            ok = error is None
+            last = previous.get(check.name)
+            last_success = now if ok else (last.last_success if last is not None else None)
+            results[check.name] = CheckResult(ok, latency, now, last_success, error, details)
+            if not ok:
+                if check.critical:
+                    ready = False
+                logger.warning("Readiness check %s failed: %s", check.name, error)
+
+        snapshot = Snapshot(ready, results, time.monotonic())
+        self._snapshot = snapshot
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_checks()
+            except Exception:
+                logger.exception("Readiness monitor iteration failed")
+            finally:
+                release_connections()
+            self._stop.wait(self.interval)
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, name="readiness", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def needs_refresh(self):
+        """True, если get_snapshot() выполнит проверки в вызывающем потоке"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        return not self.background and time.monotonic() - snapshot.created_at > self.ttl
+
+    def get_snapshot(self):
+        """
+        Последний snapshot или None, если он устарел.
+
+        Первый вызов в процессе выполняет проверки синхронно, чтобы probe
+        сразу после старта не получал отказ из-за пустого кэша.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._snapshot or self.run_checks()
+
+        if self.background:
+            self._ensure_thread()
+        elif time.monotonic() - snapshot.created_at > self.ttl:
+            with self._lock:
+                snapshot = self.run_checks()
+
+        if time.monotonic() - snapshot.created_at > self.ttl:
+            return None
+        return snapshot
+
+    def stop(self):
+        self._stop.set()
+
+
+_monitor = None
+_monitor_lock = threading.Lock()
+
+
+def get_monitor():
+    """Monitor процесса, настроенный из settings (READINESS_*)"""
+    global _monitor
+    if _monitor is None:
+        with _monitor_lock:
+            if _monitor is None:
+                _monitor = ReadinessMonitor(
+                    interval=getattr(settings, "READINESS_INTERVAL", 5.0),
+                    ttl=getattr(settings, "READINESS_TTL", 15.0),
+                    background=getattr(settings, "READINESS_BACKGROUND", True),
+                )
+    return _monitor
@@ -0,0 +1,295 @@
+"""
+Безопасное применение миграций на больших таблицах (manage.py migrate).
+
+Команда migrate (apps.core.management.commands.migrate) перед применением
+собирает SQL каждой операции плана и ищет в нём блокирующие операции на
+таблицах больше MIGRATIONS_LARGE_TABLE_ROWS строк (оценка pg_class.reltuples):
+
+- CREATE INDEX без CONCURRENTLY - запись в таблицу ждёт всё время построения
+- ALTER COLUMN ... TYPE - ACCESS EXCLUSIVE и перезапись таблицы
+- SET NOT NULL, ADD CONSTRAINT без NOT VALID - проверка всех строк под блокировкой
+
+Миграция, в которой SQL порождают только AddIndex/RemoveIndex, переписывается
+на AddIndexConcurrently/RemoveIndexConcurrently (atomic=False) - индекс
+строится без блокировки записи. Остальные блокирующие операции останавливают
+migrate до явного --allow-locking (окно обслуживания) - или разбейте миграцию.
+
+CREATE/DROP INDEX CONCURRENTLY ждёт завершения всех открытых транзакций
+(например, выгрузки в transaction.atomic) - для них lock_timeout отключается.
+Прерванное построение (statement_timeout, отмена) оставляет INVALID индекс - он
+удаляется перед следующей попыткой.
+
+Пока идут миграции, соединение держит advisory lock: мигрирует одна реплика,
+остальные ждут её и находят миграции применёнными. lock_timeout не даёт DDL
+бесконечно ждать блокировку за долгим запросом (и блокировать всех, кто встал
+в очередь за DDL), statement_timeout ограничивает один запрос.
+"""
+
+import logging
+import re
+import time
+from contextlib import contextmanager, suppress
+
+from config import dependencies
+from django.contrib.postgres import operations as postgres_operations
+from django.db import DatabaseError
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.operations import AddIndex, RemoveIndex
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_lock(key): общий для всех реплик ключ миграций
+MIGRATE_LOCK_ID = 0x6D696772  # "migr"
+
+_TABLE = r'"?(?P<table>[\w$]+)"?'
+LOCKING_SQL = [
+    (
+        re.compile(rf"^CREATE (UNIQUE )?INDEX (?!CONCURRENTLY)\S+ ON {_TABLE}", re.I),
+        "index build blocks writes",
+    ),
+    (
+        # varchar(n) -> varchar(m > n) / text (увеличение max_length) - без перезаписи
+        re.compile(
+            rf"^ALTER TABLE {_TABLE} .*ALTER COLUMN \S+ TYPE (?!varchar\(|text\b)", re.I | re.S
+        ),
+        "column type change rewrites the table",
+    ),
+    (
+        re.compile(rf"^ALTER TABLE {_TABLE} .*ALTER COLUMN \S+ SET NOT NULL", re.I | re.S),
+        "SET NOT NULL scans the table",
+    ),
+    (
+        re.compile(rf"^ALTER TABLE {_TABLE} ADD CONSTRAINT (?!.*NOT VALID)", re.I | re.S),
+        "constraint validation scans the table",
+    ),
+]
+
+
+class Finding:
+    """Блокирующая операция миграции на большой таблице"""
+
+    def __init__(self, migration, operation, table, rows, reason, sql):
+        self.migration = migration
+        self.operation = operation
+        self.table = table
+        self.rows = rows
+        self.reason = reason
+        self.sql = sql
+        self.rewritten = False
+
+    def __str__(self):
+        action = "rewritten to CONCURRENTLY" if self.rewritten else self.reason
+        return (
+            f"{self.migration.app_label}.{self.migration.name}: "
+            f"{self.operation.describe()} on {self.table} (~{self.rows:,} rows): {action}"
+        )
+
+
+def locking_table(sql):
+    """(таблица, причина) для блокирующего SQL, иначе None"""
+    sql = sql.strip()
+    for pattern, reason in LOCKING_SQL:
+        match = pattern.match(sql)
+        if match:
+            return match["table"], reason
+    return None
+
+
+def large_tables(connection, threshold):
+    """{таблица: оценка строк} для таблиц текущей схемы с threshold строк и больше"""
+    if connection.vendor != "postgresql":
+        return {}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, c.reltuples::bigint
+            FROM pg_class c
+            WHERE c.relkind IN ('r', 'p')
+              AND c.relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = current_schema())
+              AND c.reltuples >= %s
+            """,
+            [threshold],
+        )
+        return dict(cursor.fetchall())
+
+
+def operation_sql(connection, state, migration):
+    """
+    [(операция, [SQL])] миграции от состояния проекта state - как sqlmigrate,
+    без выполнения; вместо списка None для операций, не сводимых к SQL (RunPython)
+    """
+    result = []
+    for operation in migration.operations:
+        new_state = state.clone()
+        operation.state_forwards(migration.app_label, new_state)
+        statements = None
+        if operation.reduces_to_sql:
+            with connection.schema_editor(collect_sql=True, atomic=False) as editor:
+                operation.database_forwards(migration.app_label, editor, state, new_state)
+            statements = editor.collected_sql
+        result.append((operation, statements))
+        state = new_state
+    return result
+
+
+@contextmanager
+def without_lock_timeout(connection):
+    """lock_timeout=0 на время блока, затем прежнее значение сессии"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('lock_timeout'), set_config('lock_timeout', '0', false)"
+        )
+        previous = cursor.fetchone()[0]
+    try:
+        yield
+    finally:
+        with suppress(DatabaseError), connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, false)", [previous])
+
+
+def drop_invalid_index(connection, name):
+    """Удалить INVALID индекс name, оставшийся от прерванного CONCURRENTLY; True, если был"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+            WHERE c.relname = %s AND NOT i.indisvalid
+              AND c.relnamespace = (SELECT oid FROM pg_namespace WHERE nspname = current_schema())
+            """,
+            [name],
+        )
+        if cursor.fetchone() is None:
+            return False
+        logger.warning("Dropping invalid index %s left by an interrupted build", name)
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {connection.ops.quote_name(name)}")
+    return True
+
+
+class AddIndexConcurrently(postgres_operations.AddIndexConcurrently):
+    """AddIndexConcurrently без lock_timeout, с удалением INVALID остатка"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.collect_sql:
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        connection = schema_editor.connection
+        with without_lock_timeout(connection):
+            drop_invalid_index(connection, self.index.name)
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+class RemoveIndexConcurrently(postgres_operations.RemoveIndexConcurrently):
+    """RemoveIndexConcurrently без lock_timeout"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.collect_sql:
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        with without_lock_timeout(schema_editor.connection):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+
+def concurrently(operation):
+    """CONCURRENTLY вариант AddIndex/RemoveIndex, иначе None"""
+    if type(operation) is AddIndex:
+        return AddIndexConcurrently(operation.model_name, operation.index)
+    if type(operation) is RemoveIndex:
+        return RemoveIndexConcurrently(operation.model_name, operation.name)
+    return None
+
+
+def rewrite(migration, operations):
+    """
+    Перевести индексы миграции на CONCURRENTLY, если SQL порождают только
+    AddIndex/RemoveIndex (остальные операции меняют только состояние).
+    operations - результат operation_sql. True, если переписана.
+    """
+    replaced = []
+    for operation, statements in operations:
+        if statements is None:
+            # RunPython в неатомарной миграции выполнялся бы без транзакции
+            return False
+        new = concurrently(operation) if statements else None
+        if statements and new is None:
+            return False
+        replaced.append(new or operation)
+    migration.operations = replaced
+    # CREATE INDEX CONCURRENTLY не выполняется в транзакции
+    migration.atomic = False
+    return True
+
+
+def check_plan(connection, plan, threshold, loader=None):
+    """
+    Блокирующие операции плана на больших таблицах; на PostgreSQL переписывает
+    миграции из одних индексов (Finding.rewritten).
+    """
+    tables = large_tables(connection, threshold)
+    if not tables:
+        return []
+    if loader is None:
+        loader = MigrationLoader(connection, ignore_no_migrations=True)
+    findings = []
+    for migration, backwards in plan:
+        if backwards:
+            continue
+        state = loader.project_state((migration.app_label, migration.name), at_end=False)
+        operations = operation_sql(connection, state, migration)
+        found = []
+        for operation, statements in operations:
+            for sql in statements or ():
+                match = locking_table(sql)
+                if match and match[0] in tables:
+                    table, reason = match
+                    found.append(Finding(migration, operation, table, tables[table], reason, sql))
+        if found and connection.vendor == "postgresql" and rewrite(migration, operations):
+            for finding in found:
+                finding.rewritten = True
+        findings.extend(found)
+    return findings
+
+
+@contextmanager
+def advisory_lock(connection, timeout):
+    """
+    Держать advisory lock миграций; ждать его не дольше timeout секунд
+    (TimeoutError). Не PostgreSQL - без блокировки.
+    """
+    if connection.vendor != "postgresql":
+        yield 0.0
+        return
+    start = time.monotonic()
+    delays = dependencies.backoff(base=0.5, cap=5.0)
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", [MIGRATE_LOCK_ID])
+            if cursor.fetchone()[0]:
+                break
+            delay = next(delays)
+            if time.monotonic() - start + delay > timeout:
+                raise TimeoutError(f"Migrations are still running elsewhere after {timeout:.0f}s")
+            logger.info("Waiting for another process to finish migrations")
+            time.sleep(delay)
+    try:
+        yield time.monotonic() - start
+    finally:
+        # Закрытие соединения тоже снимает блокировку
+        with suppress(DatabaseError), connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [MIGRATE_LOCK_ID])
+
+
+@contextmanager
+def session_timeouts(connection, lock_timeout, statement_timeout):
+    """lock_timeout/statement_timeout сессии на время блока ("5s", "15min", "0" - без)"""
+    if connection.vendor != "postgresql":
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('lock_timeout', %s, false), "
+            "set_config('statement_timeout', %s, false)",
+            [str(lock_timeout), str(statement_timeout)],
+        )
+    try:
+        yield
+    finally:
+        with suppress(DatabaseError), connection.cursor() as cursor:
+            cursor.execute("RESET lock_timeout; RESET statement_timeout")
@@ -0,0 +1,162 @@
+"""
+Session engine: cached_db без лишних запросов к БД.
+
+    SESSION_ENGINE = "apps.core.sessions"
+
+- чтение: кэш SESSION_CACHE_ALIAS, при промахе - БД с записью в кэш.
+  Как и в Django, сессия загружается только при первом обращении к
+  request.session - запросы без обращения к сессии её не читают
+- запись: в БД и в кэш (write-through), но только если данные изменились.
+  Присваивание того же значения или повторный save() после cycle_key()
+  (login) не делают UPDATE
+- clear_expired (manage.py clearsessions): удаление пачками по
+  SESSION_SWEEP_BATCH_SIZE вместо одного DELETE на всю таблицу
+- замеры чтения и записи запроса - в store.timing (PerformanceMiddleware
+  выводит их в Server-Timing и access log), счётчики - в /metrics
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SessionTiming:
+    """Обращения к хранилищу сессии за запрос"""
+
+    __slots__ = ("source", "load_duration", "save_duration", "writes", "skipped_writes")
+
+    def __init__(self):
+        self.source = None  # cache / db / missing
+        self.load_duration = 0.0
+        self.save_duration = 0.0
+        self.writes = 0
+        self.skipped_writes = 0
+
+    @property
+    def used(self):
+        return self.source is not None or self.writes or self.skipped_writes
+
+    @property
+    def duration(self):
+        return self.load_duration + self.save_duration
+
+
+class SessionStore(CachedDBStore):
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self.timing = SessionTiming()
+        # Сериализованные данные на момент загрузки/последней записи
+        self._stored_state = None
+
+    def _dump(self, data):
+        return self.serializer().dumps(data)
+
+    def _loaded(self, data, source, started_at):
+        duration = time.perf_counter() - started_at
+        self.timing.source = source
+        self.timing.load_duration += duration
+        self._stored_state = self._dump(data) if source != "missing" else None
+        metrics.SESSION_OPERATIONS.labels(f"load_{source}").inc()
+        metrics.SESSION_DURATION.labels("load").observe(duration)
+        return data
+
+    def load(self):
+        started_at = time.perf_counter()
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            # Как в cached_db: некорректный ключ для backend - сессия сбрасывается
+            data = None
+        if data is not None:
+            return self._loaded(data, "cache", started_at)
+
+        s = self._get_session_from_db()
+        if not s:
+            return self._loaded({}, "missing", started_at)
+        data = self.decode(s.session_data)
+        self._cache.set(self.cache_key, data, self.get_expiry_age(expiry=s.expire_date))
+        return self._loaded(data, "db", started_at)
+
+    async def aload(self):
+        started_at = time.perf_counter()
+        try:
+            data = await self._cache.aget(await self.acache_key())
+        except Exception:
+            data = None
+        if data is not None:
+            return self._loaded(data, "cache", started_at)
+
+        s = await self._aget_session_from_db()
+        if not s:
+            return self._loaded({}, "missing", started_at)
+        data = self.decode(s.session_data)
+        await self._cache.aset(
+            await self.acache_key(), data, await self.aget_expiry_age(expiry=s.expire_date)
+        )
+        return self._loaded(data, "db", started_at)
+
+    def _unchanged(self, must_create):
+        """Данные совпадают с сохранёнными - запись не нужна"""
+        if must_create or self._stored_state is None:
+            return False
+        if getattr(settings, "SESSION_SAVE_EVERY_REQUEST", False):
+            # Запись на каждый запрос продлевает expire_date - не пропускаем
+            return False
+        if self._dump(self._session) != self._stored_state:
+            return False
+        self.timing.skipped_writes += 1
+        metrics.SESSION_OPERATIONS.labels("save_skipped").inc()
+        return True
+
+    def _saved(self, started_at):
+        duration = time.perf_counter() - started_at
+        self._stored_state = self._dump(self._session)
+        self.timing.save_duration += duration
+        self.timing.writes += 1
+        metrics.SESSION_OPERATIONS.labels("save").inc()
+        metrics.SESSION_DURATION.labels("save").observe(duration)
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            # create() вызовет save(must_create=True) с новым ключом
+            return self.create()
+        if self._unchanged(must_create):
+            return
+        started_at = time.perf_counter()
+        super().save(must_create)
+        self._saved(started_at)
+
+    async def asave(self, must_create=False):
+        if self.session_key is None:
+            return await self.acreate()
+        if self._unchanged(must_create):
+            return
+        started_at = time.perf_counter()
+        await super().asave(must_create)
+        self._saved(started_at)
+
+    @classmethod
+    def clear_expired(cls, batch_size=None):
+        """
+        Удалить истёкшие сессии пачками: короткие транзакции вместо одного
+        DELETE, который держит блокировки и раздувает WAL на большой таблице.
+        """
+        if batch_size is None:
+            batch_size = getattr(settings, "SESSION_SWEEP_BATCH_SIZE", 1000)
+        model = cls.get_model_class()
+        expired = model.objects.filter(expire_date__lt=timezone.now())
+        deleted = 0
+        while True:
+            keys = list(expired.values_list("pk", flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted += model.objects.filter(pk__in=keys).delete()[0]
+        logger.info("Expired sessions deleted", extra={"deleted": deleted})
+        return deleted
@@ -0,0 +1,108 @@
+"""
+Старт процессов приложения.
+
+manage.py bootstrap выполняет шаги старта контейнера (ожидание БД, миграции,
+collectstatic) в одном интерпретаторе и запускает в нём же gunicorn: Django
+настраивается и модули импортируются один раз, а не в каждом шаге. warm_up()
+вызывается в master gunicorn до fork (gunicorn.conf.py) - воркеры получают
+загруженные URLconf, views и DRF готовыми и не тратят на них первый запрос.
+
+Тяжёлые необязательные модули загружаются только там, где нужны: Sentry -
+в процессах, обслуживающих запросы и задачи (init_sentry), а не в каждой
+команде manage.py.
+"""
+
+import logging
+import time
+
+from config import dependencies
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+def wait_for_database(timeout=30.0, alias="default"):
+    """
+    Ждать соединения с БД не дольше timeout секунд; секунд ожидания.
+
+    PostgreSQL сначала проверяется дешёвым probe (config.dependencies), пока не
+    начнёт принимать соединения; затем соединение Django - проверка с логином.
+    Паузы между попытками - экспоненциальные со случайным разбросом.
+    """
+    start = time.monotonic()
+    connection = connections[alias]
+    if connection.vendor == "postgresql":
+        # Параметры libpq: host может прийти и из OPTIONS (?host=/var/run/postgresql)
+        params = connection.get_connection_params()
+        dependency = dependencies.Dependency(
+            "postgres",
+            params.get("host"),
+            params.get("port"),
+            user=params.get("user", ""),
+            database=params.get("dbname", ""),
+        )
+        errors = dependencies.wait([dependency], timeout, auth=False)
+        if errors:
+            raise OSError(errors[dependency])
+    delays = dependencies.backoff()
+    while True:
+        try:
+            connection.ensure_connection()
+            return time.monotonic() - start
+        except Exception as exc:
+            delay = next(delays)
+            if time.monotonic() - start + delay > timeout:
+                raise
+            logger.info("Waiting for database: %s", exc)
+            connection.close()
+            time.sleep(delay)
+
+
+def pending_migrations(alias="default"):
+    """Неприменённые миграции [(app, name), ...]"""
+    from django.db.migrations.executor import MigrationExecutor
+
+    executor = MigrationExecutor(connections[alias])
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    return [(migration.app_label, migration.name) for migration, _ in plan]
+
+
+def warm_up():
+    """
+    Загрузить то, что иначе загрузит первый запрос каждого воркера: URLconf
+    со всеми views (и DRF), классы renderers/parsers DRF. Соединений с БД и
+    фоновых потоков не открывает - безопасно до fork.
+    """
+    from django.urls import get_resolver
+    from rest_framework.settings import api_settings
+
+    # Таблица reverse() строится по url_patterns - импортирует URLconf и views
+    get_resolver().reverse_dict  # noqa: B018
+    for name in ("DEFAULT_RENDERER_CLASSES", "DEFAULT_PARSER_CLASSES"):
+        getattr(api_settings, name)
+
+
+def init_sentry():
+    """Включить Sentry, если задан SENTRY_DSN и установлен sentry-sdk"""
+    dsn = getattr(settings, "SENTRY_DSN", "")
+    if not dsn or settings.DEBUG:
+        return False
+    try:
+        import sentry_sdk
+        from sentry_sdk.integrations.django import DjangoIntegration
+        from sentry_sdk.integrations.logging import LoggingIntegration
+    except ImportError:
+        # Sentry не установлен - игнорируем
+        return False
+    sentry_sdk.init(
+        dsn=dsn,
+        integrations=[
+            DjangoIntegration(),
+            LoggingIntegration(level=logging.INFO, event_level=logging.ERROR),
+        ],
+        traces_sample_rate=settings.SENTRY_TRACES_SAMPLE_RATE,
+        send_default_pii=False,
+        environment=settings.SENTRY_ENVIRONMENT,
+    )
+    return True
@@ -0,0 +1,98 @@
+"""
+Хранилище статики для collectstatic: CompressedManifestStaticFilesStorage
+WhiteNoise с инкрементальным сжатием в нескольких процессах.
+
+WhiteNoise при каждом collectstatic заново сжимает все файлы (brotli с
+максимальным уровнем и gzip -9) - десятки секунд на каждом старте контейнера.
+Здесь .br/.gz создаются, только если их ещё нет. Имя с хешем зависит от
+содержимого - его готовые варианты всегда актуальны, хотя Django и
+перезаписывает CSS/JS с хешем при каждом запуске. Для файлов без хеша
+варианты пересоздаются, если исходный файл новее (Compressor записывает
+вариантам mtime исходного файла). Повторный collectstatic без изменений
+ничего не сжимает. Остальные файлы сжимаются в пуле процессов (brotli и gzip
+упираются в CPU): COLLECTSTATIC_WORKERS, по умолчанию - по CPU контейнера.
+
+Результат (файлы с хешем в имени и .br/.gz рядом) WhiteNoise отдаёт сам,
+а nginx с gzip_static - из общего volume, без Python.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from config import resources
+from django.conf import settings
+from whitenoise import storage
+from whitenoise.compress import Compressor
+
+# mtime варианта переносится через os.utime(float) - сравнение с точностью до мс
+MTIME_TOLERANCE = 0.001
+
+
+class IncrementalCompressor(Compressor):
+    def suffixes(self):
+        return [
+            suffix for suffix, used in ((".br", self.use_brotli), (".gz", self.use_gzip)) if used
+        ]
+
+    def existing_variants(self, path, hashed=False):
+        """
+        Сжатые варианты path, созданные из текущей версии файла, или None,
+        если основного (.br, без brotli - .gz) нет или он старше исходного
+        файла без хеша в имени (hashed=False)
+        """
+        mtime = None if hashed else os.stat(path).st_mtime
+        variants = []
+        for index, suffix in enumerate(self.suffixes()):
+            try:
+                variant_mtime = os.stat(path + suffix).st_mtime
+            except FileNotFoundError:
+                variant_mtime = None
+            if variant_mtime is not None and (
+                mtime is None or variant_mtime >= mtime - MTIME_TOLERANCE
+            ):
+                variants.append(path + suffix)
+            elif index == 0:
+                return None
+        return variants
+
+
+def compress_workers():
+    workers = getattr(settings, "COLLECTSTATIC_WORKERS", None)
+    if workers is None:
+        workers = int(resources.cpu_limit())
+    return max(1, workers)
+
+
+class CompressedManifestStaticFilesStorage(storage.CompressedManifestStaticFilesStorage):
+    def create_compressor(self, **kwargs):
+        return IncrementalCompressor(**kwargs)
+
+    def compress_files(self, paths):
+        extensions = getattr(settings, "WHITENOISE_SKIP_COMPRESS_EXTENSIONS", None)
+        self.compressor = compressor = self.create_compressor(extensions=extensions, quiet=True)
+
+        hashed_names = set(self.hashed_files.values())
+        pending = []
+        for path in paths:
+            if not compressor.should_compress(path):
+                continue
+            full_path = self.path(path)
+            prefix_len = len(full_path) - len(path)
+            variants = compressor.existing_variants(full_path, hashed=path in hashed_names)
+            if variants is None:
+                pending.append((path, full_path))
+            else:
+                for variant in variants:
+                    yield path, variant[prefix_len:]
+
+        full_paths = [full_path for _, full_path in pending]
+        workers = min(compress_workers(), len(pending))
+        if workers > 1:
+            with ProcessPoolExecutor(workers) as executor:
+                results = list(executor.map(compressor.compress, full_paths, chunksize=8))
+        else:
+            results = map(compressor.compress, full_paths)
+        for (path, full_path), variants in zip(pending, results, strict=True):
+            prefix_len = len(full_path) - len(path)
+            for variant in variants:
+                yield path, variant[prefix_len:]
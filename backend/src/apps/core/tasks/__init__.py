@@ -0,0 +1,129 @@
+"""
+Фоновые задачи.
+
+    from apps.core.tasks import task
+
+    @task(queue="email", max_retries=5)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue(user.pk)
+    send_welcome_email.enqueue_many([((pk,), {}) for pk in user_ids])
+
+Задача выполняется воркером (manage.py run_worker) через backend из
+TASKS_BACKEND (apps.core.tasks.backends):
+- DatabaseBackend (по умолчанию) - таблица core_queuedtask, воркер забирает
+  задачи SELECT ... FOR UPDATE SKIP LOCKED. Постановка - INSERT в текущей
+  транзакции: задача появится в очереди только вместе с её данными.
+- CeleryBackend - Celery (requirements/celery.txt, CELERY_BROKER_URL),
+  отправка после commit.
+- ImmediateBackend - выполнение сразу при enqueue (тесты).
+
+Аргументы сериализуются в JSON (DjangoJSONEncoder: datetime, UUID, Decimal
+приходят строками) - передавайте id, а не объекты моделей. Упавшая задача
+повторяется до max_retries раз с экспоненциальной задержкой
+(TASKS_RETRY_BACKOFF * 2^(попытка-1), не больше TASKS_RETRY_BACKOFF_MAX).
+"""
+
+import importlib
+import random
+from functools import update_wrapper
+
+from django.conf import settings
+from django.utils.module_loading import autodiscover_modules, import_string
+
+DEFAULT_QUEUE = "default"
+
+_registry = {}
+_backend = None
+
+
+class Task:
+    """Функция, которую можно поставить в очередь; вызов task(...) выполняет её сразу"""
+
+    def __init__(self, func, name=None, queue=DEFAULT_QUEUE, max_retries=None, retry_backoff=None):
+        self.func = func
+        self.name = name or f"{func.__module__}.{func.__qualname__}"
+        self.queue = queue
+        self._max_retries = max_retries
+        self._retry_backoff = retry_backoff
+        update_wrapper(self, func)
+
+    @property
+    def max_retries(self):
+        if self._max_retries is not None:
+            return self._max_retries
+        return getattr(settings, "TASKS_MAX_RETRIES", 3)
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<Task {self.name} [{self.queue}]>"
+
+    def retry_delay(self, attempt):
+        """Секунд до повтора после attempt-й неудачной попытки (1, 2, ...)"""
+        base = self._retry_backoff
+        if base is None:
+            base = getattr(settings, "TASKS_RETRY_BACKOFF", 10)
+        delay = min(base * 2 ** (attempt - 1), getattr(settings, "TASKS_RETRY_BACKOFF_MAX", 3600))
+        # Разброс: повторы задач, упавших вместе, не приходят одновременно
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    def enqueue(self, *args, **kwargs):
+        """Поставить в очередь; id задачи в backend (None у ImmediateBackend)"""
+        return get_backend().enqueue(self, [(args, kwargs)])[0]
+
+    def enqueue_many(self, calls, delay=None):
+        """
+        Поставить пачку вызовов [(args, kwargs), ...] одной операцией backend
+        (один INSERT у DatabaseBackend); delay - секунд до выполнения
+        """
+        calls = [(tuple(args), dict(kwargs)) for args, kwargs in calls]
+        if not calls:
+            return []
+        return get_backend().enqueue(self, calls, delay=delay)
+
+
+def task(func=None, **options):
+    """Декоратор: @task или @task(queue=..., max_retries=..., retry_backoff=..., name=...)"""
+    if func is None:
+        return lambda func: task(func, **options)
+    instance = Task(func, **options)
+    if instance.name in _registry:
+        raise ValueError(f"Task {instance.name!r} is already registered")
+    _registry[instance.name] = instance
+    return instance
+
+
+def get_task(name):
+    """Task по имени; модуль задачи импортируется, если ещё не загружен"""
+    if name not in _registry:
+        try:
+            importlib.import_module(name.rpartition(".")[0])
+        except ImportError:
+            pass
+    try:
+        return _registry[name]
+    except KeyError:
+        raise LookupError(f"Unknown task {name!r}") from None
+
+
+def registered_tasks():
+    return dict(_registry)
+
+
+def autodiscover():
+    """Импортировать модули tasks всех приложений: воркер знает все задачи заранее"""
+    autodiscover_modules("tasks")
+    # Задачи самого apps.core (apps.core.tasks - пакет, а не модуль задач)
+    importlib.import_module("apps.core.mail")
+
+
+def get_backend():
+    global _backend
+    path = getattr(settings, "TASKS_BACKEND", "apps.core.tasks.backends.DatabaseBackend")
+    if _backend is None or _backend.path != path:
+        _backend = import_string(path)()
+        _backend.path = path
+    return _backend
@@ -0,0 +1,205 @@
+"""
+Backends фоновых задач (TASKS_BACKEND).
+
+Интерфейс: enqueue(task, calls, delay=None) -> список id,
+run_worker(queues, **options) - цикл воркера (manage.py run_worker).
+"""
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from apps.core import metrics
+
+from . import registered_tasks
+
+
+class ImmediateBackend:
+    """Выполняет задачу сразу в вызывающем потоке, без повторов (тесты, отладка)"""
+
+    def enqueue(self, task, calls, delay=None):
+        metrics.TASKS_ENQUEUED.labels(task.queue).inc(len(calls))
+        for args, kwargs in calls:
+            task.func(*args, **kwargs)
+        return [None] * len(calls)
+
+    def run_worker(self, queues, **options):
+        raise RuntimeError("ImmediateBackend runs tasks on enqueue, there is no worker")
+
+
+class DatabaseBackend:
+    """
+    Очередь в таблице core_queuedtask (apps.core.models.QueuedTask).
+
+    Воркер забирает пачку готовых задач SELECT ... FOR UPDATE SKIP LOCKED
+    (воркеры не ждут и не берут одни и те же строки), ставит им
+    locked_until = now + TASKS_LEASE и сразу фиксирует транзакцию: задача
+    выполняется без открытой транзакции и блокировок. Выполненная задача
+    удаляется, упавшая - откладывается (run_after) или помечается failed.
+    Задачу воркера, упавшего посреди выполнения, после истечения lease
+    возьмёт другой воркер - lease должен быть больше времени самой долгой задачи.
+    """
+
+    def __init__(self, using="default"):
+        self.using = using
+
+    @property
+    def model(self):
+        from apps.core.models import QueuedTask
+
+        return QueuedTask
+
+    @property
+    def lease(self):
+        return timedelta(seconds=getattr(settings, "TASKS_LEASE", 600))
+
+    def enqueue(self, task, calls, delay=None):
+        now = timezone.now()
+        run_after = now + timedelta(seconds=delay) if delay else now
+        records = [
+            self.model(
+                queue=task.queue,
+                name=task.name,
+                args=list(args),
+                kwargs=kwargs,
+                max_retries=task.max_retries,
+                enqueued_at=now,
+                run_after=run_after,
+            )
+            for args, kwargs in calls
+        ]
+        self.model._default_manager.using(self.using).bulk_create(records, batch_size=1000)
+        metrics.TASKS_ENQUEUED.labels(task.queue).inc(len(records))
+        return [record.pk for record in records]
+
+    def claim(self, queue, limit):
+        """Забрать до limit готовых задач queue (по run_after, id)"""
+        now = timezone.now()
+        manager = self.model._default_manager.using(self.using)
+        locked_until = now + self.lease
+        with transaction.atomic(using=self.using):
+            records = list(
+                manager.filter(queue=queue, status=self.model.QUEUED, run_after__lte=now)
+                .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+                .order_by("run_after", "id")
+                .select_for_update(skip_locked=True)[:limit]
+            )
+            if records:
+                manager.filter(id__in=[record.pk for record in records]).update(
+                    locked_until=locked_until, attempts=F("attempts") + 1
+                )
+        # Строки заблокированы до commit - значения после UPDATE известны
+        for record in records:
+            record.locked_until = locked_until
+            record.attempts += 1
+        return records
+
+    def complete(self, records):
+        """Удалить выполненные задачи"""
+        pks = [record.pk for record in records]
+        self.model._default_manager.using(self.using).filter(pk__in=pks).delete()
+
+    def retry(self, record, error, delay):
+        self.model._default_manager.using(self.using).filter(pk=record.pk).update(
+            run_after=timezone.now() + timedelta(seconds=delay), locked_until=None, last_error=error
+        )
+
+    def fail(self, record, error):
+        self.model._default_manager.using(self.using).filter(pk=record.pk).update(
+            status=self.model.FAILED, locked_until=None, last_error=error
+        )
+
+    def queue_depth(self):
+        """{queue: {"ready": n, "delayed": n, "running": n, "failed": n}}"""
+        now = timezone.now()
+        queued = Q(status=self.model.QUEUED)
+        free = Q(locked_until__isnull=True) | Q(locked_until__lt=now)
+        rows = (
+            self.model._default_manager.using(self.using)
+            .values("queue")
+            .annotate(
+                ready=Count("id", filter=queued & free & Q(run_after__lte=now)),
+                delayed=Count("id", filter=queued & free & Q(run_after__gt=now)),
+                running=Count("id", filter=queued & Q(locked_until__gte=now)),
+                failed=Count("id", filter=Q(status=self.model.FAILED)),
+            )
+            .order_by()
+        )
+        return {row.pop("queue"): row for row in rows}
+
+    def run_worker(self, queues, **options):
+        from .worker import Worker
+
+        Worker(self, queues, **options).run()
+
+
+class CeleryBackend:
+    """
+    Celery (requirements/celery.txt): брокер и параметры - настройки CELERY_*.
+    Задачи отправляются после commit текущей транзакции. run_worker запускает
+    celery worker для queues; concurrency - сумма значений queues (Celery
+    ограничивает параллельность на процесс, а не на очередь: для лимита на
+    очередь запускайте отдельный run_worker на каждую).
+    """
+
+    def __init__(self):
+        from celery import Celery
+
+        self.app = Celery("config")
+        self.app.config_from_object("django.conf:settings", namespace="CELERY")
+
+    def enqueue(self, task, calls, delay=None):
+        ids = [str(uuid.uuid4()) for _ in calls]
+
+        def send():
+            with self.app.producer_or_acquire() as producer:
+                for task_id, (args, kwargs) in zip(ids, calls, strict=True):
+                    self.app.send_task(
+                        task.name,
+                        args=args,
+                        kwargs=kwargs,
+                        queue=task.queue,
+                        task_id=task_id,
+                        countdown=delay,
+                        producer=producer,
+                    )
+            metrics.TASKS_ENQUEUED.labels(task.queue).inc(len(ids))
+
+        transaction.on_commit(send)
+        return ids
+
+    def register(self, task):
+        """Celery-задача, вызывающая task.func, с повторами по task.retry_delay"""
+
+        def run(celery_task, *args, **kwargs):
+            try:
+                return task.func(*args, **kwargs)
+            except Exception as exc:
+                attempt = celery_task.request.retries + 1
+                if attempt > task.max_retries:
+                    raise
+                raise celery_task.retry(
+                    exc=exc, countdown=task.retry_delay(attempt), max_retries=task.max_retries
+                ) from exc
+
+        run.__name__ = task.func.__name__
+        return self.app.task(name=task.name, bind=True, queue=task.queue)(run)
+
+    def run_worker(self, queues, loglevel="INFO", **options):
+        for task in registered_tasks().values():
+            self.register(task)
+        self.app.worker_main(
+            [
+                "worker",
+                "--queues",
+                ",".join(queues),
+                "--concurrency",
+                str(sum(queues.values())),
+                "--loglevel",
+                loglevel,
+            ]
+        )
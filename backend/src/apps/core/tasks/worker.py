@@ -0,0 +1,191 @@
+"""
+Воркер DatabaseBackend (manage.py run_worker).
+
+На каждую очередь - поток-опросчик и пул потоков размером с её
+concurrency: опросчик забирает задачи пачками (до TASKS_BATCH_SIZE, не больше
+свободных мест в пуле), а если готовых нет - ждёт TASKS_POLL_INTERVAL.
+Так медленная очередь не занимает места быстрой.
+
+Выполненные задачи удаляются одним запросом перед следующим claim: если
+воркер упадёт раньше, их после lease выполнят повторно (как и любую начатую
+задачу - доставка at-least-once). Основной поток раз в интервал обновляет
+метрику глубины очередей и ждёт SIGTERM/SIGINT: после сигнала новые задачи
+не забираются, начатые - дорабатывают.
+"""
+
+import logging
+import signal
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from apps.core import metrics
+
+from . import get_task
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    def __init__(self, backend, queues, batch_size=None, poll_interval=None, burst=False):
+        """
+        queues - {очередь: число параллельных задач}; burst - завершиться,
+        когда в очередях не останется готовых задач
+        """
+        self.backend = backend
+        self.queues = dict(queues)
+        self.batch_size = batch_size or getattr(settings, "TASKS_BATCH_SIZE", 10)
+        if poll_interval is None:
+            poll_interval = getattr(settings, "TASKS_POLL_INTERVAL", 1.0)
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.stopping = threading.Event()
+        # Выполненные задачи удаляются пачкой перед следующим claim (flush)
+        self.completed = []
+        self.completed_lock = threading.Lock()
+
+    def stop(self, *args):
+        if not self.stopping.is_set():
+            logger.info("Worker stopping, waiting for running tasks")
+        self.stopping.set()
+
+    def run(self):
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                handlers[signum] = signal.signal(signum, self.stop)
+        try:
+            self.serve()
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+
+    def serve(self):
+        pollers = [
+            threading.Thread(target=self.poll, args=(queue, concurrency), name=f"tasks-{queue}")
+            for queue, concurrency in self.queues.items()
+        ]
+        for poller in pollers:
+            poller.start()
+        logger.info("Worker started: %s", ", ".join(f"{q}={n}" for q, n in self.queues.items()))
+        while True:
+            self.refresh_depth()
+            alive = [poller for poller in pollers if poller.is_alive()]
+            if not alive:
+                break
+            alive[0].join(self.poll_interval)
+        self.flush()
+        close_old_connections()
+
+    def refresh_depth(self):
+        try:
+            metrics.observe_queue_depth(self.backend.queue_depth())
+        except Exception:
+            logger.exception("Task queue depth query failed")
+
+    def poll(self, queue, concurrency):
+        running = 0
+        idle = threading.Condition()
+
+        def done(future):
+            nonlocal running
+            if future.exception() is not None:
+                # Сбой записи результата: задачу снова возьмут после lease
+                logger.error("Task bookkeeping failed", exc_info=future.exception())
+            with idle:
+                running -= 1
+                idle.notify()
+
+        with ThreadPoolExecutor(concurrency, thread_name_prefix=f"tasks-{queue}") as executor:
+            while not self.stopping.is_set():
+                with idle:
+                    while running >= concurrency and not self.stopping.is_set():
+                        idle.wait(self.poll_interval)
+                    free = concurrency - running
+                if self.stopping.is_set():
+                    break
+                try:
+                    self.flush()
+                    records = self.backend.claim(queue, min(self.batch_size, free))
+                except Exception:
+                    logger.exception("Claiming tasks from queue %s failed", queue)
+                    close_old_connections()
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                if not records:
+                    if self.burst:
+                        with idle:
+                            if running == 0:
+                                break
+                            idle.wait()
+                        continue
+                    self.stopping.wait(self.poll_interval)
+                    continue
+                with idle:
+                    running += len(records)
+                for record in records:
+                    executor.submit(self.execute, record).add_done_callback(done)
+        self.flush()
+        close_old_connections()
+
+    def flush(self):
+        """Удалить выполненные задачи одним запросом"""
+        with self.completed_lock:
+            records, self.completed = self.completed, []
+        if records:
+            self.backend.complete(records)
+
+    def execute(self, record):
+        """Выполнить задачу и записать результат: удалить, отложить повтор или failed"""
+        queue = record.queue
+        try:
+            task = get_task(record.name)
+        except LookupError as exc:
+            self.backend.fail(record, str(exc))
+            metrics.TASKS_PROCESSED.labels(queue, record.name, "failed").inc()
+            logger.error("Unknown task %s (#%s)", record.name, record.pk)
+            return "failed"
+        # attempts увеличивается при каждом claim: больше попыток, чем
+        # разрешено, - задача раз за разом роняет воркер (lease истекал)
+        if record.attempts > record.max_retries + 1:
+            self.backend.fail(record, record.last_error or "Lease expired")
+            metrics.TASKS_PROCESSED.labels(queue, task.name, "failed").inc()
+            logger.error("Task %s (#%s) exceeded attempts", task.name, record.pk)
+            return "failed"
+
+        metrics.TASK_LATENCY.labels(queue).observe(
+            max(0.0, (timezone.now() - record.run_after).total_seconds())
+        )
+        start = time.perf_counter()
+        try:
+            task.func(*record.args, **record.kwargs)
+        except Exception:
+            error = traceback.format_exc()
+            if record.attempts > record.max_retries:
+                result = "failed"
+                self.backend.fail(record, error)
+                logger.exception("Task %s (#%s) failed", task.name, record.pk)
+            else:
+                result = "retry"
+                self.backend.retry(record, error, task.retry_delay(record.attempts))
+                logger.warning(
+                    "Task %s (#%s) attempt %s failed, will retry",
+                    task.name,
+                    record.pk,
+                    record.attempts,
+                    exc_info=True,
+                )
+        else:
+            result = "done"
+            with self.completed_lock:
+                self.completed.append(record)
+        finally:
+            metrics.TASK_DURATION.labels(queue, task.name).observe(time.perf_counter() - start)
+            close_old_connections()
+        metrics.TASKS_PROCESSED.labels(queue, task.name, result).inc()
+        return result
@@ -4,11 +4,13 @@ URL patterns for core app.
 
 from django.urls import path
 
-from . import health
+from . import health, metrics
 
 app_name = "core"
 
 urlpatterns = [
     path("health/", health.health_check, name="health"),
     path("readiness/", health.readiness_check, name="readiness"),
+    # Без слэша - путь по умолчанию для Prometheus scrape
+    path("metrics", metrics.metrics_view, name="metrics"),
 ]
@@ -0,0 +1,73 @@
+"""
+Версии данных моделей - дешёвые валидаторы для conditional GET (apps.api.conditional).
+
+Версия таблицы - время последнего изменения (time.time_ns()) в общем кэше
+VERSION_CACHE_ALIAS: одно обращение к кэшу вместо MAX(updated_at) и COUNT(*)
+по таблице. Меняется после commit транзакции с save()/delete() модели,
+зарегистрированной track(), и при явном bump() - после bulk_create()/update(),
+которые сигналов не шлют. Пропавший из кэша ключ - новая версия: клиенты
+один раз получат полный ответ.
+"""
+
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+KEY_TEMPLATE = "versions:{}"
+
+
+def get_version_cache():
+    return caches[getattr(settings, "VERSION_CACHE_ALIAS", "default")]
+
+
+def _key(model):
+    return KEY_TEMPLATE.format(model._meta.label_lower)
+
+
+def get_version(model):
+    """Текущая версия данных model (int, наносекунды)"""
+    cache = get_version_cache()
+    key = _key(model)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        # Параллельный запрос мог записать версию раньше - берём её
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump(model):
+    get_version_cache().set(_key(model), time.time_ns(), timeout=None)
+
+
+def bump_on_commit(model, using=None):
+    """
+    bump() после commit: иначе параллельный запрос успел бы отдать старые
+    данные с новой версией, и клиент закэшировал бы их под новым ETag
+    """
+    transaction.on_commit(partial(bump, model), using=using)
+
+
+def track(model, ignore_fields=()):
+    """
+    Менять версию model при save()/delete(). save(update_fields=...) только
+    по ignore_fields (например, last_login при входе) версию не меняет.
+    """
+    ignore_fields = frozenset(ignore_fields)
+
+    def saved(sender, update_fields=None, using=None, **kwargs):
+        if update_fields and ignore_fields.issuperset(update_fields):
+            return
+        bump_on_commit(sender, using)
+
+    def deleted(sender, using=None, **kwargs):
+        bump_on_commit(sender, using)
+
+    uid = f"versions:{model._meta.label_lower}"
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
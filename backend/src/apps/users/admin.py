@@ -16,7 +16,7 @@ class UserAdmin(BaseUserAdmin):
     list_display = ["email", "full_name", "is_active", "is_staff", "created_at"]
     list_filter = ["is_active", "is_staff", "is_superuser", "is_email_verified", "created_at"]
     search_fields = ["email", "full_name", "username"]
-    ordering = ["-created_at"]
+    ordering = ["-created_at", "-id"]
 
     fieldsets = (
         (None, {"fields": ("email", "password")}),
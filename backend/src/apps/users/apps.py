@@ -11,3 +11,11 @@ class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.users"
     verbose_name = "Пользователи"
+
+    def ready(self):
+        from apps.core import versions
+
+        from . import signals  # noqa: F401
+
+        # Версия для ETag списков пользователей (apps.api); вход меняет только last_login
+        versions.track(self.get_model("User"), ignore_fields={"last_login"})
@@ -0,0 +1,74 @@
+"""
+Authentication backend с кэшированием пользователя для request.user.
+
+ModelBackend.get_user на каждый аутентифицированный запрос делает
+SELECT всех колонок users_user (включая password, full_name, timestamps).
+CachedModelBackend хранит в кэше компактный снимок: поля, нужные для
+проверок доступа, и готовый session auth hash. При попадании request.user
+получается без запросов к БД, остальные колонки - deferred и загрузятся
+только при обращении к ним.
+
+Session auth hash в снимке сравнивается Django с hash из сессии: после смены
+пароля снимок со старым hash не подтвердит ни одну новую сессию, а сам снимок
+удаляется сигналом (apps.users.signals).
+
+    AUTHENTICATION_BACKENDS = ["apps.users.backends.CachedModelBackend"]
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+# Поля снимка: всё, что читают AuthenticationMiddleware, permissions и admin
+SNAPSHOT_FIELDS = ("id", "email", "username", "is_active", "is_staff", "is_superuser")
+CACHE_KEY = "users:auth:{}"
+
+
+def get_user_cache():
+    return caches[getattr(settings, "AUTH_USER_CACHE_ALIAS", "default")]
+
+
+def user_cache_key(user_id):
+    return CACHE_KEY.format(user_id)
+
+
+def invalidate_user(user_id):
+    get_user_cache().delete(user_cache_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def _from_snapshot(self, snapshot):
+        fields, session_auth_hash = snapshot
+        UserModel = get_user_model()
+        # from_db ждёт значения в порядке concrete_fields модели
+        names = [f.attname for f in UserModel._meta.concrete_fields if f.attname in fields]
+        user = UserModel.from_db(DEFAULT_DB_ALIAS, names, [fields[name] for name in names])
+        user._session_auth_hash = session_auth_hash
+        return user
+
+    def get_user(self, user_id):
+        cache = get_user_cache()
+        key = user_cache_key(user_id)
+        snapshot = cache.get(key)
+        if snapshot is not None:
+            user = self._from_snapshot(snapshot)
+            return user if self.user_can_authenticate(user) else None
+
+        UserModel = get_user_model()
+        try:
+            # password нужен один раз - посчитать session auth hash для снимка
+            user = UserModel._default_manager.only(*SNAPSHOT_FIELDS, "password").get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+        snapshot = (
+            {field: getattr(user, field) for field in SNAPSHOT_FIELDS},
+            user.get_session_auth_hash(),
+        )
+        cache.set(key, snapshot, getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300))
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        return await sync_to_async(self.get_user)(user_id)
@@ -0,0 +1,67 @@
+"""
+Password hashers с параметрами из settings.
+
+Алгоритмы те же, что у Django (scrypt, argon2) - хеши совместимы. Параметры
+читаются из settings при каждом хешировании, поэтому их изменение
+(PASSWORD_SCRYPT_* / PASSWORD_ARGON2_*) без правки кода приводит к
+must_update() и пересчёту хеша при следующем входе (apps.users.passwords).
+
+Argon2 требует argon2-cffi (requirements/argon2.txt), scrypt - только hashlib.
+"""
+
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _setting("PASSWORD_SCRYPT_WORK_FACTOR", 2**14)
+
+    @property
+    def block_size(self):
+        return _setting("PASSWORD_SCRYPT_BLOCK_SIZE", 8)
+
+    @property
+    def parallelism(self):
+        return _setting("PASSWORD_SCRYPT_PARALLELISM", 5)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            # Лимит OpenSSL по умолчанию (32MB) меньше, чем нужно при n >= 2**15:
+            # считаем по параметрам конкретного хеша, а не по текущим settings
+            maxmem=128 * r * (n + p + 2) + 2**20,
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode("ascii").strip()
+        return f"{self.algorithm}${n}${salt}${r}${p}${hash_}"
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    @property
+    def time_cost(self):
+        return _setting("PASSWORD_ARGON2_TIME_COST", 2)
+
+    @property
+    def memory_cost(self):
+        return _setting("PASSWORD_ARGON2_MEMORY_COST", 102400)
+
+    @property
+    def parallelism(self):
+        return _setting("PASSWORD_ARGON2_PARALLELISM", 8)
@@ -0,0 +1,155 @@
+"""
+Массовый импорт пользователей из CSV/JSONL.
+
+    python manage.py import_users users.csv
+    python manage.py import_users users.jsonl --batch-size 2000 --workers 4
+    cat users.jsonl | python manage.py import_users - --format jsonl --dry-run
+
+Колонки/ключи: email (обязательно), password или password_hash, full_name,
+first_name, last_name, is_active, is_email_verified. Файл читается потоково,
+создание - через UserManager.bulk_create_users.
+"""
+
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_FIELDS = frozenset(
+    {
+        "email",
+        "password",
+        "password_hash",
+        "full_name",
+        "first_name",
+        "last_name",
+        "is_active",
+        "is_email_verified",
+    }
+)
+BOOLEAN_FIELDS = frozenset({"is_active", "is_email_verified"})
+JSONL_SUFFIXES = {".jsonl", ".ndjson"}
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in {"1", "true", "yes", "y", "t"}
+
+
+def clean_row(row):
+    """Оставить известные поля; пустые значения CSV - как отсутствующие"""
+    cleaned = {}
+    for key, value in row.items():
+        if key not in IMPORT_FIELDS or value is None or value == "":
+            continue
+        cleaned[key] = parse_bool(value) if key in BOOLEAN_FIELDS else value
+    return cleaned
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    unknown = set(reader.fieldnames or ()) - IMPORT_FIELDS
+    if "email" not in (reader.fieldnames or ()):
+        raise CommandError("CSV header must contain an 'email' column")
+    if unknown:
+        raise CommandError(f"Unknown CSV columns: {', '.join(sorted(unknown))}")
+    for row in reader:
+        yield clean_row(row)
+
+
+def read_jsonl(stream):
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            raise CommandError(f"Line {line_number}: invalid JSON ({exc})") from exc
+        if not isinstance(row, dict):
+            raise CommandError(f"Line {line_number}: expected a JSON object")
+        yield clean_row(row)
+
+
+class Command(BaseCommand):
+    help = "Bulk import users from a CSV or JSONL file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV/JSONL file, '-' for stdin")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: by file extension, csv for stdin)",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Password hashing processes (default: CPU count, 0 - in-process)",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Validate rows without creating users"
+        )
+        parser.add_argument("--errors", help="Write rejected rows to this CSV file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"]
+        if input_format is None:
+            input_format = "jsonl" if Path(path).suffix.lower() in JSONL_SUFFIXES else "csv"
+        reader = read_jsonl if input_format == "jsonl" else read_csv
+
+        if path == "-":
+            stream = sys.stdin
+        else:
+            try:
+                stream = open(path, newline="", encoding="utf-8")
+            except OSError as exc:
+                raise CommandError(f"Cannot open {path}: {exc}") from exc
+
+        started_at = time.monotonic()
+        reported_errors = 0
+
+        def progress(result):
+            nonlocal reported_errors
+            for row_number, email, message in result.errors[reported_errors:]:
+                self.stderr.write(f"row {row_number} {email!r}: {message}")
+            reported_errors = len(result.errors)
+            elapsed = max(time.monotonic() - started_at, 1e-3)
+            self.stdout.write(
+                f"{result.processed} rows, {result.created} created, "
+                f"{len(result.errors)} rejected ({result.processed / elapsed:.0f} rows/s)"
+            )
+
+        try:
+            result = get_user_model().objects.bulk_create_users(
+                reader(stream),
+                batch_size=options["batch_size"],
+                hash_workers=options["workers"],
+                dry_run=options["dry_run"],
+                progress=progress,
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if options["errors"] and result.errors:
+            with open(options["errors"], "w", newline="", encoding="utf-8") as errors_file:
+                writer = csv.writer(errors_file)
+                writer.writerow(["row", "email", "error"])
+                writer.writerows(result.errors)
+
+        elapsed = time.monotonic() - started_at
+        verb = "would be created" if options["dry_run"] else "created"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{result.created} users {verb}, {len(result.errors)} rejected, "
+                f"{result.processed} rows in {elapsed:.1f}s"
+            )
+        )
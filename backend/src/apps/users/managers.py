@@ -2,7 +2,17 @@
 Custom managers for User model.
 """
 
+import os
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
 from django.contrib.auth.models import UserManager as BaseUserManager
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DataError, IntegrityError, transaction
+
+from apps.core import versions
 
 
 class UserManager(BaseUserManager):
@@ -30,3 +40,189 @@ class UserManager(BaseUserManager):
             raise ValueError("Superuser must have is_superuser=True.")
 
         return self.create_user(email, password, **extra_fields)
+
+    def bulk_create_users(
+        self,
+        rows,
+        batch_size=1000,
+        hash_workers=None,
+        dry_run=False,
+        progress=None,
+    ):
+        """
+        Массовое создание пользователей без save() и хеширования на каждую строку.
+
+        rows - iterable словарей (читается потоково, по batch_size строк):
+        email, password или password_hash (уже захешированный make_password),
+        остальные ключи - поля модели (full_name, is_active, ...).
+
+        - username генерируются пачкой, пароли хешируются в пуле из
+          hash_workers процессов (None - по числу CPU, 0/1 - в текущем процессе)
+        - пачка вставляется одним bulk_create; при конфликте (гонка с другим
+          созданием) пачка повторяется построчно
+        - ошибки по строкам (пустой/некорректный email, дубликат email или
+          username, значение длиннее max_length) попадают в result.errors и не
+          прерывают импорт
+        - dry_run: только проверки, без хеширования и записи
+        - progress(result) вызывается после каждой пачки
+        """
+        result = BulkCreateResult()
+        seen = set()
+        executor = None
+        if hash_workers is None:
+            hash_workers = os.cpu_count() or 1
+        if not dry_run and hash_workers > 1:
+            # multiprocessing импортируется только для импорта пользователей
+            from concurrent.futures import ProcessPoolExecutor
+
+            # initializer нужен для spawn (macOS); при fork Django уже настроен
+            executor = ProcessPoolExecutor(max_workers=hash_workers, initializer=django.setup)
+        try:
+            for chunk in _chunks(enumerate(rows, start=1), batch_size):
+                users = self._prepare_users(chunk, seen, result)
+                if not dry_run:
+                    self._hash_passwords(users, executor, hash_workers)
+                    self._insert_users(users, batch_size, result)
+                else:
+                    result.created += len(users)
+                result.processed += len(chunk)
+                if progress is not None:
+                    progress(result)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return result
+
+    def _prepare_users(self, chunk, seen, result):
+        """Проверить email и поля, собрать экземпляры модели (без паролей)"""
+        from .models import generate_username
+
+        candidates = []
+        for row_number, row in chunk:
+            row = dict(row)
+            email = self.normalize_email(row.pop("email", "") or "").strip()
+            try:
+                validate_email(email)
+            except ValidationError:
+                result.add_error(row_number, email, "invalid email")
+                continue
+            if email in seen:
+                result.add_error(row_number, email, "duplicate email in input")
+                continue
+            seen.add(email)
+            candidates.append((row_number, email, row))
+
+        existing = set(
+            self.filter(email__in=[email for _, email, _ in candidates]).values_list(
+                "email", flat=True
+            )
+        )
+        # Один вызов urandom на пачку вместо uuid4() на строку
+        suffixes = os.urandom(6 * len(candidates)).hex()
+        users = []
+        for i, (row_number, email, row) in enumerate(candidates):
+            if email in existing:
+                result.add_error(row_number, email, "email already exists")
+                continue
+            # Пустая строка (CSV) - пароль не задан, а не пустой пароль
+            password = row.pop("password", None) or None
+            password_hash = row.pop("password_hash", None)
+            if password_hash and not _is_password_hash(password_hash):
+                result.add_error(row_number, email, "unknown password_hash format")
+                continue
+            user = self.model(email=email, **row)
+            user.username = user.username or generate_username(
+                email, suffixes[i * 12 : i * 12 + 12]
+            )
+            if password_hash:
+                user.password = password_hash
+            try:
+                # max_length, choices, типы - иначе DataError на вставке всей пачки
+                user.clean_fields(exclude=["password", "email"])
+            except ValidationError as exc:
+                result.add_error(row_number, email, _describe(exc))
+                continue
+            users.append((row_number, user, password if not password_hash else _PREHASHED))
+        return users
+
+    def _hash_passwords(self, users, executor, workers):
+        pending = [(user, password) for _, user, password in users if password is not _PREHASHED]
+        passwords = [password for _, password in pending]
+        if executor is not None and len(passwords) > 1:
+            chunksize = max(1, len(passwords) // (workers * 4))
+            hashed = executor.map(make_password, passwords, chunksize=chunksize)
+        else:
+            hashed = map(make_password, passwords)
+        # make_password(None) - unusable password, как в create_user без пароля
+        for (user, _), password_hash in zip(pending, hashed, strict=True):
+            user.password = password_hash
+
+    def _insert_users(self, users, batch_size, result):
+        try:
+            with transaction.atomic(using=self.db):
+                self.bulk_create([user for _, user, _ in users], batch_size=batch_size)
+            # bulk_create не шлёт post_save - версию списка пользователей меняем сами
+            versions.bump_on_commit(self.model, self.db)
+            result.created += len(users)
+            return
+        except (IntegrityError, DataError):
+            pass
+        # Кто-то создал те же email/username параллельно (или строку отверг сам
+        # сервер БД) - построчно, с ошибкой на строку
+        for row_number, user, _ in users:
+            try:
+                with transaction.atomic(using=self.db):
+                    user.save(force_insert=True, using=self.db)
+                result.created += 1
+            except (IntegrityError, DataError) as exc:
+                user.pk = None
+                result.add_error(row_number, user.email, self._insert_error(user, exc))
+
+    def _insert_error(self, user, exc):
+        """Какое ограничение нарушила строка: тексты ошибок у СУБД разные - проверяем запросом"""
+        if isinstance(exc, IntegrityError):
+            if self.filter(email=user.email).exists():
+                return "email already exists"
+            if user.username and self.filter(username=user.username).exists():
+                return "username already exists"
+        return str(exc).strip().splitlines()[0]
+
+
+class BulkCreateResult:
+    """Итог UserManager.bulk_create_users"""
+
+    __slots__ = ("processed", "created", "errors")
+
+    def __init__(self):
+        self.processed = 0
+        self.created = 0
+        # (номер строки с 1, email, сообщение)
+        self.errors = []
+
+    def add_error(self, row_number, email, message):
+        self.errors.append((row_number, email, message))
+
+
+def _describe(exc):
+    """ValidationError -> "поле: сообщение; ..." для result.errors"""
+    return "; ".join(
+        f"{field}: {' '.join(messages)}" for field, messages in exc.message_dict.items()
+    )
+
+
+# Маркер строки с готовым password_hash
+_PREHASHED = object()
+
+
+def _is_password_hash(value):
+    try:
+        identify_hasher(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
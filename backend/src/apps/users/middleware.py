@@ -0,0 +1,21 @@
+"""
+Middleware приложения users.
+"""
+
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from apps.core.async_middleware import InlineAsyncMixin
+
+from .passwords import PasswordHashingBusy
+
+
+class PasswordHashingBusyMiddleware(InlineAsyncMixin, MiddlewareMixin):
+    """Все слоты хеширования паролей заняты - 503 с Retry-After вместо 500"""
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, PasswordHashingBusy):
+            response = HttpResponse("Too many concurrent logins, retry later", status=503)
+            response["Retry-After"] = "1"
+            return response
+        return None
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:21
+
+from django.db import migrations, models
+
+import apps.users.managers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("users", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="user",
+            options={
+                "ordering": ["-created_at", "-id"],
+                "verbose_name": "Пользователь",
+                "verbose_name_plural": "Пользователи",
+            },
+        ),
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", apps.users.managers.UserManager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(fields=["-created_at", "-id"], name="users_user_created_id_idx"),
+        ),
+    ]
@@ -4,12 +4,27 @@ Custom User model with email as primary identifier.
 
 import uuid
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 
+from . import passwords
 from .managers import UserManager
 
 
+def generate_username(email, suffix):
+    """Username из локальной части email (или "user") и уникального суффикса"""
+    if email:
+        base_username = email.split("@")[0]
+        # Очищаем от недопустимых символов
+        base_username = "".join(c for c in base_username if c.isalnum() or c in "._-")
+        # Ограничиваем длину
+        base_username = base_username[:50]
+    else:
+        base_username = "user"
+    return f"{base_username}_{suffix}"
+
+
 class User(AbstractUser):
     """
     Кастомная User модель с email как primary identifier.
@@ -38,10 +53,12 @@ class User(AbstractUser):
     class Meta:
         verbose_name = "Пользователь"
         verbose_name_plural = "Пользователи"
-        ordering = ["-created_at"]
+        # id - tie-breaker: порядок однозначен, keyset пагинация по (created_at, id)
+        ordering = ["-created_at", "-id"]
         indexes = [
-            models.Index(fields=["email"]),
-            models.Index(fields=["username"]),
+            models.Index(fields=["email"], name="users_user_email_idx"),
+            models.Index(fields=["username"], name="users_user_username_idx"),
+            models.Index(fields=["-created_at", "-id"], name="users_user_created_id_idx"),
         ]
 
     def __str__(self):
@@ -50,18 +67,35 @@ class User(AbstractUser):
     def save(self, *args, **kwargs):
         """Автогенерация username, если не задан"""
         if not self.username:
-            # Генерируем уникальный username на основе email или UUID
-            if self.email:
-                base_username = self.email.split("@")[0]
-                # Очищаем от недопустимых символов
-                base_username = "".join(c for c in base_username if c.isalnum() or c in "._-")
-                # Ограничиваем длину
-                base_username = base_username[:50]
-            else:
-                base_username = "user"
-
-            # Добавляем UUID для уникальности
-            unique_suffix = uuid.uuid4().hex[:12]
-            self.username = f"{base_username}_{unique_suffix}"
+            # Добавляем случайный суффикс для уникальности
+            self.username = generate_username(self.email, uuid.uuid4().hex[:12])
 
         super().save(*args, **kwargs)
+
+    def get_session_auth_hash(self):
+        """
+        Снимок из кэша (apps.users.backends) несёт готовый hash без загрузки
+        password. После set_password() hash считается заново.
+        """
+        cached = self.__dict__.get("_session_auth_hash")
+        if cached is not None and "password" not in self.__dict__:
+            return cached
+        return super().get_session_auth_hash()
+
+    def get_session_auth_fallback_hash(self):
+        yield from super().get_session_auth_fallback_hash()
+        # Сессия, открытая до фонового rehash пароля (apps.users.passwords)
+        previous = passwords.get_rehash_fallback(self)
+        if previous is not None:
+            yield previous
+
+    def set_password(self, raw_password):
+        with passwords.hashing_slot():
+            super().set_password(raw_password)
+
+    def check_password(self, raw_password):
+        """Проверка в слоте хеширования, устаревший хеш обновляется в фоне"""
+        return passwords.check_password(self, raw_password)
+
+    async def acheck_password(self, raw_password):
+        return await sync_to_async(self.check_password, thread_sensitive=False)(raw_password)
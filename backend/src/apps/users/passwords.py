@@ -0,0 +1,203 @@
+"""
+Проверка паролей: ограничение параллельных хеширований и фоновый rehash.
+
+- Хеширование (check_password, set_password) занимает слот из
+  PASSWORD_HASH_CONCURRENCY на процесс воркера. Остальные ждут слот до
+  PASSWORD_HASH_TIMEOUT секунд и получают PasswordHashingBusy (503) -
+  шторм логинов не съедает CPU всех потоков воркера.
+- Хеш, который нужно обновить (сменился алгоритм или параметры hasher),
+  не пересчитывается в запросе логина: задача уходит в ограниченную
+  очередь фонового потока (PASSWORD_REHASH_BACKGROUND).
+- Rehash меняет session auth hash. Чтобы сессии, открытые до него, не
+  разлогинились, старый hash остаётся fallback-значением в кэше
+  (User.get_session_auth_fallback_hash): Django обновит hash в сессии.
+- User.acheck_password выполняет проверку в пуле потоков, не блокируя
+  event loop под ASGI.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password as django_check_password
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.utils.crypto import salted_hmac
+
+from apps.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Как в AbstractBaseUser._get_session_auth_hash
+SESSION_AUTH_KEY_SALT = "django.contrib.auth.models.AbstractBaseUser.get_session_auth_hash"
+PREVIOUS_HASH_KEY = "users:rehashed:{}"
+
+
+class PasswordHashingBusy(Exception):
+    """Все слоты хеширования заняты дольше PASSWORD_HASH_TIMEOUT"""
+
+
+# hashing_slot(timeout=WAIT_FOREVER): ждать слот без таймаута. Не -1: у
+# Semaphore.acquire(timeout=-1) это "не ждать", а не "ждать бесконечно"
+WAIT_FOREVER = object()
+
+_slots = (None, None)
+_slots_lock = threading.Lock()
+
+
+def _get_slots():
+    global _slots
+    limit = getattr(settings, "PASSWORD_HASH_CONCURRENCY", 2)
+    if _slots[0] != limit:
+        with _slots_lock:
+            if _slots[0] != limit:
+                _slots = (limit, threading.BoundedSemaphore(limit))
+    return _slots[1]
+
+
+@contextmanager
+def hashing_slot(timeout=None):
+    """
+    Занять слот хеширования; timeout=None - PASSWORD_HASH_TIMEOUT,
+    WAIT_FOREVER - без таймаута
+    """
+    if timeout is None:
+        timeout = getattr(settings, "PASSWORD_HASH_TIMEOUT", 5)
+    slots = _get_slots()
+    if timeout is WAIT_FOREVER:
+        slots.acquire()
+    elif not slots.acquire(timeout=timeout):
+        metrics.PASSWORD_HASHES.labels("busy").inc()
+        raise PasswordHashingBusy
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        slots.release()
+        metrics.PASSWORD_HASHES.labels("ok").inc()
+        metrics.PASSWORD_HASH_DURATION.observe(time.perf_counter() - started_at)
+
+
+def session_auth_hash(encoded):
+    return salted_hmac(SESSION_AUTH_KEY_SALT, encoded, algorithm="sha256").hexdigest()
+
+
+def check_password(user, raw_password):
+    """AbstractBaseUser.check_password со слотом и отложенным rehash"""
+    encoded = user.password
+    must_update = []
+
+    with hashing_slot():
+        valid = django_check_password(raw_password, encoded, must_update.append)
+    # После освобождения слота: inline rehash (без фоновой очереди) займёт его снова
+    if must_update:
+        schedule_rehash(type(user), user.pk, encoded, raw_password)
+    return valid
+
+
+def rehash(user_model, user_id, encoded, raw_password):
+    """Пересчитать хеш текущими параметрами, если пароль не меняли с момента проверки"""
+    # apps.users.backends вызывает get_user_model() при импорте - не на уровне модуля
+    from .backends import get_user_cache, invalidate_user
+
+    # Фоновый rehash тоже занимает слот, но ждёт без таймаута
+    with hashing_slot(timeout=WAIT_FOREVER):
+        new_encoded = make_password(raw_password)
+    updated = user_model._default_manager.filter(pk=user_id, password=encoded).update(
+        password=new_encoded
+    )
+    if not updated:
+        metrics.PASSWORD_REHASHES.labels("skipped").inc()
+        return False
+    # Сессии со старым hash принимаются, пока текущий хеш - результат этого rehash
+    get_user_cache().set(
+        PREVIOUS_HASH_KEY.format(user_id),
+        (session_auth_hash(encoded), session_auth_hash(new_encoded)),
+        settings.SESSION_COOKIE_AGE,
+    )
+    invalidate_user(user_id)
+    metrics.PASSWORD_REHASHES.labels("done").inc()
+    return True
+
+
+def get_rehash_fallback(user):
+    """Session auth hash до rehash, если текущий пароль - результат rehash"""
+    from .backends import get_user_cache
+
+    entry = get_user_cache().get(PREVIOUS_HASH_KEY.format(user.pk))
+    if entry is None:
+        return None
+    previous, current = entry
+    return previous if current == user.get_session_auth_hash() else None
+
+
+class RehashQueue:
+    """Ограниченная очередь rehash с фоновым потоком (стартует лениво, в каждом процессе)"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self._worker_pid = None
+
+    def _ensure_worker(self):
+        # После fork (gunicorn preload) поток родителя в воркере не существует
+        if self._worker_pid == os.getpid():
+            return
+        with self._lock:
+            if self._worker_pid == os.getpid():
+                return
+            if self._worker_pid is not None:
+                self._queue = queue.Queue(maxsize=self.maxsize)
+            threading.Thread(
+                target=self._run, name="password-rehash", args=(self._queue,), daemon=True
+            ).start()
+            self._worker_pid = os.getpid()
+
+    def put(self, job):
+        """False, если очередь полна - rehash повторится при следующем входе"""
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            metrics.PASSWORD_REHASHES.labels("dropped").inc()
+            return False
+        return True
+
+    def join(self):
+        self._queue.join()
+
+    def _run(self, jobs):
+        while True:
+            job = jobs.get()
+            try:
+                rehash(*job)
+            except Exception:
+                logger.exception("Password rehash failed")
+            finally:
+                # Соединение этого потока не переживает задачу
+                connection.close()
+                jobs.task_done()
+
+
+_rehash_queue = None
+
+
+def get_rehash_queue():
+    global _rehash_queue
+    if _rehash_queue is None:
+        _rehash_queue = RehashQueue(getattr(settings, "PASSWORD_REHASH_QUEUE_SIZE", 1000))
+    return _rehash_queue
+
+
+def schedule_rehash(user_model, user_id, encoded, raw_password):
+    if user_id is None:
+        return
+    if getattr(settings, "PASSWORD_REHASH_BACKGROUND", True):
+        get_rehash_queue().put((user_model, user_id, encoded, raw_password))
+    else:
+        rehash(user_model, user_id, encoded, raw_password)
@@ -0,0 +1,31 @@
+"""
+Инвалидация снимка пользователя в кэше (apps.users.backends).
+
+Снимок удаляется после commit: удалённый внутри транзакции, он успел бы
+вернуться в кэш со старыми данными из параллельного запроса до commit.
+"""
+
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .backends import SNAPSHOT_FIELDS, invalidate_user
+
+# Изменение этих полей меняет снимок или session auth hash
+SNAPSHOT_SOURCE_FIELDS = frozenset(SNAPSHOT_FIELDS) | {"password"}
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # save(update_fields=["last_login"]) при каждом login снимок не меняет
+    if created or (update_fields and not SNAPSHOT_SOURCE_FIELDS.intersection(update_fields)):
+        return
+    transaction.on_commit(partial(invalidate_user, instance.pk), using=kwargs["using"])
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def user_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(invalidate_user, instance.pk), using=kwargs["using"])
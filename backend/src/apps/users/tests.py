@@ -2,9 +2,26 @@
 Tests for users app.
 """
 
-from django.contrib.auth import get_user_model
-from django.db import IntegrityError
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import DataError, IntegrityError, transaction
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from apps.core.sessions import SessionStore
+
+from . import passwords
+from .backends import user_cache_key
+from .middleware import PasswordHashingBusyMiddleware
 
 
 class UserModelTestCase(TestCase):
@@ -42,3 +59,313 @@ class UserModelTestCase(TestCase):
         self.User.objects.create_user(email="unique@example.com", password="testpass123")
         with self.assertRaises(IntegrityError):
             self.User.objects.create_user(email="unique@example.com", password="testpass123")
+
+
+class CachedModelBackendTestCase(TestCase):
+    """Tests for request.user resolved from the cached user snapshot"""
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.user = get_user_model().objects.create_user(
+            email="cached@example.com", password="testpass123", full_name="Cached User"
+        )
+        client = Client()
+        client.force_login(self.user)
+        self.session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def get_user(self):
+        request = RequestFactory().get("/")
+        request.session = SessionStore(self.session_key)
+        return get_user(request)
+
+    def test_cache_hit_without_queries(self):
+        """Test a cached snapshot resolves request.user with zero queries"""
+        self.assertEqual(self.get_user(), self.user)
+        with self.assertNumQueries(0):
+            user = self.get_user()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(user.email, "cached@example.com")
+        self.assertTrue(user.is_authenticated)
+        self.assertIn("full_name", user.get_deferred_fields())
+        self.assertIn("password", user.get_deferred_fields())
+        # Deferred колонка загружается при обращении
+        self.assertEqual(user.full_name, "Cached User")
+
+    def test_password_change_invalidates(self):
+        """Test changing the password logs out existing sessions"""
+        self.get_user()
+        self.user.set_password("newpass456")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_deactivation_invalidates(self):
+        """Test deactivated users are not resolved from a stale snapshot"""
+        self.get_user()
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertFalse(self.get_user().is_authenticated)
+
+    def test_invalidated_after_commit(self):
+        """Test the snapshot is dropped only after the transaction commits"""
+        self.get_user()
+        key = user_cache_key(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.user.is_active = False
+                self.user.save()
+                self.assertIsNotNone(caches["shared"].get(key))
+            # Вложенный atomic - savepoint, commit ещё не было
+            self.assertIsNotNone(caches["shared"].get(key))
+        self.assertIsNone(caches["shared"].get(key))
+
+    def test_rollback_keeps_snapshot(self):
+        """Test a rolled back change does not drop the snapshot"""
+        self.get_user()
+        key = user_cache_key(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True), self.assertRaises(DataError):
+            with transaction.atomic():
+                self.user.delete()
+                raise DataError("rollback")
+        self.assertIsNotNone(caches["shared"].get(key))
+
+    def test_last_login_keeps_snapshot(self):
+        """Test updating last_login on login does not drop the snapshot"""
+        self.get_user()
+        self.user.save(update_fields=["last_login"])
+        self.assertIsNotNone(caches["shared"].get(user_cache_key(self.user.pk)))
+
+    def test_set_password_on_snapshot(self):
+        """Test the session hash is recomputed after set_password on a cached user"""
+        self.get_user()
+        user = self.get_user()
+        old_hash = user.get_session_auth_hash()
+        user.set_password("newpass456")
+        self.assertNotEqual(user.get_session_auth_hash(), old_hash)
+
+
+class BulkCreateUsersTestCase(TestCase):
+    """Tests for UserManager.bulk_create_users and import_users"""
+
+    def setUp(self):
+        self.User = get_user_model()
+        self.User.objects.create_user(email="existing@example.com", password="testpass123")
+
+    def test_bulk_create(self):
+        """Test users are created with hashed passwords and generated usernames"""
+        rows = [
+            {"email": f"user{i}@example.com", "password": f"pass{i}", "full_name": f"User {i}"}
+            for i in range(5)
+        ]
+        with self.assertNumQueries(4):
+            # SELECT существующих email на пачку + SAVEPOINT/INSERT/RELEASE
+            result = self.User.objects.bulk_create_users(rows, batch_size=10, hash_workers=0)
+
+        self.assertEqual((result.processed, result.created, result.errors), (5, 5, []))
+        user = self.User.objects.get(email="user3@example.com")
+        self.assertTrue(user.check_password("pass3"))
+        self.assertEqual(user.full_name, "User 3")
+        self.assertTrue(user.username.startswith("user3_"))
+        self.assertEqual(self.User.objects.values("username").distinct().count(), 6)
+
+    def test_row_errors_do_not_abort(self):
+        """Test invalid and duplicate emails are reported per row"""
+        rows = [
+            {"email": "new@example.com"},
+            {"email": "not-an-email"},
+            {"email": "existing@example.com"},
+            {"email": "new@example.com"},
+            {"email": "late@example.com", "password_hash": "garbage"},
+            {"email": "hashed@example.com", "password_hash": make_password("secret")},
+        ]
+        result = self.User.objects.bulk_create_users(rows, batch_size=2, hash_workers=0)
+
+        self.assertEqual(result.created, 2)
+        self.assertEqual(
+            sorted(result.errors),
+            [
+                (2, "not-an-email", "invalid email"),
+                (3, "existing@example.com", "email already exists"),
+                (4, "new@example.com", "duplicate email in input"),
+                (5, "late@example.com", "unknown password_hash format"),
+            ],
+        )
+        self.assertFalse(self.User.objects.get(email="new@example.com").has_usable_password())
+        self.assertTrue(self.User.objects.get(email="hashed@example.com").check_password("secret"))
+
+    def test_field_and_constraint_errors(self):
+        """Test over-long fields and username collisions are reported per row with the real cause"""
+        existing = self.User.objects.get(email="existing@example.com")
+        rows = [
+            {"email": "long@example.com", "full_name": "x" * 300},
+            {"email": "taken@example.com", "username": existing.username},
+            {"email": "longname@example.com", "username": "u" * 200},
+            {"email": "ok@example.com", "full_name": "Ok"},
+        ]
+        result = self.User.objects.bulk_create_users(rows, hash_workers=0)
+
+        self.assertEqual(result.created, 1)
+        errors = {email: message for _, email, message in result.errors}
+        self.assertEqual(errors["taken@example.com"], "username already exists")
+        self.assertTrue(errors["long@example.com"].startswith("full_name: "))
+        self.assertIn("255", errors["long@example.com"])
+        self.assertTrue(errors["longname@example.com"].startswith("username: "))
+        self.assertTrue(self.User.objects.filter(email="ok@example.com").exists())
+
+    def test_data_error_rejects_row(self):
+        """Test a DataError from the database rejects only its row"""
+        original_save = self.User.save
+
+        def save(user, *args, **kwargs):
+            if user.email == "bad@example.com":
+                raise DataError("value too long for type character varying(255)\n")
+            return original_save(user, *args, **kwargs)
+
+        rows = [{"email": "bad@example.com"}, {"email": "good@example.com"}]
+        with (
+            mock.patch.object(
+                type(self.User.objects), "bulk_create", side_effect=DataError("batch")
+            ),
+            mock.patch.object(self.User, "save", save),
+        ):
+            result = self.User.objects.bulk_create_users(rows, hash_workers=0)
+        self.assertEqual(result.created, 1)
+        self.assertEqual(
+            result.errors,
+            [(1, "bad@example.com", "value too long for type character varying(255)")],
+        )
+
+    def test_process_pool_hashing(self):
+        """Test passwords hashed in worker processes are valid"""
+        rows = [{"email": f"pool{i}@example.com", "password": f"pass{i}"} for i in range(4)]
+        result = self.User.objects.bulk_create_users(rows, hash_workers=2)
+        self.assertEqual(result.created, 4)
+        self.assertTrue(self.User.objects.get(email="pool2@example.com").check_password("pass2"))
+
+    def test_dry_run(self):
+        """Test dry run validates without creating users"""
+        rows = [{"email": "dry@example.com"}, {"email": "existing@example.com"}]
+        result = self.User.objects.bulk_create_users(rows, dry_run=True)
+        self.assertEqual((result.created, len(result.errors)), (1, 1))
+        self.assertFalse(self.User.objects.filter(email="dry@example.com").exists())
+
+    def test_import_users_command(self):
+        """Test import_users reads CSV and JSONL and reports rejected rows"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        csv_path = Path(directory.name, "users.csv")
+        csv_path.write_text(
+            "email,password,full_name,is_email_verified\n"
+            "csv@example.com,secret,CSV User,true\n"
+            "existing@example.com,,,\n"
+        )
+        jsonl_path = Path(directory.name, "users.jsonl")
+        jsonl_path.write_text(json.dumps({"email": "jsonl@example.com"}) + "\n\n")
+
+        out, err = io.StringIO(), io.StringIO()
+        call_command("import_users", str(csv_path), workers=0, stdout=out, stderr=err)
+        call_command("import_users", str(jsonl_path), workers=0, stdout=out, stderr=err)
+
+        user = self.User.objects.get(email="csv@example.com")
+        self.assertTrue(user.check_password("secret"))
+        self.assertTrue(user.is_email_verified)
+        self.assertTrue(self.User.objects.filter(email="jsonl@example.com").exists())
+        self.assertIn("1 users created, 1 rejected", out.getvalue())
+        self.assertIn("row 2 'existing@example.com': email already exists", err.getvalue())
+
+
+SCRYPT_HASHERS = [
+    "apps.users.hashers.ScryptPasswordHasher",
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
+
+
+@override_settings(
+    PASSWORD_HASHERS=SCRYPT_HASHERS,
+    PASSWORD_SCRYPT_WORK_FACTOR=2**10,
+    PASSWORD_SCRYPT_PARALLELISM=1,
+)
+class PasswordHashingTestCase(TestCase):
+    """Tests for env-tuned hashers, hashing slots and deferred rehash"""
+
+    def setUp(self):
+        caches["shared"].clear()
+
+    def test_scrypt_params_from_settings(self):
+        """Test scrypt uses work factor from settings and flags outdated hashes"""
+        encoded = make_password("secret")
+        self.assertTrue(encoded.startswith("scrypt$1024$"))
+        with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**11):
+            from django.contrib.auth.hashers import get_hasher
+
+            self.assertTrue(get_hasher().must_update(encoded))
+
+    def test_outdated_hash_rehashed_without_logout(self):
+        """Test login rehashes an outdated hash and keeps existing sessions valid"""
+        user = get_user_model().objects.create_user(email="rehash@example.com")
+        user.password = make_password("secret", hasher="md5")
+        user.save()
+        client = Client()
+        client.force_login(user)
+        session_key = client.cookies[settings.SESSION_COOKIE_NAME].value
+
+        self.assertTrue(user.check_password("secret"))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("scrypt$"))
+
+        request = RequestFactory().get("/")
+        request.session = SessionStore(session_key)
+        self.assertEqual(get_user(request), user)
+        # Django обновил hash в сессии на новый
+        self.assertEqual(request.session["_auth_user_hash"], user.get_session_auth_hash())
+
+        # После смены пароля старые сессии недействительны, несмотря на fallback
+        user.set_password("changed")
+        user.save()
+        request = RequestFactory().get("/")
+        request.session = SessionStore(session_key)
+        self.assertFalse(get_user(request).is_authenticated)
+
+    def test_rehash_queued(self):
+        """Test background mode hands rehash to the queue instead of the request"""
+        user = get_user_model().objects.create_user(email="queued@example.com")
+        user.password = make_password("secret", hasher="md5")
+        user.save()
+        with (
+            override_settings(PASSWORD_REHASH_BACKGROUND=True),
+            mock.patch.object(passwords, "rehash") as rehash,
+        ):
+            self.assertTrue(user.check_password("secret"))
+            passwords.get_rehash_queue().join()
+        rehash.assert_called_once_with(type(user), user.pk, user.password, "secret")
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_TIMEOUT=0.01)
+    def test_concurrency_cap(self):
+        """Test hashing fails fast with 503 when all slots are busy"""
+        user = get_user_model()(email="busy@example.com", password=make_password("secret"))
+        with passwords.hashing_slot():
+            with self.assertRaises(passwords.PasswordHashingBusy) as raised:
+                user.check_password("secret")
+        self.assertTrue(user.check_password("secret"))
+
+        middleware = PasswordHashingBusyMiddleware(lambda request: None)
+        response = middleware.process_exception(RequestFactory().post("/"), raised.exception)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    @override_settings(PASSWORD_HASH_CONCURRENCY=1, PASSWORD_HASH_TIMEOUT=0.01)
+    def test_wait_forever_slot(self):
+        """Test WAIT_FOREVER (background rehash) waits for a busy slot instead of failing"""
+        acquired = threading.Event()
+
+        def run():
+            with passwords.hashing_slot(timeout=passwords.WAIT_FOREVER):
+                acquired.set()
+
+        with passwords.hashing_slot():
+            thread = threading.Thread(target=run)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
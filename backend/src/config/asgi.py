@@ -4,8 +4,14 @@ ASGI config for Django Base Project.
 
 import os
 
+from apps.core.startup import init_sentry
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.dev")
 
+# Sentry - только в процессах, обслуживающих запросы (см. apps.core.startup).
+# До создания приложения: DjangoIntegration инструментирует загрузку middleware,
+# которую выполняет get_asgi_application()
+init_sentry()
+
 application = get_asgi_application()
@@ -0,0 +1,331 @@
+"""
+Ожидание внешних зависимостей (PostgreSQL, Redis, SMTP, AMQP) при старте контейнера.
+
+Без Django - используется в scripts/wait_for_db.py до загрузки приложения и в
+manage.py bootstrap. Адреса берутся из URL (DATABASE_URL, REDIS_URL, ...).
+
+Проверки дешёвые: TCP соединение и ответ сервера на первое сообщение протокола
+(startup packet PostgreSQL, PING Redis, приветствие SMTP, заголовок AMQP) - так
+видно, что сервер не только слушает порт, но и принимает соединения (PostgreSQL
+после рестарта отвечает "the database system is starting up"). Только когда сервер
+готов, выполняется одна настоящая проверка с логином (PostgreSQL через
+драйвер, Redis - AUTH). Для прочих схем URL с хостом и портом проверяется только
+TCP соединение; URL без сетевого адреса (redis+socket://, memory://) пропускаются.
+
+Пауза между попытками растёт экспоненциально со случайным разбросом (full
+jitter): реплики, стартующие одновременно после аварии, не стучатся в БД
+синхронно. Все зависимости ожидаются параллельно, с общим deadline.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import struct
+import time
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = {
+    "postgres": "postgres",
+    "postgresql": "postgres",
+    "pgsql": "postgres",
+    "psql": "postgres",
+    "postgis": "postgres",
+    "redis": "redis",
+    "rediss": "redis",
+    "smtp": "smtp",
+    "smtps": "smtp",
+    # Брокер Celery (CELERY_BROKER_URL)
+    "amqp": "amqp",
+    "amqps": "amqp",
+    "pyamqp": "amqp",
+}
+DEFAULT_PORTS = {"postgres": 5432, "redis": 6379, "smtp": 25, "amqp": 5672}
+TLS_SCHEMES = {"rediss", "smtps", "amqps"}
+TLS_PORTS = {"amqps": 5671}
+
+# Протокол PostgreSQL 3.0
+PG_PROTOCOL = 196608
+# SQLSTATE, при которых сервер жив, но соединения пока не принимает:
+# cannot_connect_now (старт, остановка, recovery), too_many_connections
+PG_NOT_READY = {"57P03", "53300"}
+# Заголовок протокола AMQP 0-9-1; готовый брокер отвечает фреймом METHOD (Connection.Start)
+AMQP_HEADER = b"AMQP\0\0\x09\x01"
+AMQP_FRAME_METHOD = b"\x01"
+
+
+class NotReady(Exception):
+    """Зависимость пока не готова"""
+
+
+class Dependency:
+    """Адрес зависимости: kind - postgres, redis, smtp, amqp или tcp (только соединение)"""
+
+    def __init__(
+        self, kind, host, port=None, user="", password="", database="", tls=False, options=None
+    ):
+        self.kind = kind
+        self.host = host or "localhost"
+        self.port = int(port or DEFAULT_PORTS[kind])
+        self.user = user
+        self.password = password
+        self.database = database
+        self.tls = tls
+        self.options = options or {}
+
+    def __repr__(self):
+        return f"{self.kind}://{self.host}:{self.port}"
+
+
+def parse_url(url):
+    """
+    Dependency из URL; None для баз без сервера (sqlite) и URL без сетевого
+    адреса. Неизвестная схема с хостом и портом - kind "tcp".
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    if scheme.startswith("sqlite"):
+        return None
+    kind = SCHEMES.get(scheme)
+    if kind is None:
+        if not (parts.hostname and parts.port):
+            logger.warning("Not waiting for %s://...: no host and port to probe", parts.scheme)
+            return None
+        logger.warning("Unknown URL scheme %r, probing TCP only", parts.scheme)
+        kind = "tcp"
+    host = unquote(parts.hostname or "")
+    database = unquote(parts.path.lstrip("/"))
+    options = dict(parse_qsl(parts.query))
+    if kind == "postgres" and not host:
+        # postgres:///db?host=/var/run/postgresql - unix socket
+        host = options.pop("host", "")
+    return Dependency(
+        kind,
+        host,
+        parts.port or TLS_PORTS.get(scheme),
+        user=unquote(parts.username or ""),
+        password=unquote(parts.password or ""),
+        database=database,
+        tls=scheme in TLS_SCHEMES,
+        options=options,
+    )
+
+
+def from_env(names, environ=None):
+    """
+    Зависимости из переменных окружения: NAME - URL (DATABASE_URL, REDIS_URL,
+    CELERY_BROKER_URL) или EMAIL_HOST (с EMAIL_PORT, EMAIL_USE_SSL). Пустые
+    переменные пропускаются; значение с "://" принимается как URL.
+    """
+    environ = os.environ if environ is None else environ
+    result = []
+    for name in names:
+        if "://" in name:
+            value = name
+        elif name == "EMAIL_HOST":
+            host = environ.get("EMAIL_HOST")
+            if host:
+                ssl = environ.get("EMAIL_USE_SSL", "").lower() in ("1", "true", "yes", "on")
+                result.append(Dependency("smtp", host, environ.get("EMAIL_PORT"), tls=ssl))
+            continue
+        else:
+            value = environ.get(name)
+        if value:
+            dependency = parse_url(value)
+            if dependency is not None:
+                result.append(dependency)
+    return result
+
+
+def backoff(base=0.1, cap=1.0):
+    """Бесконечная последовательность пауз: случайная в [0, min(cap, base * 2^n)]"""
+    attempt = 0
+    while True:
+        yield random.uniform(0, min(cap, base * 2**attempt))
+        attempt += 1
+
+
+async def _open(dependency, timeout):
+    if dependency.kind == "postgres" and dependency.host.startswith("/"):
+        path = f"{dependency.host}/.s.PGSQL.{dependency.port}"
+        return await asyncio.wait_for(asyncio.open_unix_connection(path), timeout)
+    return await asyncio.wait_for(
+        asyncio.open_connection(dependency.host, dependency.port, ssl=dependency.tls or None),
+        timeout,
+    )
+
+
+async def _close(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+
+async def _probe_postgres(dependency, reader, writer):
+    params = b"user\0%s\0database\0%s\0\0" % (
+        (dependency.user or "postgres").encode(),
+        (dependency.database or dependency.user or "postgres").encode(),
+    )
+    writer.write(struct.pack("!ii", len(params) + 8, PG_PROTOCOL) + params)
+    await writer.drain()
+    kind = await reader.readexactly(1)
+    if kind == b"R":
+        # Запрос аутентификации - сервер принимает соединения
+        return
+    if kind != b"E":
+        raise NotReady(f"unexpected response {kind!r}")
+    (length,) = struct.unpack("!i", await reader.readexactly(4))
+    fields = {}
+    for field in (await reader.readexactly(length - 4)).split(b"\0"):
+        if field:
+            fields[field[:1]] = field[1:].decode(errors="replace")
+    if fields.get(b"C") in PG_NOT_READY:
+        raise NotReady(fields.get(b"M", fields[b"C"]))
+    # Прочие ошибки (нет записи в pg_hba, неизвестная база) отвечает уже
+    # работающий сервер - их покажет проверка с логином
+
+
+async def _redis_command(reader, writer, *args):
+    command = b"*%d\r\n" % len(args)
+    for arg in args:
+        arg = arg.encode()
+        command += b"$%d\r\n%s\r\n" % (len(arg), arg)
+    writer.write(command)
+    await writer.drain()
+    reply = (await reader.readline()).decode(errors="replace").strip()
+    if not reply:
+        raise NotReady("connection closed")
+    if reply.startswith("-"):
+        # -LOADING (загрузка данных с диска), -NOAUTH, -WRONGPASS, ...
+        raise NotReady(reply[1:])
+    return reply
+
+
+async def _probe_redis(dependency, reader, writer):
+    if dependency.password:
+        auth = [dependency.user] if dependency.user else []
+        await _redis_command(reader, writer, "AUTH", *auth, dependency.password)
+    await _redis_command(reader, writer, "PING")
+
+
+async def _probe_smtp(dependency, reader, writer):
+    # Приветствие может быть многострочным: "220-...", последняя строка "220 ..."
+    while True:
+        line = (await reader.readline()).decode(errors="replace")
+        if not line:
+            raise NotReady("connection closed")
+        if line[3:4] != "-":
+            break
+    if not line.startswith("220"):
+        raise NotReady(line.strip())
+    writer.write(b"QUIT\r\n")
+    await writer.drain()
+
+
+async def _probe_amqp(dependency, reader, writer):
+    writer.write(AMQP_HEADER)
+    await writer.drain()
+    frame = await reader.readexactly(1)
+    if frame != AMQP_FRAME_METHOD:
+        # Другая версия протокола: брокер отвечает своим заголовком "AMQP..."
+        raise NotReady(f"unexpected response {frame!r}")
+
+
+async def _probe_tcp(dependency, reader, writer):
+    # Протокол неизвестен: достаточно того, что порт принимает соединения
+    pass
+
+
+PROBES = {
+    "postgres": _probe_postgres,
+    "redis": _probe_redis,
+    "smtp": _probe_smtp,
+    "amqp": _probe_amqp,
+    "tcp": _probe_tcp,
+}
+
+
+async def probe(dependency, timeout=3.0):
+    """Дешёвая проверка готовности; NotReady или OSError, если не готова"""
+    reader, writer = await _open(dependency, timeout)
+    try:
+        await asyncio.wait_for(PROBES[dependency.kind](dependency, reader, writer), timeout)
+    except asyncio.IncompleteReadError as exc:
+        raise NotReady("connection closed") from exc
+    finally:
+        await _close(writer)
+
+
+def _connect_postgres(dependency, timeout):
+    try:
+        import psycopg as driver
+    except ImportError:
+        try:
+            import psycopg2 as driver
+        except ImportError:
+            logger.warning("No PostgreSQL driver, skipping auth check of %r", dependency)
+            return
+    params = {
+        "host": dependency.host,
+        "port": dependency.port,
+        "user": dependency.user or None,
+        "password": dependency.password or None,
+        "dbname": dependency.database or None,
+        "connect_timeout": max(1, int(timeout)),
+        **dependency.options,
+    }
+    driver.connect(**{key: value for key, value in params.items() if value is not None}).close()
+
+
+async def check_auth(dependency, timeout=3.0):
+    """Проверка с логином (для Redis её выполняет probe)"""
+    if dependency.kind == "postgres":
+        await asyncio.to_thread(_connect_postgres, dependency, timeout)
+
+
+async def wait_for(dependency, deadline, auth=True, base=0.1, cap=1.0):
+    """
+    Ждать зависимость до deadline (time.monotonic()); None, если готова,
+    иначе текст последней ошибки.
+    """
+    delays = backoff(base, cap)
+    attempts = 0
+    while True:
+        attempts += 1
+        remaining = deadline - time.monotonic()
+        try:
+            await probe(dependency, timeout=min(3.0, max(remaining, 0.1)))
+            if auth:
+                await check_auth(dependency, timeout=min(5.0, max(remaining, 1.0)))
+            logger.info("%r is ready after %d attempts", dependency, attempts)
+            return None
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {str(exc).strip()}"
+        delay = next(delays)
+        if time.monotonic() + delay >= deadline:
+            logger.error("%r is not ready after %d attempts: %s", dependency, attempts, error)
+            return error
+        logger.info("Waiting for %r (%s), retry in %.2fs", dependency, error, delay)
+        await asyncio.sleep(delay)
+
+
+async def wait_all(dependencies, timeout=60.0, auth=True, base=0.1, cap=1.0):
+    """Ждать все зависимости параллельно; {dependency: ошибка} неготовых"""
+    deadline = time.monotonic() + timeout
+    errors = await asyncio.gather(
+        *(wait_for(dependency, deadline, auth, base, cap) for dependency in dependencies)
+    )
+    return {
+        dependency: error
+        for dependency, error in zip(dependencies, errors, strict=True)
+        if error is not None
+    }
+
+
+def wait(dependencies, timeout=60.0, auth=True, base=0.1, cap=1.0):
+    """Синхронная обёртка wait_all"""
+    return asyncio.run(wait_all(dependencies, timeout, auth, base, cap))
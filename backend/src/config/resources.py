@@ -0,0 +1,74 @@
+"""
+Ресурсы контейнера (cgroup v1/v2) и расчёт числа воркеров/потоков gunicorn.
+
+Используется в gunicorn.conf.py. Без Django - импортируется до загрузки приложения.
+"""
+
+import os
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit(cgroup_root=CGROUP_ROOT):
+    """
+    Доступные CPU: квота cgroup (docker --cpus), иначе affinity процесса.
+    Возвращает float - квота может быть дробной.
+    """
+    # cgroup v2: "<quota> <period>" или "max <period>"
+    cpu_max = _read(f"{cgroup_root}/cpu.max")
+    if cpu_max:
+        quota, _, period = cpu_max.partition(" ")
+        if quota != "max" and period:
+            return int(quota) / int(period)
+    else:
+        # cgroup v1
+        quota = _read(f"{cgroup_root}/cpu/cpu.cfs_quota_us")
+        period = _read(f"{cgroup_root}/cpu/cpu.cfs_period_us")
+        if quota and period and int(quota) > 0:
+            return int(quota) / int(period)
+
+    try:
+        return float(len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return float(os.cpu_count() or 1)
+
+
+def memory_limit(cgroup_root=CGROUP_ROOT):
+    """Лимит памяти в байтах (docker mem_limit) или None, если не ограничен"""
+    value = _read(f"{cgroup_root}/memory.max")
+    if value is None:
+        value = _read(f"{cgroup_root}/memory/memory.limit_in_bytes")
+    if not value or value == "max":
+        return None
+    limit = int(value)
+    # cgroup v1 без лимита отдаёт огромное число (PAGE_COUNTER_MAX)
+    if limit >= 1 << 60:
+        return None
+    return limit
+
+
+def worker_count(cpus, memory, worker_memory_mb, max_workers=None):
+    """
+    2 * CPU + 1 (классическая формула gunicorn для sync/gthread),
+    но не больше, чем помещается в лимит памяти контейнера.
+    """
+    workers = int(2 * cpus) + 1
+    if memory is not None:
+        workers = min(workers, memory // (worker_memory_mb * 1024 * 1024))
+    if max_workers is not None:
+        workers = min(workers, max_workers)
+    return max(1, workers)
+
+
+def worker_class(server_mode, threads):
+    if server_mode == "asgi":
+        return "uvicorn_worker.UvicornWorker"
+    return "gthread" if threads > 1 else "sync"
@@ -25,17 +25,23 @@ INSTALLED_APPS = [
     "apps.api",
 ]
 
+# apps.core.async_middleware - подклассы стандартных middleware (django, whitenoise),
+# которые под ASGI не переходят в поток через sync_to_async; под WSGI поведение то же
 MIDDLEWARE = [
-    "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    # Первым: request ID и замеры покрывают весь стек middleware
+    "apps.core.middleware.PerformanceMiddleware",
+    # До остальных: сжимает итоговый ответ, время сжатия входит в замеры
+    "apps.core.middleware.CompressionMiddleware",
+    "apps.core.async_middleware.SecurityMiddleware",
+    "apps.core.async_middleware.WhiteNoiseMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
-    "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
-    "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "apps.core.middleware.RequestIDMiddleware",
+    "apps.core.async_middleware.SessionMiddleware",
+    "apps.core.async_middleware.CommonMiddleware",
+    "apps.core.async_middleware.CsrfViewMiddleware",
+    "apps.core.async_middleware.AuthenticationMiddleware",
+    "apps.core.async_middleware.MessageMiddleware",
+    "apps.core.async_middleware.XFrameOptionsMiddleware",
+    "apps.users.middleware.PasswordHashingBusyMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -69,6 +75,12 @@ DATABASES = {
 # Custom User Model
 AUTH_USER_MODEL = "users.User"
 
+# request.user из кэшированного снимка без SELECT на каждый запрос (apps.users.backends).
+# Общий уровень кэша: смена пароля / деактивация сразу видны всем воркерам
+AUTHENTICATION_BACKENDS = ["apps.users.backends.CachedModelBackend"]
+AUTH_USER_CACHE_ALIAS = "shared"
+AUTH_USER_CACHE_TIMEOUT = 300
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -88,6 +100,26 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Password hashing (apps.users.hashers / apps.users.passwords).
+# Первый hasher - для новых хешей; остальные проверяют старые, которые
+# при входе пересчитываются в фоне. Argon2 требует requirements/argon2.txt
+PASSWORD_HASHERS = [
+    "apps.users.hashers.ScryptPasswordHasher",
+    "apps.users.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+]
+PASSWORD_SCRYPT_WORK_FACTOR = 2**14
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = 5
+PASSWORD_ARGON2_TIME_COST = 2
+PASSWORD_ARGON2_MEMORY_COST = 102400  # KiB
+PASSWORD_ARGON2_PARALLELISM = 8
+PASSWORD_HASH_CONCURRENCY = 2  # одновременных хеширований на процесс воркера
+PASSWORD_HASH_TIMEOUT = 5  # секунд ожидания слота, затем 503
+PASSWORD_REHASH_BACKGROUND = True
+PASSWORD_REHASH_QUEUE_SIZE = 1000
+
 # Internationalization
 LANGUAGE_CODE = "ru-ru"
 TIME_ZONE = "UTC"
@@ -115,14 +147,58 @@ REST_FRAMEWORK = {
     "DEFAULT_VERSION": "v1",
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 20,
+    # orjson, если установлен (requirements/orjson.txt), иначе stdlib json - вывод тот же
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "apps.api.renderers.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "apps.api.parsers.FastJSONParser",
     ],
 }
 
+# Кэш версий данных моделей для ETag (apps.core.versions): общий для всех воркеров
+VERSION_CACHE_ALIAS = "shared"
+
+# Сжатие ответов (apps.core.middleware.CompressionMiddleware). Порядок - предпочтение
+# сервера при равных q в Accept-Encoding; br и zstd - requirements/compression.txt
+COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]
+COMPRESSION_MIN_SIZE = 1024  # байт; streaming ответы сжимаются всегда
+COMPRESSION_THREAD_MIN_SIZE = 256 * 1024  # под ASGI тело от этого размера сжимается в потоке
+# Уровни по Content-Type: точный тип, затем "type/*", затем "*".
+# Выгрузки большие и потоковые - уровни ниже: меньше CPU на мегабайт
+COMPRESSION_LEVELS = {
+    "*": {"br": 4, "zstd": 3, "gzip": 6},
+    "application/x-ndjson": {"br": 3, "zstd": 1, "gzip": 4},
+    "text/csv": {"br": 3, "zstd": 1, "gzip": 4},
+}
+
+# Строк на одно чтение курсора при потоковой выгрузке (apps.api.export)
+API_EXPORT_CHUNK_SIZE = 2000
+
+# Фоновые задачи (apps.core.tasks). DatabaseBackend - очередь в БД, воркер -
+# manage.py run_worker; CeleryBackend включается в dev/prod при CELERY_BROKER_URL
+TASKS_BACKEND = "apps.core.tasks.backends.DatabaseBackend"
+TASKS_QUEUES = {"default": 4, "email": 4}  # очередь: параллельных задач в воркере
+TASKS_MAX_RETRIES = 3
+TASKS_RETRY_BACKOFF = 10  # секунд до первого повтора, дальше вдвое больше
+TASKS_RETRY_BACKOFF_MAX = 3600
+TASKS_LEASE = 600  # секунд на задачу, затем её возьмёт другой воркер
+TASKS_POLL_INTERVAL = 1.0  # секунд между опросами пустой очереди
+TASKS_BATCH_SIZE = 10  # задач за один запрос воркера
+
+# Фоновая отправка почты (apps.core.mail.QueuedEmailBackend): SMTP соединение потока
+# воркера закрывается после стольких писем или секунд простоя
+EMAIL_SMTP_MAX_MESSAGES = 100
+EMAIL_SMTP_IDLE_TIMEOUT = 30
+
+# manage.py migrate (apps.core.safe_migrations): таблица с таким числом строк
+# считается большой - блокирующие операции на ней требуют --allow-locking,
+# индексы строятся CONCURRENTLY. Таймауты - сессии PostgreSQL на время миграций
+MIGRATIONS_LARGE_TABLE_ROWS = 100_000
+MIGRATIONS_LOCK_TIMEOUT = "5s"
+MIGRATIONS_STATEMENT_TIMEOUT = "30min"
+MIGRATIONS_LOCK_WAIT = 600  # секунд ждать, пока мигрирует другая реплика
+
 # CORS (базовые настройки, будут переопределены в dev/prod)
 CORS_ALLOWED_ORIGINS = []
 CORS_ALLOW_CREDENTIALS = True
@@ -149,6 +225,11 @@ SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_SAMESITE = "Lax"
 SESSION_COOKIE_AGE = 86400  # 24 часа
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True  # Сессия истекает при закрытии браузера
+# Сессии в кэше с записью в БД, без UPDATE при неизменных данных (apps.core.sessions).
+# Общий уровень кэша без локального LRU: logout сразу виден всем воркерам
+SESSION_ENGINE = "apps.core.sessions"
+SESSION_CACHE_ALIAS = "shared"
+SESSION_SWEEP_BATCH_SIZE = 1000  # manage.py clearsessions удаляет пачками
 CSRF_COOKIE_HTTPONLY = True
 CSRF_COOKIE_SAMESITE = "Lax"
 
@@ -158,5 +239,25 @@ CSRF_TRUSTED_ORIGINS = []
 # Login URL
 LOGIN_URL = "/admin/login/"
 
-# WhiteNoise settings
-STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
+# Per-request performance instrumentation (apps.core.middleware.PerformanceMiddleware)
+PERFORMANCE_SERVER_TIMING = True
+PERFORMANCE_ACCESS_LOG = True
+PERFORMANCE_QUERY_BUDGET = 50
+PERFORMANCE_LATENCY_BUDGET_MS = 1000
+# Prometheus метрики запросов и /metrics (apps.core.metrics)
+METRICS_ENABLED = True
+
+# Readiness probe (apps.core.readiness): проверки в фоне, probe читает кэш
+READINESS_BACKGROUND = True
+READINESS_INTERVAL = 5  # секунд между прогонами проверок
+READINESS_TTL = 15  # результат старше - сервис считается не готовым
+READINESS_DISK_PATH = None  # по умолчанию MEDIA_ROOT
+READINESS_DISK_MIN_FREE_MB = 100
+
+# Storages. Статика: хешированные имена и .br/.gz рядом с файлами, collectstatic
+# сжимает только изменившиеся файлы и в нескольких процессах (apps.core.staticfiles)
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "apps.core.staticfiles.CompressedManifestStaticFilesStorage"},
+}
+COLLECTSTATIC_WORKERS = None  # процессов сжатия; None - по CPU контейнера
@@ -0,0 +1,45 @@
+"""
+Сборка CACHES из env (используется в dev.py и prod.py).
+
+default - двухуровневый кэш (apps.core.cache.TwoTierCache): LRU в памяти
+воркера перед общим для всех воркеров уровнем "shared":
+- REDIS_URL задан: Redis (требует requirements/redis.txt)
+- иначе: файловый кэш в CACHE_DIR (общий для воркеров одного контейнера)
+"""
+
+TWO_TIER_BACKEND = "apps.core.cache.TwoTierCache"
+REDIS_BACKEND = "django.core.cache.backends.redis.RedisCache"
+FILE_BACKEND = "django.core.cache.backends.filebased.FileBasedCache"
+
+
+def cache_settings(env):
+    """Вернуть CACHES с default (двухуровневый) и shared (общий уровень)"""
+    timeout = env.int("CACHE_TIMEOUT", default=300)
+    key_prefix = env("CACHE_KEY_PREFIX", default="")
+
+    redis_url = env("REDIS_URL", default="")
+    if redis_url:
+        shared = {"BACKEND": REDIS_BACKEND, "LOCATION": redis_url}
+    else:
+        shared = {
+            "BACKEND": FILE_BACKEND,
+            "LOCATION": env("CACHE_DIR", default="/tmp/django_cache"),
+            "OPTIONS": {"MAX_ENTRIES": env.int("CACHE_MAX_ENTRIES", default=10000)},
+        }
+    shared.update(TIMEOUT=timeout, KEY_PREFIX=key_prefix)
+
+    return {
+        "default": {
+            "BACKEND": TWO_TIER_BACKEND,
+            "TIMEOUT": timeout,
+            "KEY_PREFIX": key_prefix,
+            "OPTIONS": {
+                "SHARED": "shared",
+                "LOCAL_MAX_ENTRIES": env.int("CACHE_LOCAL_MAX_ENTRIES", default=1000),
+                # Сколько воркер может видеть значение, изменённое другим воркером
+                "LOCAL_TIMEOUT": env.float("CACHE_LOCAL_TIMEOUT", default=5),
+                "LOCK_TIMEOUT": env.float("CACHE_LOCK_TIMEOUT", default=10),
+            },
+        },
+        "shared": shared,
+    }
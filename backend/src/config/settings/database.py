@@ -0,0 +1,66 @@
+"""
+Сборка DATABASES из env (используется в dev.py и prod.py).
+
+Режимы соединений с PostgreSQL:
+- по умолчанию: persistent connections (CONN_MAX_AGE) с CONN_HEALTH_CHECKS,
+  одно соединение на поток воркера живёт между запросами
+- DB_POOL=true: пул psycopg3 (OPTIONS["pool"], Django 5.1+), требует
+  requirements/pool.txt. CONN_MAX_AGE при этом всегда 0 - соединения
+  возвращаются в пул в конце запроса.
+
+SERVER_MODE=asgi: persistent connections выключены (CONN_MAX_AGE=0) - sync код
+каждого запроса выполняется в своём потоке sync_to_async, соединение такого
+потока между запросами не переиспользуется и не закрывается (утечка).
+
+Размер пула - на процесс воркера: по умолчанию равен числу одновременных
+запросов воркера - WEB_THREADS под WSGI, WEB_ASGI_CONCURRENCY под ASGI (один
+uvicorn воркер ведёт много запросов сразу). Итого соединений не больше
+WEB_WORKERS * DB_POOL_MAX_SIZE.
+Фоновый поток readiness (apps.core.readiness) берёт соединение из пула только
+на время проверки и возвращает его после каждого прогона; без пула держит одно
+соединение открытым (независимо от CONN_MAX_AGE) и переподключается при ошибке.
+"""
+
+POSTGRESQL_ENGINE = "django.db.backends.postgresql"
+# PostgreSQL backend с метриками соединений (apps.core.metrics)
+INSTRUMENTED_POSTGRESQL_ENGINE = "apps.core.db.postgresql"
+
+
+def database_settings(env, default_url=None):
+    """Вернуть конфигурацию default базы из DATABASE_URL и DB_* переменных"""
+    if default_url is None:
+        config = env.db("DATABASE_URL")
+    else:
+        config = env.db("DATABASE_URL", default=default_url)
+
+    if config["ENGINE"] != POSTGRESQL_ENGINE:
+        return config
+
+    config["ENGINE"] = INSTRUMENTED_POSTGRESQL_ENGINE
+    config["CONN_HEALTH_CHECKS"] = env.bool("DB_CONN_HEALTH_CHECKS", default=True)
+    options = config.setdefault("OPTIONS", {})
+    options.setdefault("connect_timeout", env.int("DB_CONNECT_TIMEOUT", default=5))
+
+    asgi = env.str("SERVER_MODE", default="wsgi") == "asgi"
+    if env.bool("DB_POOL", default=False):
+        if asgi:
+            concurrency = env.int("WEB_ASGI_CONCURRENCY", default=10)
+        else:
+            concurrency = env.int("WEB_THREADS", default=1)
+        options["pool"] = {
+            "min_size": env.int("DB_POOL_MIN_SIZE", default=1),
+            "max_size": env.int("DB_POOL_MAX_SIZE", default=max(concurrency, 2)),
+            # Сколько запрос ждёт свободное соединение, прежде чем упасть
+            "timeout": env.float("DB_POOL_TIMEOUT", default=10.0),
+            "max_idle": env.float("DB_POOL_MAX_IDLE", default=600.0),
+            "max_lifetime": env.float("DB_POOL_MAX_LIFETIME", default=3600.0),
+        }
+        # Django не поддерживает пул вместе с persistent connections
+        config["CONN_MAX_AGE"] = 0
+    elif asgi:
+        # Django: persistent connections под ASGI не поддерживаются
+        config["CONN_MAX_AGE"] = 0
+    else:
+        config["CONN_MAX_AGE"] = env.int("DB_CONN_MAX_AGE", default=60)
+
+    return config
@@ -6,6 +6,8 @@
 import environ
 
 from .base import *
+from .cache import cache_settings
+from .database import database_settings
 
 env = environ.Env(
     DEBUG=(bool, True),
@@ -21,10 +23,21 @@ SECRET_KEY = env("SECRET_KEY", default="django-insecure-dev-key-change-me-in-pro
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS", default=["localhost", "127.0.0.1", "backend"])
 
 # Database
+# Persistent connections / пул psycopg3 - см. config/settings/database.py
 DATABASES = {
-    "default": env.db("DATABASE_URL", default="postgresql://app_user:app_password@db:5432/app_db")
+    "default": database_settings(
+        env, default_url="postgresql://app_user:app_password@db:5432/app_db"
+    )
 }
 
+# Cache: LRU в памяти воркера + общий Redis/файловый кэш - см. config/settings/cache.py
+CACHES = cache_settings(env)
+
+# Фоновые задачи: Celery, если задан брокер (requirements/celery.txt), иначе очередь в БД
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="")
+if CELERY_BROKER_URL:
+    TASKS_BACKEND = "apps.core.tasks.backends.CeleryBackend"
+
 # CORS для dev
 CORS_ALLOWED_ORIGINS = env.list(
     "CORS_ALLOWED_ORIGINS",
@@ -6,6 +6,8 @@
 import environ
 
 from .base import *
+from .cache import cache_settings
+from .database import database_settings
 
 env = environ.Env(
     DEBUG=(bool, False),
@@ -21,7 +23,19 @@ SECRET_KEY = env("SECRET_KEY")  # Обязательно в prod!
 ALLOWED_HOSTS = env.list("ALLOWED_HOSTS")  # Обязательно указать в prod!
 
 # Database
-DATABASES = {"default": env.db("DATABASE_URL")}
+# Persistent connections / пул psycopg3 - см. config/settings/database.py
+DATABASES = {"default": database_settings(env)}
+
+# Cache: LRU в памяти воркера + общий Redis/файловый кэш - см. config/settings/cache.py
+CACHES = cache_settings(env)
+
+# Фоновые задачи: Celery, если задан брокер (requirements/celery.txt), иначе очередь в БД
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="")
+if CELERY_BROKER_URL:
+    TASKS_BACKEND = "apps.core.tasks.backends.CeleryBackend"
+
+# Sessions: apps.core.sessions (кэш + БД); django.contrib.sessions.backends.db - только БД
+SESSION_ENGINE = env("SESSION_ENGINE", default=SESSION_ENGINE)
 
 # CORS для prod (строгие настройки)
 CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS", default=[])
@@ -29,12 +43,34 @@ CORS_ALLOWED_ORIGINS = env.list("CORS_ALLOWED_ORIGINS", default=[])
 CSRF_TRUSTED_ORIGINS = env.list("CSRF_TRUSTED_ORIGINS", default=[])
 
 # Logging для prod (JSON structured logs)
+# LOG_ASYNC=true: запись в stderr выполняет фоновый writer пачками,
+# поток запроса только кладёт запись в bounded очередь (apps.core.logging.AsyncBatchingHandler)
+LOG_ASYNC = env.bool("LOG_ASYNC", default=False)
+
+if LOG_ASYNC:
+    _console_handler = {
+        "class": "apps.core.logging.AsyncBatchingHandler",
+        "formatter": "json",
+        "filters": ["request_id"],
+        "capacity": env.int("LOG_QUEUE_CAPACITY", default=10000),
+        "batch_size": env.int("LOG_BATCH_SIZE", default=256),
+        "flush_interval": env.float("LOG_FLUSH_INTERVAL", default=0.5),
+        "overflow": env("LOG_OVERFLOW_POLICY", default="drop"),
+    }
+else:
+    _console_handler = {
+        "class": "logging.StreamHandler",
+        "formatter": "json",
+        "filters": ["request_id"],
+    }
+
 LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
     "formatters": {
         "json": {
             "()": "apps.core.logging.JSONFormatter",
+            "encoder": env("LOG_JSON_ENCODER", default="auto"),
         },
     },
     "filters": {
@@ -43,11 +79,7 @@ LOGGING = {
         },
     },
     "handlers": {
-        "console": {
-            "class": "logging.StreamHandler",
-            "formatter": "json",
-            "filters": ["request_id"],
-        },
+        "console": _console_handler,
     },
     "root": {
         "handlers": ["console"],
@@ -67,6 +99,39 @@ LOGGING = {
     },
 }
 
+# Performance instrumentation: Server-Timing раскрывает тайминги клиенту - в prod по желанию
+PERFORMANCE_SERVER_TIMING = env.bool("PERFORMANCE_SERVER_TIMING", default=False)
+PERFORMANCE_ACCESS_LOG = env.bool("PERFORMANCE_ACCESS_LOG", default=True)
+PERFORMANCE_QUERY_BUDGET = env.int("PERFORMANCE_QUERY_BUDGET", default=50)
+PERFORMANCE_LATENCY_BUDGET_MS = env.int("PERFORMANCE_LATENCY_BUDGET_MS", default=1000)
+
+# Readiness probe: как часто фоновый поток проверяет зависимости
+READINESS_INTERVAL = env.float("READINESS_INTERVAL", default=5)
+READINESS_TTL = env.float("READINESS_TTL", default=15)
+
+# manage.py migrate на больших таблицах (apps.core.safe_migrations)
+MIGRATIONS_LARGE_TABLE_ROWS = env.int("MIGRATIONS_LARGE_TABLE_ROWS", default=100_000)
+MIGRATIONS_LOCK_TIMEOUT = env("MIGRATIONS_LOCK_TIMEOUT", default="5s")
+MIGRATIONS_STATEMENT_TIMEOUT = env("MIGRATIONS_STATEMENT_TIMEOUT", default="30min")
+
+# Password hashing: алгоритм новых хешей и его параметры. Смена параметров
+# обновляет хеши при следующем входе (в фоне, apps.users.passwords)
+_PREFERRED_HASHERS = {
+    "scrypt": "apps.users.hashers.ScryptPasswordHasher",
+    "argon2": "apps.users.hashers.Argon2PasswordHasher",
+    "pbkdf2": "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+}
+_preferred_hasher = _PREFERRED_HASHERS[env("PASSWORD_HASHER", default="scrypt")]
+PASSWORD_HASHERS = [_preferred_hasher] + [h for h in PASSWORD_HASHERS if h != _preferred_hasher]
+PASSWORD_SCRYPT_WORK_FACTOR = env.int("PASSWORD_SCRYPT_WORK_FACTOR", default=2**14)
+PASSWORD_SCRYPT_BLOCK_SIZE = env.int("PASSWORD_SCRYPT_BLOCK_SIZE", default=8)
+PASSWORD_SCRYPT_PARALLELISM = env.int("PASSWORD_SCRYPT_PARALLELISM", default=5)
+PASSWORD_ARGON2_TIME_COST = env.int("PASSWORD_ARGON2_TIME_COST", default=2)
+PASSWORD_ARGON2_MEMORY_COST = env.int("PASSWORD_ARGON2_MEMORY_COST", default=102400)
+PASSWORD_ARGON2_PARALLELISM = env.int("PASSWORD_ARGON2_PARALLELISM", default=8)
+PASSWORD_HASH_CONCURRENCY = env.int("PASSWORD_HASH_CONCURRENCY", default=2)
+PASSWORD_HASH_TIMEOUT = env.float("PASSWORD_HASH_TIMEOUT", default=5)
+
 # Security для prod (все включено)
 SECURE_SSL_REDIRECT = env.bool("SECURE_SSL_REDIRECT", default=True)
 SECURE_HSTS_SECONDS = env.int("SECURE_HSTS_SECONDS", default=31536000)
@@ -79,34 +144,19 @@ CSRF_COOKIE_SECURE = True
 SESSION_COOKIE_HTTPONLY = True
 CSRF_COOKIE_HTTPONLY = True
 
-# Sentry (опционально, graceful degradation)
+# Sentry (опционально, graceful degradation). sentry-sdk импортируется и
+# инициализируется в процессах, обслуживающих запросы и задачи
+# (apps.core.startup.init_sentry), а не при каждой загрузке настроек
 SENTRY_DSN = env.str("SENTRY_DSN", default="")
-if SENTRY_DSN and not DEBUG:
-    try:
-        import logging
-
-        import sentry_sdk
-        from sentry_sdk.integrations.django import DjangoIntegration
-        from sentry_sdk.integrations.logging import LoggingIntegration
-
-        sentry_sdk.init(
-            dsn=SENTRY_DSN,
-            integrations=[
-                DjangoIntegration(),
-                LoggingIntegration(level=logging.INFO, event_level=logging.ERROR),
-            ],
-            traces_sample_rate=env.float("SENTRY_TRACES_SAMPLE_RATE", default=0.1),
-            send_default_pii=False,
-            environment=env("ENVIRONMENT", default="production"),
-        )
-    except ImportError:
-        # Sentry не установлен - игнорируем
-        pass
+SENTRY_TRACES_SAMPLE_RATE = env.float("SENTRY_TRACES_SAMPLE_RATE", default=0.1)
+SENTRY_ENVIRONMENT = env("ENVIRONMENT", default="production")
 
 # Email settings (если нужны)
-EMAIL_BACKEND = env("EMAIL_BACKEND", default="django.core.mail.backends.smtp.EmailBackend")
+# По умолчанию письма ставятся в очередь задач и уходят по SMTP из воркера (apps.core.mail)
+EMAIL_BACKEND = env("EMAIL_BACKEND", default="apps.core.mail.QueuedEmailBackend")
 EMAIL_HOST = env("EMAIL_HOST", default="")
 EMAIL_PORT = env.int("EMAIL_PORT", default=587)
 EMAIL_USE_TLS = env.bool("EMAIL_USE_TLS", default=True)
 EMAIL_HOST_USER = env("EMAIL_HOST_USER", default="")
 EMAIL_HOST_PASSWORD = env("EMAIL_HOST_PASSWORD", default="")
+EMAIL_TIMEOUT = env.int("EMAIL_TIMEOUT", default=10)  # секунд на SMTP операцию
@@ -17,10 +17,34 @@ DATABASES = {
     }
 }
 
+# Двухуровневый кэш поверх LocMem вместо Redis/файлов
+CACHES = {
+    "default": {
+        "BACKEND": "apps.core.cache.TwoTierCache",
+        "OPTIONS": {"SHARED": "shared"},
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+}
+
+# Статика без manifest: тесты не запускают collectstatic
+STORAGES = {
+    **STORAGES,
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # Ускоряем тесты
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
 ]
+PASSWORD_REHASH_BACKGROUND = False
+
+# Readiness проверки в потоке запроса, без фонового потока
+READINESS_BACKGROUND = False
+
+# Задачи выполняются сразу при enqueue; DatabaseBackend тесты задают явно
+TASKS_BACKEND = "apps.core.tasks.backends.ImmediateBackend"
 
 # Отключаем миграции в тестах (опционально)
 # Можно включить, если нужны реальные миграции
@@ -0,0 +1,120 @@
+"""
+Gunicorn configuration (подхватывается автоматически из рабочей директории /app/src).
+
+Число воркеров и потоков считается из CPU и памяти контейнера (cgroup),
+явные значения - через WEB_WORKERS / WEB_THREADS. Итоговые значения
+экспортируются в env, их читают настройки Django (размер пула соединений).
+"""
+
+import os
+import time
+
+from config import resources
+
+SERVER_MODE = os.environ.get("SERVER_MODE", "wsgi")
+
+_cpus = resources.cpu_limit()
+_memory = resources.memory_limit()
+
+# Потоки на воркер: gthread для WSGI, для uvicorn не используются
+threads = int(os.environ.get("WEB_THREADS", 1 if SERVER_MODE == "asgi" else 4))
+workers = int(
+    os.environ.get("WEB_WORKERS")
+    or resources.worker_count(
+        _cpus,
+        _memory,
+        worker_memory_mb=int(os.environ.get("WEB_WORKER_MEMORY_MB", 120)),
+        max_workers=int(os.environ.get("WEB_MAX_WORKERS", 8)),
+    )
+)
+worker_class = resources.worker_class(SERVER_MODE, threads)
+wsgi_app = "config.asgi:application" if SERVER_MODE == "asgi" else "config.wsgi:application"
+
+os.environ["WEB_WORKERS"] = str(workers)
+os.environ["WEB_THREADS"] = str(threads)
+
+bind = os.environ.get("WEB_BIND", "0.0.0.0:8000")
+timeout = int(os.environ.get("WEB_TIMEOUT", 300))
+graceful_timeout = int(os.environ.get("WEB_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("WEB_KEEPALIVE", 5))
+
+# Django загружается один раз в master, воркеры получают его через fork (copy-on-write)
+preload_app = os.environ.get("WEB_PRELOAD", "true").lower() == "true"
+
+# Перезапуск воркера после N запросов (с разбросом, чтобы не все сразу) - против роста памяти
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.environ.get("WEB_MAX_REQUESTS_JITTER", 100))
+
+# Heartbeat-файлы воркеров на tmpfs: на overlayfs запись может блокироваться
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = "-"
+errorlog = "-"
+
+
+def _close_db_connections():
+    from django.db import connections
+
+    for alias in connections:
+        connection = connections[alias]
+        connection.close()
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+
+
+def _warm_up():
+    from apps.core.startup import warm_up
+
+    start = time.monotonic()
+    warm_up()
+    return time.monotonic() - start
+
+
+def on_starting(server):
+    # С preload_app приложение уже загружено: URLconf, views и DRF импортируются
+    # здесь один раз, воркеры получают их через fork готовыми
+    if preload_app:
+        server.log.info("Warmed up in %.3fs", _warm_up())
+    server.log.info(
+        "Sizing: cpus=%.2f memory=%s -> %s %s workers x %s threads",
+        _cpus,
+        f"{_memory // (1024 * 1024)}MB" if _memory else "unlimited",
+        workers,
+        worker_class,
+        threads,
+    )
+
+
+def pre_fork(server, worker):
+    # С preload_app соединения, открытые в master (например, при импорте),
+    # нельзя разделять между процессами - закрываем до fork
+    if preload_app:
+        _close_db_connections()
+    worker.forked_at = time.monotonic()
+
+
+def post_fork(server, worker):
+    # Сокеты БД, унаследованные от master, в воркере не используем:
+    # забываем их без закрытия, чтобы не оборвать чужое соединение
+    if preload_app:
+        from django.db import connections
+
+        for connection in connections.all(initialized_only=True):
+            connection.connection = None
+
+
+def post_worker_init(worker):
+    if not preload_app:
+        _warm_up()
+    worker.log.info(
+        "Worker %s ready in %.3fs", worker.pid, time.monotonic() - getattr(worker, "forked_at", 0)
+    )
+
+
+def child_exit(server, worker):
+    """Убираем live-gauge умершего воркера из агрегата Prometheus"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)